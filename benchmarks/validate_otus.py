@@ -0,0 +1,135 @@
+"""
+Benchmark the validation of OTUs when importing a reference.
+
+Compares :func:`virtool.references.utils.validate_otu` with the previous
+implementation, which created new Cerberus validators for every OTU and normalized
+every document it validated.
+
+Run with the project installed::
+
+    python benchmarks/validate_otus.py --otus 10000
+
+"""
+import argparse
+import platform
+import random
+import time
+from typing import Callable, List
+
+from cerberus import Validator
+
+from virtool.references.utils import (
+    get_isolate_schema,
+    get_otu_schema,
+    get_sequence_schema,
+    validate_otu,
+)
+
+
+def validate_otu_uncached(otu: dict, strict: bool) -> dict:
+    """
+    Validate an OTU the way :func:`validate_otu` did before validators were cached.
+
+    """
+    report = {"otu": None, "isolates": {}, "sequences": {}}
+
+    otu_validator = Validator(get_otu_schema(strict), allow_unknown=True)
+
+    if not otu_validator.validate(otu):
+        report["otu"] = otu_validator.errors
+
+    report["isolates"] = {}
+
+    if "isolates" in otu:
+        isolate_validator = Validator(get_isolate_schema(strict), allow_unknown=True)
+        sequence_validator = Validator(get_sequence_schema(strict), allow_unknown=True)
+
+        for isolate in otu["isolates"]:
+            if not isolate_validator.validate(isolate):
+                report["isolates"][isolate["id"]] = isolate_validator.errors
+
+            if "sequences" in isolate:
+                for sequence in isolate["sequences"]:
+                    if not sequence_validator.validate(sequence):
+                        report["sequences"][sequence["_id"]] = isolate_validator.errors
+
+    if any(value for value in report.values()):
+        return report
+
+
+def create_otus(count: int, isolates: int, sequences: int) -> List[dict]:
+    """
+    Create a synthetic reference with ``count`` OTUs.
+
+    :param count: the number of OTUs
+    :param isolates: the number of isolates per OTU
+    :param sequences: the number of sequences per isolate
+    :return: the OTUs
+
+    """
+    rng = random.Random(0)
+
+    return [
+        {
+            "_id": f"otu_{otu_index}",
+            "abbreviation": f"V{otu_index}",
+            "name": f"Virus {otu_index}",
+            "schema": [],
+            "isolates": [
+                {
+                    "id": f"isolate_{otu_index}_{isolate_index}",
+                    "default": isolate_index == 0,
+                    "source_name": str(isolate_index),
+                    "source_type": "isolate",
+                    "sequences": [
+                        {
+                            "_id": f"sequence_{otu_index}_{isolate_index}_{index}",
+                            "accession": f"AB{otu_index:06}.{index}",
+                            "definition": f"Virus {otu_index} segment {index}",
+                            "host": "Malus domestica",
+                            "sequence": "".join(rng.choices("ATGC", k=1000)),
+                        }
+                        for index in range(sequences)
+                    ],
+                }
+                for isolate_index in range(isolates)
+            ],
+        }
+        for otu_index in range(count)
+    ]
+
+
+def run(validate: Callable[[dict, bool], dict], otus: List[dict]) -> float:
+    start = time.perf_counter()
+
+    for otu in otus:
+        validate(otu, True)
+
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--otus", default=10000, type=int)
+    parser.add_argument("--isolates", default=2, type=int)
+    parser.add_argument("--sequences", default=2, type=int)
+    args = parser.parse_args()
+
+    otus = create_otus(args.otus, args.isolates, args.sequences)
+
+    print(
+        f"Validating {args.otus} OTUs with {args.isolates} isolates and "
+        f"{args.sequences} sequences each on {platform.python_implementation()} "
+        f"{platform.python_version()}"
+    )
+
+    for name, validate in [
+        ("before", validate_otu_uncached),
+        ("after", validate_otu),
+    ]:
+        elapsed = run(validate, otus)
+        print(f"{name}: {elapsed:.1f} s ({args.otus / elapsed:.0f} OTUs/s)")
+
+
+if __name__ == "__main__":
+    main()
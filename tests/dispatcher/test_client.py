@@ -1,9 +1,14 @@
-from asyncio import wait_for
+import json
+from asyncio import sleep, wait_for
 
 from aiojobs import create_scheduler
 from aioredis import Redis
 
-from virtool.dispatcher.client import DispatcherClient
+from virtool.dispatcher.client import (
+    DISPATCH_STREAM,
+    DISPATCH_STREAM_LENGTH,
+    DispatcherClient,
+)
 
 
 async def test_client(loop, redis: Redis):
@@ -28,3 +33,66 @@ async def test_client(loop, redis: Redis):
     }
 
     await scheduler.close()
+
+
+async def test_coalesce(loop, mocker):
+    """
+    Test that changes enqueued within the window are coalesced into one message per
+    interface and operation, and that superseded changes are dropped.
+
+    """
+    redis = mocker.Mock(spec=Redis)
+    redis.publish = mocker.AsyncMock()
+
+    interface = DispatcherClient(redis, window=0.05)
+
+    scheduler = await create_scheduler()
+    await scheduler.spawn(interface.run())
+
+    interface.enqueue_change("samples", "insert", ["a"])
+    interface.enqueue_change("samples", "update", ["a", "b"])
+    interface.enqueue_change("samples", "update", ["c", "b"])
+    interface.enqueue_change("samples", "delete", ["c"])
+    interface.enqueue_change("labels", "update", [1])
+    interface.enqueue_change("labels", "update", [])
+
+    await sleep(0.2)
+
+    assert [json.loads(call.args[1]) for call in redis.publish.call_args_list] == [
+        {"interface": "samples", "operation": "insert", "id_list": ["a"]},
+        {"interface": "samples", "operation": "update", "id_list": ["b"]},
+        {"interface": "samples", "operation": "delete", "id_list": ["c"]},
+        {"interface": "labels", "operation": "update", "id_list": [1]},
+    ]
+
+    await scheduler.close()
+
+
+async def test_stream(loop, mocker):
+    """
+    Test that changes are added to the dispatch stream when streams are enabled.
+
+    """
+    redis = mocker.Mock(spec=Redis)
+    redis.xadd = mocker.AsyncMock()
+
+    interface = DispatcherClient(redis, window=0, stream=True)
+
+    scheduler = await create_scheduler()
+    await scheduler.spawn(interface.run())
+
+    interface.enqueue_change("samples", "update", [1, 3, 4])
+
+    await sleep(0.05)
+
+    redis.xadd.assert_called_once_with(
+        DISPATCH_STREAM,
+        {
+            "change": json.dumps(
+                {"interface": "samples", "operation": "update", "id_list": [1, 3, 4]}
+            )
+        },
+        max_len=DISPATCH_STREAM_LENGTH,
+    )
+
+    await scheduler.close()
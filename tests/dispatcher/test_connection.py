@@ -1,4 +1,10 @@
+import asyncio
+
+import pytest
+from aiohttp.test_utils import make_mocked_coro
+
 from virtool.api.custom_json import dumps
+from virtool.dispatcher.connection import RESYNC_MESSAGE
 from virtool.users.utils import Permission
 
 
@@ -32,6 +38,168 @@ async def test_send(ws):
     )
 
 
+async def test_send_encoded(ws):
+    await ws.send_encoded('{"interface": "users"}')
+    ws._ws.send_str.assert_called_with('{"interface": "users"}')
+
+
 async def test_close(ws):
     await ws.close(1000)
     ws._ws.close.assert_called()
+
+
+def test_enqueue_coalesce(ws):
+    """
+    Test that a queued message is replaced by a newer message with the same key and
+    that messages without keys are never replaced.
+
+    """
+    ws.enqueue("a", ("otus", "update", "foo"))
+    ws.enqueue("b")
+    ws.enqueue("c", ("otus", "update", "foo"))
+    ws.enqueue("d")
+
+    assert list(ws._queue.values()) == ["b", "c", "d"]
+    assert ws.coalesced == 1
+    assert ws.dropped == 0
+
+
+def test_enqueue_full(ws):
+    """
+    Test that the oldest message with a key is dropped when the queue is full and that
+    the client is told to reload its data once.
+
+    """
+    ws._max_queue_size = 2
+
+    ws.enqueue("a", ("otus", "update", "foo"))
+    ws.enqueue("b", ("otus", "update", "bar"))
+    ws.enqueue("c", ("otus", "update", "baz"))
+    ws.enqueue("d", ("otus", "update", "qux"))
+
+    assert list(ws._queue.values()) == [RESYNC_MESSAGE, "c", "d"]
+    assert ws.dropped == 2
+
+
+def test_enqueue_full_delete(ws):
+    """
+    Test that messages without keys, such as deletes, are never dropped.
+
+    """
+    ws._max_queue_size = 2
+
+    ws.enqueue("a")
+    ws.enqueue("b", ("otus", "update", "foo"))
+    ws.enqueue("c")
+    ws.enqueue("d")
+
+    assert list(ws._queue.values()) == ["a", RESYNC_MESSAGE, "c", "d"]
+    assert ws.dropped == 1
+
+
+async def test_writer(ws):
+    """
+    Test that the writer task sends queued messages in order.
+
+    """
+    ws.enqueue("a")
+
+    ws.start()
+
+    ws.enqueue("b")
+    ws.enqueue("c")
+
+    await asyncio.sleep(0.01)
+
+    assert [call.args[0] for call in ws._ws.send_str.call_args_list] == [
+        "a",
+        "b",
+        "c",
+    ]
+    assert ws._queue == {}
+
+    ws.stop()
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        ConnectionResetError("Connection lost"),
+        RuntimeError("unable to perform operation on <TCPTransport closed=True>"),
+    ],
+)
+async def test_writer_error(error, mocker, ws):
+    """
+    Test that the writer stops and reports the connection when sending fails, and that
+    no more messages are queued for the connection.
+
+    """
+    ws._ws.send_str = make_mocked_coro(raise_exception=error)
+
+    on_error = mocker.Mock()
+
+    ws.enqueue("a")
+    ws.enqueue("b")
+
+    ws.start(on_error)
+
+    await asyncio.sleep(0.01)
+
+    on_error.assert_called_once_with(ws)
+
+    assert ws.failed is True
+    assert ws._queue == {}
+
+    ws.enqueue("c")
+
+    assert ws._queue == {}
+
+
+def test_subscriptions(ws):
+    """
+    Test that a connection receives everything until it subscribes and then only
+    receives the interfaces and resources it is subscribed to.
+
+    """
+    assert ws.is_subscribed("history")
+    assert ws.get_subscribed_ids("samples") is None
+
+    ws.handle_message('{"operation": "subscribe", "interface": "samples"}')
+    ws.handle_message(
+        '{"operation": "subscribe", "interface": "references", "id_list": ["foo"]}'
+    )
+
+    assert not ws.is_subscribed("history")
+    assert ws.is_subscribed("samples", "bar")
+    assert ws.is_subscribed("references")
+    assert ws.is_subscribed("references", "foo")
+    assert not ws.is_subscribed("references", "bar")
+
+    assert ws.get_subscribed_ids("samples") is None
+    assert ws.get_subscribed_ids("references") == {"foo"}
+    assert ws.get_subscribed_ids("history") == set()
+
+    ws.handle_message(
+        '{"operation": "unsubscribe", "interface": "references", "id_list": ["foo"]}'
+    )
+    ws.handle_message('{"operation": "unsubscribe", "interface": "samples"}')
+
+    assert not ws.is_subscribed("references")
+    assert not ws.is_subscribed("samples")
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "not json",
+        "[]",
+        '{"operation": "subscribe"}',
+        '{"operation": "subscribe", "interface": 5}',
+        '{"operation": "subscribe", "interface": "samples", "id_list": "foo"}',
+        '{"operation": "subscribe", "interface": "samples", "id_list": [{}]}',
+    ],
+)
+def test_handle_malformed_message(data, ws):
+    ws.handle_message(data)
+    assert ws.is_subscribed("samples")
+    assert ws._subscriptions is None
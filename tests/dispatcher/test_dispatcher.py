@@ -1,6 +1,12 @@
+import asyncio
+import json
+
+import pytest
 from aioredis import Redis, Channel
 from sqlalchemy.ext.asyncio import AsyncEngine
 
+from virtool.dispatcher.change import Change
+from virtool.dispatcher.connection import Connection
 from virtool.dispatcher.dispatcher import Dispatcher
 from virtool.dispatcher.listener import RedisDispatcherListener
 
@@ -13,7 +19,229 @@ def test_add_and_remove_connection(mocker, dbi, pg: AsyncEngine, channel: Channe
     dispatcher.add_connection(m)
 
     assert m in dispatcher._connections
+    m.start.assert_called_once_with(dispatcher.remove_connection)
 
     dispatcher.remove_connection(m)
 
     assert dispatcher._connections == []
+    m.stop.assert_called_once()
+
+
+async def test_dispatch(mocker, dbi, pg: AsyncEngine, channel: Channel, redis: Redis):
+    """
+    Test that each message is encoded once and queued for every connection it is
+    paired with.
+
+    """
+    dispatcher = Dispatcher(pg, dbi, RedisDispatcherListener(channel, redis))
+
+    connections = [mocker.Mock(user_id=f"bob_{i}") for i in range(3)]
+
+    for connection in connections:
+        connection.get_subscribed_ids.return_value = None
+        dispatcher.add_connection(connection)
+
+    message = {"interface": "otus", "operation": "update", "data": {"id": "foo"}}
+
+    async def fetch(change, connections):
+        for connection in connections:
+            yield connection, message
+
+    mocker.patch.object(dispatcher._fetchers.otus, "fetch", fetch)
+
+    m_dumps = mocker.patch("virtool.dispatcher.dispatcher.dumps", return_value="json")
+
+    await dispatcher._dispatch(Change("otus", "update", ["foo"]))
+
+    m_dumps.assert_called_once_with(message)
+
+    for connection in connections:
+        connection.enqueue.assert_called_once_with("json", ("otus", "update", "foo"))
+
+
+async def test_dispatch_subscriptions(
+    mocker, dbi, pg: AsyncEngine, channel: Channel, redis: Redis
+):
+    """
+    Test that fetching is skipped when no connections are subscribed and that only
+    subscribed resources are fetched and queued otherwise.
+
+    """
+    dispatcher = Dispatcher(pg, dbi, RedisDispatcherListener(channel, redis))
+
+    ws = mocker.Mock()
+    ws.user_id = "bob"
+
+    connection = Connection(ws, ws)
+
+    dispatcher._connections.append(connection)
+    mocker.patch.object(connection, "enqueue")
+
+    fetched = []
+
+    async def fetch(change, connections):
+        fetched.append(change.id_list)
+
+        for id_ in change.id_list:
+            message = {"interface": "otus", "operation": "update", "data": {"id": id_}}
+
+            for connection in connections:
+                yield connection, message
+
+    mocker.patch.object(dispatcher._fetchers.otus, "fetch", fetch)
+
+    connection.subscribe("samples")
+
+    await dispatcher._dispatch(Change("otus", "update", ["foo", "bar"]))
+
+    assert fetched == []
+
+    connection.subscribe("otus", ["bar", "baz"])
+
+    await dispatcher._dispatch(Change("otus", "update", ["foo", "bar"]))
+
+    assert fetched == [["bar"]]
+    connection.enqueue.assert_called_once_with(
+        '{"interface": "otus", "operation": "update", "data": {"id": "bar"}}',
+        ("otus", "update", "bar"),
+    )
+
+
+async def test_handle_repeats(
+    mocker, dbi, pg: AsyncEngine, channel: Channel, redis: Redis
+):
+    """
+    Test that identical changes received within the repeat window result in one
+    immediate and one deferred dispatch.
+
+    """
+    mocker.patch("virtool.dispatcher.dispatcher.REPEAT_WINDOW", 0.05)
+
+    dispatcher = Dispatcher(pg, dbi, RedisDispatcherListener(channel, redis))
+
+    m_dispatch = mocker.patch.object(dispatcher, "_dispatch")
+
+    change = Change("tasks", "update", [1])
+
+    for _ in range(5):
+        await dispatcher._handle(change)
+
+    await dispatcher._handle(Change("tasks", "delete", [1]))
+    await dispatcher._handle(Change("tasks", "delete", [1]))
+
+    assert m_dispatch.call_count == 3
+
+    await asyncio.sleep(0.1)
+
+    assert m_dispatch.call_count == 4
+    m_dispatch.assert_called_with(change)
+
+
+@pytest.mark.parametrize("replayable", [True, False])
+async def test_replay(replayable, mocker, dbi, pg: AsyncEngine):
+    """
+    Test that changes after a stream ID are dispatched to the resuming connection
+    with their stream IDs, and that the connection is told to reload when they can't
+    be replayed.
+
+    """
+    listener = mocker.Mock()
+    listener.read_since = mocker.AsyncMock(
+        return_value=[Change("otus", "update", ["foo"], stream_id="2-0")]
+        if replayable
+        else None
+    )
+
+    dispatcher = Dispatcher(pg, dbi, listener)
+
+    connection = mocker.Mock(user_id="bob")
+    connection.get_subscribed_ids.return_value = None
+
+    other = mocker.Mock(user_id="fred")
+
+    dispatcher.add_connection(connection)
+    dispatcher.add_connection(other)
+
+    async def fetch(change, connections):
+        for connection in connections:
+            yield connection, {
+                "interface": "otus",
+                "operation": "update",
+                "data": {"id": "foo"},
+            }
+
+    mocker.patch.object(dispatcher._fetchers.otus, "fetch", fetch)
+
+    await dispatcher.replay(connection, "1-0")
+
+    listener.read_since.assert_called_once_with("1-0")
+    other.enqueue.assert_not_called()
+
+    if replayable:
+        connection.enqueue.assert_called_once_with(
+            json.dumps(
+                {
+                    "interface": "otus",
+                    "operation": "update",
+                    "data": {"id": "foo"},
+                    "stream_id": "2-0",
+                }
+            ),
+            ("otus", "update", "foo"),
+        )
+    else:
+        connection.enqueue.assert_called_once_with(
+            json.dumps(
+                {"interface": "dispatcher", "operation": "resume_failed", "data": None}
+            )
+        )
+
+
+async def test_replay_holds_live_changes(mocker, dbi, pg: AsyncEngine):
+    """
+    Test that live changes received during a replay are dispatched to the resuming
+    connection after the replayed changes, skipping those that were replayed.
+
+    """
+    listener = mocker.Mock()
+
+    dispatcher = Dispatcher(pg, dbi, listener)
+
+    async def read_since(stream_id):
+        await dispatcher._dispatch(Change("otus", "update", ["foo"], stream_id="2-0"))
+        await dispatcher._dispatch(Change("otus", "update", ["bar"], stream_id="3-0"))
+
+        return [Change("otus", "update", ["foo"], stream_id="2-0")]
+
+    listener.read_since = read_since
+
+    connection = mocker.Mock(user_id="bob")
+    connection.get_subscribed_ids.return_value = None
+
+    other = mocker.Mock(user_id="fred")
+    other.get_subscribed_ids.return_value = None
+
+    dispatcher.add_connection(connection)
+    dispatcher.add_connection(other)
+
+    async def fetch(change, connections):
+        for connection in connections:
+            yield connection, {
+                "interface": "otus",
+                "operation": "update",
+                "data": {"id": change.id_list[0]},
+            }
+
+    mocker.patch.object(dispatcher._fetchers.otus, "fetch", fetch)
+
+    await dispatcher.replay(connection, "1-0")
+
+    assert [call.args[1][2] for call in connection.enqueue.call_args_list] == [
+        "foo",
+        "bar",
+    ]
+    assert [call.args[1][2] for call in other.enqueue.call_args_list] == [
+        "foo",
+        "bar",
+    ]
+    assert dispatcher._held == {}
@@ -2,6 +2,7 @@ import pytest
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
 from virtool.dispatcher.events import DispatcherSQLEvents
+from virtool.labels.db import get_label_cache
 from virtool.labels.models import Label
 
 
@@ -58,3 +59,21 @@ async def test_events(rollback, mocker, pg: AsyncEngine):
             ("labels", "insert", [3]),
             ("labels", "insert", [4]),
         ]
+
+
+async def test_events_clear_label_cache(pg: AsyncEngine):
+    """
+    Test that the label cache is cleared when a change to a label is committed.
+
+    """
+    DispatcherSQLEvents(lambda *args: None)
+
+    cache = get_label_cache(pg)
+
+    assert await cache.get_all() == {}
+
+    async with AsyncSession(pg) as session:
+        session.add(Label(name="Test", color="#D97706", description="This is a test"))
+        await session.commit()
+
+    assert [label["name"] for label in (await cache.get_all()).values()] == ["Test"]
@@ -5,6 +5,7 @@ from virtool.dispatcher.change import Change
 from virtool.dispatcher.fetchers import (
     IndexesFetcher,
     LabelsFetcher,
+    ReferencesFetcher,
     SimpleMongoFetcher,
     TasksFetcher,
     UploadsFetcher,
@@ -134,16 +135,18 @@ class TestIndexesFetcher:
     ):
         await dbi.indexes.insert_many(test_indexes)
 
-        async def m_indexes_processor(db, document):
+        async def m_process_many(db, documents):
             assert db == dbi
 
-            processed = dict(document)
-            processed["id"] = processed.pop("_id")
-            processed["extra_field"] = True
+            processed = [dict(document) for document in documents]
+
+            for document in processed:
+                document["id"] = document.pop("_id")
+                document["extra_field"] = True
 
             return processed
 
-        mocker.patch("virtool.indexes.db.processor", m_indexes_processor)
+        mocker.patch("virtool.indexes.db.process_many", m_process_many)
 
         fetcher = IndexesFetcher(dbi)
 
@@ -215,6 +218,48 @@ class TestLabelsFetcher:
         assert messages == snapshot
 
 
+class TestReferencesFetcher:
+    async def test_eligible(self, mocker, connections, dbi, ws):
+        """
+        Test that only references that can be sent to a connection are processed.
+
+        """
+        ws.groups = []
+
+        await dbi.references.insert_many(
+            [
+                {"_id": "foo", "groups": [], "users": [{"id": "test"}]},
+                {"_id": "bar", "groups": [], "users": [{"id": "bob"}]},
+            ]
+        )
+
+        processed = []
+
+        async def m_process_many(db, documents):
+            processed.extend(document["_id"] for document in documents)
+            return [{"id": document["_id"]} for document in documents]
+
+        mocker.patch("virtool.references.db.process_many", m_process_many)
+
+        fetcher = ReferencesFetcher(dbi)
+
+        pairs = []
+
+        async for pair in fetcher.fetch(
+            Change("references", UPDATE, ["foo", "bar"]), connections
+        ):
+            pairs.append(pair)
+
+        message = {
+            "interface": "references",
+            "operation": UPDATE,
+            "data": {"id": "foo"},
+        }
+
+        assert processed == ["foo"]
+        assert pairs == [(ws, message), (ws, message), (ws, message)]
+
+
 class TestUploadsFetcher:
     async def test_auto_delete(self, connections, dbi, pg, ws):
         fetcher = UploadsFetcher(dbi, pg)
@@ -4,8 +4,59 @@ from aioredis import Redis
 from sqlalchemy.util import asyncio
 
 from virtool.dispatcher.change import Change
-from virtool.dispatcher.listener import RedisDispatcherListener
-from virtool.dispatcher.operations import DELETE, UPDATE
+from virtool.dispatcher.listener import (
+    MergedDispatcherListener,
+    MongoChangeStreamDispatcherListener,
+    RedisDispatcherListener,
+    RedisStreamDispatcherListener,
+    decode_redis_value,
+    group_change_events,
+    parse_stream_entry,
+)
+from virtool.dispatcher.operations import DELETE, INSERT, UPDATE
+
+
+class FakeChangeStream:
+    """
+    Stands in for a MongoDB change stream, which needs a replica set.
+
+    """
+
+    def __init__(self, events):
+        self._events = list(events)
+        self.resume_token = None
+
+    async def next(self):
+        while not self._events:
+            await asyncio.sleep(1)
+
+        return await self.try_next()
+
+    async def try_next(self):
+        if not self._events:
+            return None
+
+        event = self._events.pop(0)
+        self.resume_token = event["_id"]
+
+        return event
+
+    async def close(self):
+        pass
+
+
+def create_change_event(index, collection, operation_type, id_, ref_id=None):
+    event = {
+        "_id": {"_data": str(index)},
+        "documentKey": {"_id": id_},
+        "ns": {"db": "test", "coll": collection},
+        "operationType": operation_type,
+    }
+
+    if ref_id:
+        event["fullDocument"] = {"reference": {"id": ref_id}}
+
+    return event
 
 
 async def test_listener(loop, redis: Redis):
@@ -49,3 +100,216 @@ async def test_listener(loop, redis: Redis):
         Change("samples", UPDATE, [1, 3, 5]),
         Change("analyses", DELETE, [2, 1, 7]),
     ]
+
+
+async def test_stream_listener(loop, redis: Redis):
+    """
+    Test that the stream listener reads changes added after its group was created,
+    skips malformed entries and can read changes after a given entry again.
+
+    """
+    stream_name = "stream:dispatch-test"
+
+    listener = RedisStreamDispatcherListener(redis, stream_name, "test")
+    await listener._create_group()
+
+    stream_ids = [
+        decode_redis_value(await redis.xadd(stream_name, fields))
+        for fields in [
+            {
+                "change": json.dumps(
+                    {"interface": "samples", "operation": UPDATE, "id_list": [1, 3]}
+                )
+            },
+            {"foo": "bar"},
+            {
+                "change": json.dumps(
+                    {"interface": "analyses", "operation": DELETE, "id_list": [2]}
+                )
+            },
+        ]
+    ]
+
+    changes = []
+
+    async for change in listener:
+        changes.append(change)
+
+        if len(changes) == 2:
+            break
+
+    assert changes == [
+        Change("samples", UPDATE, [1, 3]),
+        Change("analyses", DELETE, [2]),
+    ]
+
+    assert [change.stream_id for change in changes] == [stream_ids[0], stream_ids[2]]
+
+    assert await listener.read_since(stream_ids[0]) == [Change("analyses", DELETE, [2])]
+    assert await listener.read_since(stream_ids[2]) == []
+
+    # Entries before the first one in the stream may have been trimmed.
+    assert await listener.read_since("0-1") is None
+    assert await listener.read_since("foo") is None
+
+    await redis.delete(stream_name)
+
+
+def test_parse_stream_entry():
+    assert parse_stream_entry(
+        "1-0",
+        {b"change": b'{"interface": "otus", "operation": "insert", "id_list": ["a"]}'},
+    ) == Change("otus", "insert", ["a"])
+
+    assert parse_stream_entry("1-0", {"change": "not json"}) is None
+    assert parse_stream_entry("1-0", None) is None
+
+
+def test_group_change_events():
+    """
+    Test that consecutive events with the same collection and operation are combined
+    and that the order of changes is kept.
+
+    """
+    events = [
+        create_change_event(i, *args)
+        for i, args in enumerate(
+            [
+                ("samples", "insert", "foo"),
+                ("samples", "update", "foo"),
+                ("samples", "replace", "bar"),
+                ("samples", "update", "foo"),
+                ("otus", "update", "baz"),
+                ("samples", "delete", "foo"),
+            ]
+        )
+    ]
+
+    assert group_change_events(events) == [
+        Change("samples", INSERT, ["foo"]),
+        Change("samples", UPDATE, ["foo", "bar"]),
+        Change("otus", UPDATE, ["baz"]),
+        Change("samples", DELETE, ["foo"]),
+    ]
+
+
+async def test_change_stream_listener(mocker):
+    """
+    Test that the listener watches the passed collections and emits changes for the
+    events, resuming after the last event when the stream is reopened.
+
+    """
+    db = mocker.Mock()
+    db.watch.return_value = FakeChangeStream(
+        [
+            create_change_event(1, "samples", "insert", "foo"),
+            create_change_event(2, "samples", "insert", "bar"),
+            create_change_event(3, "jobs", "update", "baz"),
+        ]
+    )
+
+    listener = MongoChangeStreamDispatcherListener(db, ["jobs", "samples"])
+
+    changes = []
+
+    async for change in listener:
+        changes.append(change)
+
+        if len(changes) == 2:
+            break
+
+    assert changes == [
+        Change("samples", INSERT, ["foo", "bar"]),
+        Change("jobs", UPDATE, ["baz"]),
+    ]
+
+    pipeline = db.watch.call_args[0][0]
+
+    assert pipeline[0]["$match"]["ns.coll"] == {"$in": ["jobs", "samples"]}
+    assert db.watch.call_args[1] == {"resume_after": None}
+
+    await listener._close_stream()
+    db.watch.return_value = FakeChangeStream(
+        [create_change_event(4, "jobs", "delete", "baz")]
+    )
+
+    assert await listener.__anext__() == Change("jobs", DELETE, ["baz"])
+    assert db.watch.call_args[1] == {"resume_after": {"_data": "3"}}
+    assert await listener.read_since("1-0") is None
+
+
+async def test_change_stream_listener_processing(mocker):
+    """
+    Test that events for documents inserted for processing references are dropped and
+    that processing references are only looked up when events have a reference ID.
+
+    """
+    db = mocker.Mock()
+    db.references.distinct = mocker.AsyncMock(return_value=["bar"])
+    db.watch.return_value = FakeChangeStream(
+        [
+            create_change_event(1, "otus", "insert", "a", "bar"),
+            create_change_event(2, "sequences", "insert", "b", "bar"),
+            create_change_event(3, "otus", "insert", "c", "foo"),
+            create_change_event(4, "references", "update", "bar"),
+            create_change_event(5, "history", "insert", "d", "bar"),
+            create_change_event(6, "otus", "update", "a"),
+        ]
+    )
+
+    listener = MongoChangeStreamDispatcherListener(
+        db, ["history", "otus", "references", "sequences"]
+    )
+
+    assert await listener.__anext__() == Change("otus", INSERT, ["c"])
+    assert await listener.__anext__() == Change("references", UPDATE, ["bar"])
+    assert await listener.__anext__() == Change("otus", UPDATE, ["a"])
+
+    db.references.distinct.assert_called_once_with(
+        "_id", {"$or": [{"processing": True}, {"updating": True}]}
+    )
+
+    db.watch.return_value = FakeChangeStream(
+        [create_change_event(7, "samples", "insert", "e")]
+    )
+
+    await listener._close_stream()
+
+    assert await listener.__anext__() == Change("samples", INSERT, ["e"])
+    assert db.references.distinct.call_count == 1
+
+
+async def test_merged_listener():
+    """
+    Test that changes from all listeners are emitted.
+
+    """
+
+    async def create_listener(changes):
+        for change in changes:
+            await asyncio.sleep(0.01)
+            yield change
+
+    listener = MergedDispatcherListener(
+        create_listener([Change("samples", UPDATE, ["foo"])]),
+        create_listener([Change("labels", INSERT, [1]), Change("labels", DELETE, [2])]),
+    )
+
+    changes = []
+
+    async for change in listener:
+        changes.append(change)
+
+        if len(changes) == 3:
+            break
+
+    assert sorted(changes, key=repr) == sorted(
+        [
+            Change("samples", UPDATE, ["foo"]),
+            Change("labels", INSERT, [1]),
+            Change("labels", DELETE, [2]),
+        ],
+        key=repr,
+    )
+
+    assert await listener.read_since("1-0") is None
@@ -41,6 +41,8 @@ async def test_motor(test_db_connection_string, test_db_name, loop, request):
                 "history",
                 "indexes",
                 "jobs",
+                "keyframes",
+                "otu_hashes",
                 "otus",
                 "references",
                 "samples",
@@ -57,8 +59,13 @@ async def test_motor(test_db_connection_string, test_db_name, loop, request):
 
 
 @pytest.fixture
-def dbi(test_motor, mocker):
-    return virtool.mongo.core.DB(test_motor, mocker.stub(), FakeIdProvider())
+def dbi(test_motor, mocker, tmp_path):
+    return virtool.mongo.core.DB(
+        test_motor,
+        mocker.stub(),
+        FakeIdProvider(),
+        snapshot_path=tmp_path / "snapshots",
+    )
 
 
 @pytest.fixture(params=[True, False])
@@ -12,6 +12,7 @@ def ws(mocker):
     ws = mocker.Mock(spec=WebSocketResponse)
 
     ws.send_json = make_mocked_coro()
+    ws.send_str = make_mocked_coro()
     ws.close = make_mocked_coro()
 
     client = mocker.Mock(spec=UserClient)
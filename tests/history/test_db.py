@@ -66,6 +66,78 @@ class TestAdd:
         assert await dbi.history.find_one() == snapshot
 
 
+async def test_add_many(dbi, static_time, test_otu_edit, config):
+    """
+    Test that changes added in bulk match those added one at a time.
+
+    """
+    app = {"db": dbi, "config": config}
+
+    old, new = test_otu_edit
+
+    changes = await virtool.history.db.add_many(
+        app,
+        HistoryMethod.edit,
+        [(old, new, f"Edited {new['name']}")],
+        "test",
+    )
+
+    assert await dbi.history.find_one() == changes[0]
+
+    await dbi.history.delete_many({})
+
+    assert changes[0] == await virtool.history.db.add(
+        app, HistoryMethod.edit, old, new, f"Edited {new['name']}", "test"
+    )
+
+
+async def test_find_after(dbi, fake2, test_change):
+    """
+    Test that paging with a cursor reaches every change when OTU versions mix numbers
+    and ``"removed"``.
+
+    """
+    user = await fake2.users.create()
+
+    await dbi.history.insert_many(
+        [
+            {
+                **test_change,
+                "_id": f"{otu_id}.{version}",
+                "otu": {"id": otu_id, "name": otu_id, "version": version},
+                "user": {"id": user.id},
+            }
+            for otu_id, version in [
+                ("foo", 0),
+                ("foo", 1),
+                ("foo", "removed"),
+                ("bar", 0),
+                ("bar", "removed"),
+                ("baz", 2),
+            ]
+        ],
+        silent=True,
+    )
+
+    change_ids = []
+    after = ""
+
+    while after is not None:
+        data = await virtool.history.db.find(dbi, {"after": after, "per_page": 2})
+
+        change_ids += [document["id"] for document in data["documents"]]
+        after = data["next"]
+
+    assert change_ids == [
+        "foo.removed",
+        "bar.removed",
+        "baz.2",
+        "foo.1",
+        "foo.0",
+        "bar.0",
+    ]
+
+
 @pytest.mark.parametrize("file", [True, False])
 async def test_get(file, mocker, snapshot, dbi, fake2, tmp_path, config):
     user = await fake2.users.create()
@@ -137,3 +209,51 @@ async def test_patch_to_version(remove, snapshot, config, dbi, create_mock_histo
     assert current == snapshot
     assert patched == snapshot
     assert reverted_change_ids == snapshot
+
+
+@pytest.mark.parametrize("remove", [True, False])
+async def test_patch_to_version_from_keyframe(remove, config, dbi, create_mock_history):
+    """
+    Test that patching from a keyframe gives the same result as patching from the
+    current OTU.
+
+    """
+    await create_mock_history(remove=remove)
+
+    expected = await virtool.history.db.patch_to_version(
+        config.data_path, dbi, "6116cba1", 1
+    )
+
+    _, keyframe, _ = await virtool.history.db.patch_to_version(
+        config.data_path, dbi, "6116cba1", 2
+    )
+
+    await virtool.history.db.add_keyframe(dbi, keyframe)
+
+    # Changes after the keyframe should not need to be read.
+    await dbi.history.update_one(
+        {"_id": "6116cba1.3"}, {"$set": {"diff": [["change", "foo", [1, 2]]]}}
+    )
+
+    assert (
+        await virtool.history.db.patch_to_version(config.data_path, dbi, "6116cba1", 1)
+        == expected
+    )
+
+
+async def test_get_patched_otu(config, dbi, create_mock_history):
+    await create_mock_history(remove=False)
+
+    patched = await virtool.history.db.get_patched_otu(
+        config.data_path, dbi, "6116cba1", 1
+    )
+
+    assert patched["version"] == 1
+
+    # The second request should be served from the snapshot cache without history.
+    await dbi.history.delete_many({})
+
+    assert (
+        await virtool.history.db.get_patched_otu(config.data_path, dbi, "6116cba1", 1)
+        == patched
+    )
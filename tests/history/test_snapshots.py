@@ -0,0 +1,131 @@
+import os
+
+import pytest
+
+from virtool.history.snapshots import OTUSnapshotCache
+
+
+@pytest.fixture
+def snapshots(tmp_path):
+    return OTUSnapshotCache(tmp_path / "snapshots", max_size=2)
+
+
+async def test_get_and_set(snapshots, test_otu):
+    assert await snapshots.get("6116cba1", 1) is None
+
+    await snapshots.set("6116cba1", 1, test_otu)
+
+    snapshot = await snapshots.get("6116cba1", 1)
+
+    assert snapshot == test_otu
+
+    # Retrieved snapshots must be copies so callers can safely mutate them.
+    snapshot["isolates"].clear()
+
+    assert await snapshots.get("6116cba1", 1) == test_otu
+
+
+async def test_evict(snapshots, test_otu):
+    """
+    Test that the least recently used snapshot is evicted from memory when the cache is
+    full, but can still be loaded from disk.
+
+    """
+    await snapshots.set("foo", 1, test_otu)
+    await snapshots.set("foo", 2, test_otu)
+
+    await snapshots.get("foo", 1)
+
+    await snapshots.set("foo", 3, test_otu)
+
+    assert len(snapshots) == 2
+    assert ("foo", 1) in snapshots
+    assert ("foo", 2) not in snapshots
+
+    assert await snapshots.get("foo", 2) == test_otu
+    assert ("foo", 2) in snapshots
+
+
+async def test_invalidate(snapshots, test_otu):
+    await snapshots.set("foo", 1, test_otu)
+    await snapshots.set("bar", 1, test_otu)
+    await snapshots.set("foo_bar", 1, test_otu)
+
+    await snapshots.invalidate("foo")
+
+    assert await snapshots.get("foo", 1) is None
+    assert await snapshots.get("bar", 1) == test_otu
+
+    assert not snapshots.join_path("foo", 1).exists()
+
+    # An OTU ID that starts with the invalidated ID is not matched.
+    assert snapshots.join_path("foo_bar", 1).exists()
+
+
+async def test_invalidate_many(snapshots, test_otu):
+    await snapshots.set("foo", 1, test_otu)
+    await snapshots.set("foo_bar", 1, test_otu)
+    await snapshots.set("baz", 1, test_otu)
+
+    await snapshots.invalidate_many(["foo", "foo_bar"])
+
+    assert await snapshots.get("foo", 1) is None
+    assert await snapshots.get("foo_bar", 1) is None
+    assert await snapshots.get("baz", 1) == test_otu
+
+
+async def test_limit_files(tmp_path, test_otu):
+    """
+    Test that the oldest snapshot files are removed when there are too many.
+
+    """
+    snapshots = OTUSnapshotCache(tmp_path / "snapshots", max_files=10)
+
+    for version in range(11):
+        await snapshots.set("foo", version, test_otu)
+
+        # Make the modification times distinct.
+        os.utime(snapshots.join_path("foo", version), (version, version))
+
+    assert sorted(
+        int(path.stem.split("_")[1]) for path in (tmp_path / "snapshots").iterdir()
+    ) == [2, 3, 4, 5, 6, 7, 8, 9, 10]
+
+    assert await snapshots.get("foo", 0) is None
+    assert await snapshots.get("foo", 10) == test_otu
+
+
+async def test_shared_files(tmp_path, test_otu):
+    """
+    Test that snapshots held in memory are not used once another process has
+    invalidated or replaced them.
+
+    """
+    snapshots = OTUSnapshotCache(tmp_path / "snapshots")
+    other = OTUSnapshotCache(tmp_path / "snapshots")
+
+    await snapshots.set("foo", 1, test_otu)
+    await snapshots.set("foo", 2, test_otu)
+
+    await other.invalidate("foo")
+
+    assert await snapshots.get("foo", 1) is None
+
+    await other.set("foo", 2, {**test_otu, "name": "Reverted"})
+
+    assert (await snapshots.get("foo", 2))["name"] == "Reverted"
+
+
+async def test_no_path(test_otu):
+    """
+    Test that nothing is stored when the cache has no path.
+
+    """
+    snapshots = OTUSnapshotCache(None)
+
+    await snapshots.set("foo", 1, test_otu)
+
+    assert await snapshots.get("foo", 1) is None
+    assert len(snapshots) == 0
+
+    await snapshots.invalidate("foo")
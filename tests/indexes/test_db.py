@@ -92,6 +92,40 @@ async def test_processor(snapshot, fake2, dbi):
     )
 
 
+async def test_process_many(fake2, dbi):
+    """
+    Test that counts computed for many indexes at once match the counts computed for
+    each index alone.
+
+    """
+    user = await fake2.users.create()
+
+    await dbi.history.insert_many(
+        [
+            {"_id": "foo.0", "index": {"id": "baz"}, "otu": {"id": "foo"}},
+            {"_id": "foo.1", "index": {"id": "baz"}, "otu": {"id": "foo"}},
+            {"_id": "bar.0", "index": {"id": "baz"}, "otu": {"id": "bar"}},
+            {"_id": "far.0", "index": {"id": "boo"}, "otu": {"id": "foo"}},
+        ]
+    )
+
+    documents = [
+        {"_id": index_id, "user": {"id": user.id}} for index_id in ("baz", "boo", "moo")
+    ]
+
+    processed = await virtool.indexes.db.process_many(dbi, documents)
+
+    assert [
+        (index["id"], index["change_count"], index["modified_otu_count"])
+        for index in processed
+    ] == [("baz", 3, 2), ("boo", 1, 1), ("moo", 0, 0)]
+
+    assert processed == [
+        await virtool.indexes.db.processor(dbi, dict(document))
+        for document in documents
+    ]
+
+
 async def test_get_patched_otus(mocker, dbi, config):
     m = mocker.patch(
         "virtool.history.db.patch_to_version",
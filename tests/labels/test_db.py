@@ -2,7 +2,12 @@ import pytest
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
 from virtool.mongo.transforms import apply_transforms
-from virtool.labels.db import AttachLabelsTransform, SampleCountTransform
+from virtool.labels.db import (
+    AttachLabelsTransform,
+    SampleCountTransform,
+    clear_label_caches,
+    get_label_cache,
+)
 from virtool.labels.models import Label
 
 
@@ -35,6 +40,66 @@ async def test_label_attacher(documents, snapshot, pg: AsyncEngine):
     assert await apply_transforms(documents, [AttachLabelsTransform(pg)]) == snapshot
 
 
+async def test_label_cache(pg: AsyncEngine):
+    """
+    Test that labels are cached until the cache is cleared.
+
+    """
+    cache = get_label_cache(pg)
+
+    assert get_label_cache(pg) is cache
+
+    async with AsyncSession(pg) as session:
+        session.add(Label(id=1, name="Bug", color="#a83432", description="A bug"))
+        await session.commit()
+
+    labels = await cache.get_all()
+
+    assert [label["name"] for label in labels.values()] == ["Bug"]
+    assert await cache.get_all() is labels
+
+    async with AsyncSession(pg) as session:
+        session.add(Label(id=2, name="Question", color="#03fc20", description=""))
+        await session.commit()
+
+    clear_label_caches()
+
+    assert [label["name"] for label in (await cache.get_all()).values()] == [
+        "Bug",
+        "Question",
+    ]
+
+
+@pytest.mark.parametrize("many", [True, False])
+async def test_label_attacher_uncached(many, pg: AsyncEngine):
+    """
+    Test that labels created after the cache was filled are attached without clearing
+    the cache, and that IDs that don't belong to any label are ignored.
+
+    """
+    async with AsyncSession(pg) as session:
+        session.add(Label(id=1, name="Bug", color="#a83432", description="A bug"))
+        await session.commit()
+
+    await get_label_cache(pg).get_all()
+
+    # Created by another process, so the cache isn't cleared.
+    async with AsyncSession(pg) as session:
+        session.add(Label(id=2, name="Question", color="#03fc20", description=""))
+        await session.commit()
+
+    document = {"id": "foo", "name": "Foo", "labels": [2, 1, 5]}
+
+    result = await apply_transforms(
+        [document] if many else document, [AttachLabelsTransform(pg)]
+    )
+
+    if many:
+        (result,) = result
+
+    assert [label["name"] for label in result["labels"]] == ["Question", "Bug"]
+
+
 @pytest.mark.parametrize(
     "labels",
     [
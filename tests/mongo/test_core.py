@@ -96,3 +96,172 @@ class TestCollection:
             {"_id": "bar", "tag": 2},
             {"_id": "baz", "tag": 1},
         ]
+
+    @pytest.mark.parametrize("silent", [True, False])
+    async def test_insert_many(self, silent, test_motor, create_test_collection):
+        """
+        Test that all documents are inserted, missing IDs are assigned, and a single
+        change is dispatched for the whole batch.
+
+        """
+        collection = create_test_collection()
+
+        documents = [{"_id": "foo", "tag": 1}, {"tag": 2}]
+
+        insert_result = await collection.insert_many(documents, silent=silent)
+
+        assert isinstance(insert_result, pymongo.results.InsertManyResult)
+        assert insert_result.inserted_ids == ["foo", documents[1]["_id"]]
+        assert isinstance(documents[1]["_id"], str)
+
+        if silent:
+            assert collection._enqueue_change.called is False
+        else:
+            collection._enqueue_change.assert_called_once_with(
+                "samples", "insert", ("foo", documents[1]["_id"])
+            )
+
+        assert await test_motor.samples.count_documents({}) == 2
+
+    @pytest.mark.parametrize(
+        "query,dispatched",
+        [
+            ({"tag": 1}, ("baz", "foo")),
+            ({"_id": {"$in": ["foo", "baz"]}}, ("foo", "baz")),
+            ({"_id": "foo"}, ("foo",)),
+            ({"_id": "qux"}, None),
+        ],
+    )
+    @pytest.mark.parametrize("silent", [True, False])
+    async def test_update_many(
+        self, query, dispatched, silent, mocker, test_motor, create_test_collection
+    ):
+        """
+        Test that matching documents are updated and dispatched, that IDs are taken
+        from queries that only match on `_id` and that silent updates skip finding the
+        IDs altogether.
+
+        """
+        collection = create_test_collection()
+
+        await test_motor.samples.insert_many(
+            [
+                {"_id": "foo", "tag": 1},
+                {"_id": "bar", "tag": 2},
+                {"_id": "baz", "tag": 1},
+            ]
+        )
+
+        distinct = mocker.spy(collection._collection, "distinct")
+
+        await collection.update_many(query, {"$set": {"tag": 3}}, silent=silent)
+
+        if silent or "_id" in query:
+            assert distinct.called is False
+
+        if silent or dispatched is None:
+            assert collection._enqueue_change.called is False
+        else:
+            collection._enqueue_change.assert_called_once_with(
+                "samples", "update", dispatched
+            )
+
+        assert await test_motor.samples.count_documents({"tag": 3}) == (
+            len(dispatched) if dispatched else 0
+        )
+
+    @pytest.mark.parametrize(
+        "query,dispatched",
+        [
+            ({"_id": "foo"}, "foo"),
+            ({"tag": 2}, "bar"),
+            ({"_id": "qux"}, None),
+            ({"tag": 4}, None),
+        ],
+    )
+    @pytest.mark.parametrize("silent", [True, False])
+    async def test_update_one(
+        self, query, dispatched, silent, mocker, test_motor, create_test_collection
+    ):
+        """
+        Test that the matching document is updated and dispatched without a separate
+        query for its ID.
+
+        """
+        collection = create_test_collection()
+
+        await test_motor.samples.insert_many(
+            [{"_id": "foo", "tag": 1}, {"_id": "bar", "tag": 2}]
+        )
+
+        find_one = mocker.spy(collection._collection, "find_one")
+
+        update_result = await collection.update_one(
+            query, {"$set": {"tag": 3}}, silent=silent
+        )
+
+        assert isinstance(update_result, pymongo.results.UpdateResult)
+        assert update_result.matched_count == (1 if dispatched else 0)
+        assert update_result.modified_count == (
+            update_result.matched_count if silent or "_id" in query else 0
+        )
+        assert find_one.called is False
+
+        if silent or dispatched is None:
+            assert collection._enqueue_change.called is False
+        else:
+            collection._enqueue_change.assert_called_once_with(
+                "samples", "update", (dispatched,)
+            )
+
+        if dispatched:
+            assert (await test_motor.samples.find_one(dispatched))["tag"] == 3
+
+    @pytest.mark.parametrize(
+        "query,dispatched", [({"tag": 1}, "foo"), ({"tag": 4}, None)]
+    )
+    async def test_update_one_upsert(
+        self, query, dispatched, test_motor, create_test_collection
+    ):
+        """
+        Test that the result of an upsert with a query that doesn't match on `_id` is
+        returned unchanged and that only existing documents are dispatched.
+
+        """
+        collection = create_test_collection()
+
+        await test_motor.samples.insert_one({"_id": "foo", "tag": 1})
+
+        update_result = await collection.update_one(
+            query, {"$set": {"name": "Bar"}}, upsert=True
+        )
+
+        if dispatched:
+            assert update_result.matched_count == update_result.modified_count == 1
+            assert update_result.upserted_id is None
+
+            collection._enqueue_change.assert_called_once_with(
+                "samples", "update", (dispatched,)
+            )
+        else:
+            assert update_result.matched_count == 0
+            assert update_result.upserted_id is not None
+            assert collection._enqueue_change.called is False
+
+            assert await test_motor.samples.find_one(update_result.upserted_id) == {
+                "_id": update_result.upserted_id,
+                "tag": 4,
+                "name": "Bar",
+            }
+
+
+@pytest.mark.parametrize("silent", [True, False])
+async def test_silent_db(silent, mocker, test_motor):
+    """
+    Test that no collection dispatches changes when the database is silent.
+
+    """
+    db = virtool.mongo.core.DB(test_motor, mocker.stub(), mocker.Mock(), silent=silent)
+
+    assert db.samples.silent is silent
+    assert db.sessions.silent is True
@@ -1,3 +1,5 @@
+import time
+
 import pytest
 import virtool.mongo.utils
 
@@ -63,3 +65,44 @@ async def test_check_missing_ids(dbi):
     )
 
     assert non_existent_subtractions == {"baz"}
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ({"_id": "foo"}, ["foo"]),
+        ({"_id": {"$in": ["foo", "bar"]}}, ["foo", "bar"]),
+        ({"_id": {"$in": ["foo"]}, "tag": 1}, None),
+        ({"_id": {"$nin": ["foo"]}}, None),
+        ({"tag": 1}, None),
+        ({}, None),
+    ],
+)
+def test_get_query_ids(query, expected):
+    assert virtool.mongo.utils.get_query_ids(query) == expected
+
+
+async def test_count_cache(mocker, dbi):
+    """
+    Test that counts are cached per collection and query until they expire.
+
+    """
+    await dbi.samples.insert_many([{"_id": "foo", "tag": 1}, {"_id": "bar", "tag": 2}])
+    await dbi.otus.insert_one({"_id": "baz", "tag": 1})
+
+    cache = virtool.mongo.utils.CountCache(ttl=30)
+
+    count_documents = mocker.spy(dbi.samples, "count_documents")
+
+    assert await cache.count(dbi.samples, {"tag": 1}) == 1
+    assert await cache.count(dbi.otus, {"tag": 1}) == 1
+
+    await dbi.samples.insert_one({"_id": "qux", "tag": 1})
+
+    assert await cache.count(dbi.samples, {"tag": 1}) == 1
+    assert await cache.count(dbi.samples, {}) == 3
+    assert count_documents.call_count == 2
+
+    mocker.patch("time.monotonic", return_value=time.monotonic() + 31)
+
+    assert await cache.count(dbi.samples, {"tag": 1}) == 2
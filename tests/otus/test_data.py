@@ -196,6 +196,46 @@ async def test_set_default(dbi, snapshot, test_otu, static_time, tmp_path):
     assert await dbi.history.find_one() == snapshot
 
 
+async def test_remove_many(dbi, test_otu, test_sequence, static_time):
+    other_otu = {**test_otu, "_id": "foo", "name": "Foo virus", "abbreviation": "FV"}
+
+    await gather(
+        dbi.otus.insert_many([test_otu, other_otu]),
+        dbi.sequences.insert_many(
+            [
+                test_sequence,
+                {**test_sequence, "_id": "bar", "otu_id": "foo"},
+            ]
+        ),
+        dbi.references.insert_one({"_id": "hxn167", "internal_control": {"id": "foo"}}),
+    )
+
+    await dbi.snapshots.set("foo", 0, other_otu)
+
+    otu_data = OTUData({"db": dbi})
+
+    assert await otu_data.remove_many(["6116cba1", "foo", "missing"], "bob") == 2
+
+    assert await dbi.snapshots.get("foo", 0) is None
+
+    assert await dbi.otus.count_documents({}) == 0
+    assert await dbi.sequences.count_documents({}) == 0
+    assert await dbi.references.find_one("hxn167") == {
+        "_id": "hxn167",
+        "internal_control": None,
+    }
+
+    assert sorted(
+        [
+            (change["otu"]["id"], change["method_name"], change["description"])
+            async for change in dbi.history.find()
+        ]
+    ) == [
+        ("6116cba1", "remove", "Removed Prunus virus F (PVF)"),
+        ("foo", "remove", "Removed Foo virus (FV)"),
+    ]
+
+
 async def test_remove_sequence(snapshot, dbi, test_otu, static_time, tmp_path):
     await gather(
         dbi.otus.insert_one(test_otu),
@@ -1,7 +1,12 @@
+import gzip
+import json
+from pathlib import Path
+
 import pytest
 import virtool.errors
 import virtool.references.db
 from aiohttp.test_utils import make_mocked_coro
+from virtool.references.utils import check_reference_file, load_reference_file
 
 RIGHTS = {"build": False, "modify": False, "modify_otu": False, "remove": False}
 
@@ -123,6 +128,258 @@ async def test_check_right(admin, expect, member, ref, right, mocker, mock_req,
     assert result == expect
 
 
+@pytest.mark.parametrize("strict", [True, False])
+async def test_check_reference_file_in_processes(strict, mocker, tmp_path):
+    """
+    Test that checking a reference file in batches in the process pool gives the same
+    result as checking it serially, including the issues found in each OTU.
+
+    """
+    reference = load_reference_file(
+        Path(__file__).parent.parent / "test_files" / "reference.json.gz"
+    )
+
+    for otu in reference["otus"][4:6]:
+        del otu["isolates"][0]["sequences"][0]["definition"]
+
+    path = tmp_path / "reference.json.gz"
+
+    with gzip.open(path, "wt") as f:
+        json.dump(reference, f)
+
+    async def run_in_process(func, *args):
+        return func(*args)
+
+    mocker.patch("virtool.references.db.VALIDATION_BATCH_SIZE", 3)
+
+    errors, issues = await virtool.references.db.check_reference_file_in_processes(
+        {"run_in_process": run_in_process}, path, strict=strict
+    )
+
+    assert (errors, issues) == check_reference_file(path, strict=strict)
+    assert list(issues) == [otu["_id"] for otu in reference["otus"][4:6]]
+
+
+async def test_process_many(fake2, dbi, static_time):
+    """
+    Test that computed fields are attached to many references at once.
+
+    """
+    user = await fake2.users.create()
+
+    await dbi.otus.insert_many(
+        [
+            {"_id": "a", "reference": {"id": "foo"}},
+            {"_id": "b", "reference": {"id": "foo"}},
+            {"_id": "c", "reference": {"id": "bar"}},
+        ]
+    )
+
+    await dbi.history.insert_many(
+        [
+            {"_id": "a.0", "reference": {"id": "foo"}, "index": {"id": "unbuilt"}},
+            {"_id": "c.0", "reference": {"id": "bar"}, "index": {"id": "idx_1"}},
+        ]
+    )
+
+    await dbi.indexes.insert_many(
+        [
+            {
+                "_id": f"idx_{version}",
+                "created_at": static_time.datetime,
+                "has_json": True,
+                "ready": ready,
+                "reference": {"id": "bar"},
+                "user": {"id": user.id},
+                "version": version,
+            }
+            for version, ready in ((0, True), (1, True), (2, False))
+        ]
+    )
+
+    documents = [
+        {"_id": "foo", "updates": [{"id": "1"}, {"id": "2"}]},
+        {"_id": "bar"},
+        {"_id": "baz", "updates": []},
+    ]
+
+    processed = await virtool.references.db.process_many(dbi, documents)
+
+    for reference in processed:
+        assert reference[
+            "latest_build"
+        ] == await virtool.references.db.get_latest_build(dbi, reference["id"])
+
+    assert [
+        (
+            reference["id"],
+            reference["otu_count"],
+            reference["unbuilt_change_count"],
+            reference["latest_build"] and reference["latest_build"]["id"],
+            reference.get("installed"),
+        )
+        for reference in processed
+    ] == [
+        ("foo", 2, 1, None, {"id": "2"}),
+        ("bar", 1, 0, "idx_1", None),
+        ("baz", 0, 0, None, None),
+    ]
+
+
+async def test_get_remote_otu_hashes(dbi):
+    await dbi.otus.insert_many(
+        [
+            {
+                "_id": "a",
+                "reference": {"id": "foo"},
+                "remote": {"id": "1"},
+                "version": 2,
+            },
+            {
+                "_id": "b",
+                "reference": {"id": "foo"},
+                "remote": {"id": "2"},
+                "version": 3,
+            },
+            {
+                "_id": "c",
+                "reference": {"id": "foo"},
+                "remote": {"id": "3"},
+                "version": 0,
+            },
+            {
+                "_id": "d",
+                "reference": {"id": "bar"},
+                "remote": {"id": "1"},
+                "version": 0,
+            },
+        ]
+    )
+
+    await virtool.references.db.store_otu_hashes(
+        dbi, [("a", "hash_a", 2), ("b", "hash_b", 2)], "foo"
+    )
+
+    assert await virtool.references.db.get_remote_otu_hashes(
+        dbi, "foo", ["1", "2", "3", "4"]
+    ) == {
+        "1": {"_id": "a", "version": 2, "hash": "hash_a"},
+        # The OTU was modified after its hash was stored.
+        "2": {"_id": "b", "version": 3, "hash": None},
+        # No hash was stored.
+        "3": {"_id": "c", "version": 0, "hash": None},
+    }
+
+
+async def test_insert_joined_otus(dbi, mocker, static_time):
+    """
+    Test that OTUs and their sequences are inserted in bulk in batches of
+    ``batch_size`` and that the inserted OTUs are returned in order.
+
+    """
+    otus = load_reference_file(
+        Path(__file__).parent.parent / "test_files" / "reference.json.gz"
+    )["otus"][:5]
+
+    insert_many = mocker.spy(dbi.otus, "insert_many")
+
+    inserted = await virtool.references.db.insert_joined_otus(
+        dbi, otus, static_time.datetime, "foo", "bob", batch_size=2
+    )
+
+    assert insert_many.call_count == 3
+    assert [otu["name"] for otu in inserted] == [otu["name"] for otu in otus]
+    assert await dbi.otus.count_documents({"reference.id": "foo"}) == 5
+    assert await dbi.sequences.count_documents({"reference.id": "foo"}) == sum(
+        len(isolate["sequences"]) for otu in otus for isolate in otu["isolates"]
+    )
+
+
+async def test_upsert_remote_sequences(dbi):
+    """
+    Test that remote sequences are updated and inserted in bulk, and that sequences
+    that vanished from the remote reference are removed. Sequences added locally are
+    kept.
+
+    """
+    await dbi.sequences.insert_many(
+        [
+            {
+                "_id": "s1",
+                "otu_id": "foo",
+                "isolate_id": "a",
+                "reference": {"id": "ref"},
+                "remote": {"id": "r1"},
+                "sequence": "ATGC",
+            },
+            {
+                "_id": "s2",
+                "otu_id": "foo",
+                "isolate_id": "a",
+                "reference": {"id": "ref"},
+                "remote": {"id": "r2"},
+                "sequence": "ATGC",
+            },
+            {
+                "_id": "s3",
+                "otu_id": "foo",
+                "isolate_id": "a",
+                "reference": {"id": "ref"},
+                "sequence": "ATTA",
+            },
+        ],
+        silent=True,
+    )
+
+    old = {
+        "_id": "foo",
+        "isolates": [
+            {"id": "a", "sequences": await dbi.sequences.find().to_list(None)}
+        ],
+    }
+
+    await virtool.references.db.upsert_remote_sequences(
+        dbi,
+        old,
+        [
+            {
+                "otu_id": "foo",
+                "isolate_id": "a",
+                "reference": {"id": "ref"},
+                "remote": {"id": remote_id},
+                "sequence": "ATGG",
+            }
+            for remote_id in ("r1", "r3")
+        ],
+        "ref",
+    )
+
+    assert await dbi.sequences.find_one("s3") == {
+        "_id": "s3",
+        "otu_id": "foo",
+        "isolate_id": "a",
+        "reference": {"id": "ref"},
+        "sequence": "ATTA",
+    }
+
+    sequences = await dbi.sequences.find(
+        {"remote.id": {"$exists": True}}, sort=[("remote.id", 1)]
+    ).to_list(None)
+
+    assert [(s["remote"]["id"], s["sequence"]) for s in sequences] == [
+        ("r1", "ATGG"),
+        ("r3", "ATGG"),
+    ]
+
+    inserted_id = sequences[1]["_id"]
+
+    assert sequences[0]["_id"] == "s1"
+    assert isinstance(inserted_id, str)
+
+    dbi.enqueue_change.assert_any_call("sequences", "update", ("s1",))
+    dbi.enqueue_change.assert_any_call("sequences", "insert", (inserted_id,))
+
+
 async def test_create_manifest(dbi, test_otu):
     await dbi.otus.insert_many(
         [
@@ -255,3 +512,19 @@ async def test_delete_member(field, snapshot, dbi):
 
     assert subdocument_id == snapshot
     assert await dbi.references.find_one() == snapshot
+
+
+async def test_set_processing(dbi):
+    await dbi.references.insert_one({"_id": "foo", "name": "Foo"})
+
+    await virtool.references.db.set_processing(dbi, "foo", True)
+
+    assert await dbi.references.find_one() == {
+        "_id": "foo",
+        "name": "Foo",
+        "processing": True,
+    }
+
+    await virtool.references.db.set_processing(dbi, "foo", False)
+
+    assert await dbi.references.find_one() == {"_id": "foo", "name": "Foo"}
@@ -1,4 +1,6 @@
 import datetime
+import gzip
+import json
 import shutil
 from pathlib import Path
 
@@ -9,6 +11,7 @@ from syrupy.matchers import path_type
 
 from virtool.data.utils import get_data_from_app
 from virtool.references.tasks import CleanReferencesTask, ImportReferenceTask
+from virtool.references.utils import load_reference_file
 from virtool.tasks.models import Task
 from virtool.uploads.models import UploadType
 
@@ -153,3 +156,54 @@ async def test_import_reference_task(snapshot, spawn_client, pg, static_time, tm
         name="history",
         matcher=path_type({".*_id": (str,), ".*otu.id": (str,)}, regex=True),
     )
+
+
+async def test_import_reference_task_otu_issues(spawn_client, pg, static_time, tmpdir):
+    """
+    Test that OTUs with validation or verification issues are imported and don't cause
+    the task to fail.
+
+    """
+    client = await spawn_client(authorize=True)
+
+    reference = load_reference_file(TEST_FILES_PATH / "reference.json.gz")
+
+    del reference["otus"][0]["isolates"][0]["sequences"][0]["definition"]
+
+    path = Path(tmpdir.mkdir("files")) / "reference.json.gz"
+
+    with gzip.open(path, "wt") as f:
+        json.dump(reference, f)
+
+    async with AsyncSession(pg) as session:
+        session.add(
+            Task(
+                id=1,
+                complete=False,
+                context={
+                    "path": str(path),
+                    "ref_id": "foo",
+                    "user_id": "test",
+                },
+                count=0,
+                progress=0,
+                step="load_file",
+                type="import_reference",
+                created_at=static_time.datetime,
+            )
+        )
+        await session.commit()
+
+    await client.db.references.insert_one(
+        {
+            "_id": "foo",
+            "created_at": static_time.datetime,
+        }
+    )
+
+    await ImportReferenceTask(client.app, 1).run()
+
+    task = await get_data_from_app(client.app).tasks.get(1)
+
+    assert task.error is None
+    assert await client.db.otus.count_documents({}) == len(reference["otus"])
@@ -1,6 +1,17 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from pathlib import Path
+
 import pytest
 
 from virtool.references.utils import (
+    JSONStreamReader,
+    check_import_data,
+    check_otus,
+    check_reference_file,
+    compute_otu_hash,
     detect_duplicate_abbreviation,
     detect_duplicate_ids,
     detect_duplicate_isolate_ids,
@@ -12,8 +23,69 @@ from virtool.references.utils import (
     get_otu_schema,
     get_owner_user,
     get_sequence_schema,
+    get_validator,
+    iter_reference_otus,
+    load_reference_file,
+    load_reference_metadata,
 )
 
+TEST_FILES_PATH = Path(__file__).parent.parent / "test_files"
+
+
+def test_compute_otu_hash():
+    otu = {
+        "_id": "foo",
+        "abbreviation": "FV",
+        "name": "Foo virus",
+        "isolates": [
+            {
+                "id": isolate_id,
+                "default": isolate_id == "a",
+                "source_name": isolate_id,
+                "source_type": "isolate",
+                "sequences": [
+                    {
+                        "_id": f"{isolate_id}{i}",
+                        "accession": f"AB{i}",
+                        "definition": "Foo",
+                        "host": "Bar",
+                        "sequence": "ATGC",
+                    }
+                    for i in range(2)
+                ],
+            }
+            for isolate_id in ["a", "b"]
+        ],
+    }
+
+    otu_hash = compute_otu_hash(otu)
+
+    # The order of isolates and sequences doesn't matter.
+    reordered = {
+        **otu,
+        "isolates": [
+            {**isolate, "sequences": isolate["sequences"][::-1]}
+            for isolate in otu["isolates"][::-1]
+        ],
+    }
+
+    assert compute_otu_hash(reordered) == otu_hash
+
+    # Sequences that have been stored in a reference are identified by remote ID.
+    stored = deepcopy(otu)
+
+    for isolate in stored["isolates"]:
+        for sequence in isolate["sequences"]:
+            sequence["remote"] = {"id": sequence["_id"]}
+            sequence["_id"] = "local"
+
+    assert compute_otu_hash(stored) == otu_hash
+
+    changed = deepcopy(otu)
+    changed["isolates"][1]["sequences"][0]["sequence"] = "ATGG"
+
+    assert compute_otu_hash(changed) != otu_hash
+
 
 @pytest.mark.parametrize("empty", [True, False])
 @pytest.mark.parametrize("in_seen", [True, False])
@@ -188,6 +260,42 @@ def test_get_import_schema(require_meta):
     }
 
 
+def test_check_otus(test_merged_otu):
+    """
+    Test that duplicates are returned as errors and that the issues found in each OTU
+    are returned separately.
+
+    """
+    invalid = deepcopy(test_merged_otu)
+    invalid["_id"] = "foo"
+    invalid["isolates"][0]["sequences"][0]["_id"] = "efgh5678"
+    del invalid["isolates"][0]["sequences"][0]["definition"]
+
+    errors, issues = check_otus([test_merged_otu, invalid], True, False)
+
+    assert errors == [
+        {
+            "duplicates": ["PVF"],
+            "id": "duplicate_abbreviations",
+            "message": "Duplicate OTU abbreviations found",
+        },
+        {
+            "duplicates": ["Prunus virus F"],
+            "id": "duplicate_names",
+            "message": "Duplicate OTU names found",
+        },
+    ]
+    assert issues == {
+        "foo": {
+            "validation": {
+                "otu": None,
+                "isolates": {},
+                "sequences": {"efgh5678": {"definition": ["required field"]}},
+            }
+        }
+    }
+
+
 @pytest.mark.parametrize("require_id", [True, False])
 def test_get_isolate_schema(require_id):
     assert get_isolate_schema(require_id) == {
@@ -219,6 +327,22 @@ def test_get_owner_user():
     }
 
 
+@pytest.mark.parametrize("strict", [True, False])
+def test_get_validator(strict):
+    validator = get_validator(get_otu_schema, strict)
+
+    assert validator.schema == get_otu_schema(strict)
+    assert validator.allow_unknown is True
+
+    assert get_validator(get_otu_schema, strict) is validator
+    assert get_validator(get_otu_schema, not strict) is not validator
+    assert get_validator(get_isolate_schema, strict) is not validator
+
+    other_thread = ThreadPoolExecutor(1).submit(get_validator, get_otu_schema, strict)
+
+    assert other_thread.result() is not validator
+
+
 @pytest.mark.parametrize("require_id", [True, False])
 def test_get_sequence_schema(require_id):
     assert get_sequence_schema(require_id) == {
@@ -227,3 +351,71 @@ def test_get_sequence_schema(require_id):
         "definition": {"type": "string", "required": True},
         "sequence": {"type": "string", "required": True},
     }
+
+
+def test_stream_reference_file():
+    """
+    Test that streaming a reference file produces the same data as loading it whole.
+
+    """
+    path = TEST_FILES_PATH / "reference.json.gz"
+
+    loaded = load_reference_file(path)
+    metadata, otu_count = load_reference_metadata(path)
+
+    assert list(iter_reference_otus(path)) == loaded["otus"]
+    assert otu_count == len(loaded["otus"])
+    assert metadata == {**loaded, "otus": []}
+
+    assert check_reference_file(path, strict=False) == check_import_data(
+        loaded, strict=False
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_json_stream_reader(chunk_size):
+    """
+    Test that values split across chunk boundaries are decoded correctly.
+
+    """
+    values = [12345, -1.5e-10, 'fo"o', {"bar": [True, None, 2.5]}, False]
+
+    reader = JSONStreamReader(io.StringIO(json.dumps(values)), chunk_size)
+
+    reader.consume("[")
+
+    decoded = [reader.decode()]
+
+    while reader.peek() == ",":
+        reader.consume(",")
+        decoded.append(reader.decode())
+
+    reader.consume("]")
+
+    assert decoded == values
+
+
+def test_json_stream_reader_large_value(mocker):
+    """
+    Test that the read size grows while a value spanning many chunks is decoded, so
+    the value isn't decoded again after every chunk.
+
+    """
+    value = {"sequence": "ATGC" * 10000}
+
+    stream = io.StringIO(json.dumps(value))
+    read = mocker.spy(stream, "read")
+
+    assert JSONStreamReader(stream, 16).decode() == value
+    assert read.call_count < 20
+
+
+def test_json_stream_reader_truncated():
+    reader = JSONStreamReader(io.StringIO('{"foo": [1, 2'), 4)
+
+    reader.consume("{")
+    reader.decode()
+    reader.consume(":")
+
+    with pytest.raises(json.JSONDecodeError):
+        reader.decode()
@@ -214,6 +214,63 @@ async def test_find(
     assert await resp.json() == snapshot
 
 
+async def test_find_after(fake2, spawn_client, static_time):
+    """
+    Test that samples can be paged through using the cursors returned in each page.
+
+    """
+    user = await fake2.users.create()
+
+    client = await spawn_client(authorize=True)
+
+    created_at = arrow.get(static_time.datetime)
+
+    await client.db.samples.insert_many(
+        [
+            {
+                "_id": sample_id,
+                "all_read": True,
+                "created_at": created_at.shift(hours=hours).datetime,
+                "host": "",
+                "isolate": "",
+                "labels": [],
+                "library_type": "normal",
+                "name": sample_id,
+                "notes": "",
+                "nuvs": False,
+                "pathoscope": False,
+                "ready": True,
+                "subtractions": [],
+                "user": {"id": user.id},
+            }
+            for sample_id, hours in [("foo", 2), ("bar", 1), ("baz", 1), ("qux", 0)]
+        ]
+    )
+
+    resp = await client.get("/samples?per_page=2&after=")
+
+    assert resp.status == 200
+
+    first_page = await resp.json()
+
+    assert [sample["id"] for sample in first_page["documents"]] == ["foo", "baz"]
+    assert first_page["found_count"] == 4
+    assert first_page["next"]
+
+    resp = await client.get(f"/samples?per_page=2&after={first_page['next']}")
+
+    assert resp.status == 200
+
+    second_page = await resp.json()
+
+    assert [sample["id"] for sample in second_page["documents"]] == ["bar", "qux"]
+    assert second_page["next"] is None
+
+    resp = await client.get("/samples?after=foo")
+
+    assert resp.status == 422
+
+
 class TestGet:
     @pytest.mark.parametrize(
         "administrator,owner,all_read,group_read,group,status",
@@ -1,8 +1,11 @@
+import asyncio
+
 import pytest
 
 from virtool_core.models.settings import Settings
 
 from virtool.settings.data import SettingsData
+from virtool.settings.oas import UpdateSettingsSchema
 
 @pytest.fixture
 async def settings_data(dbi) -> SettingsData:
@@ -27,3 +30,85 @@ async def test_ensure(dbi, settings_data, snapshot, test_settings):
     )
 
     assert await dbi.settings.find_one() == snapshot
+
+
+async def test_get_all(mocker, dbi, settings_data, test_settings):
+    """
+    Test that the settings are read from the database once and that updates replace
+    the cached settings.
+
+    """
+    find_one = mocker.spy(dbi.settings, "find_one")
+
+    settings = await settings_data.get_all()
+
+    assert settings.sample_unique_names is True
+    assert await settings_data.get_all() == settings
+    assert find_one.call_count == 1
+
+    settings.sample_unique_names = False
+
+    assert (await settings_data.get_all()).sample_unique_names is True
+
+    await settings_data.update(UpdateSettingsSchema(sample_unique_names=False))
+
+    assert (await settings_data.get_all()).sample_unique_names is False
+    assert find_one.call_count == 1
+
+
+async def test_listen(dbi, redis, test_settings):
+    """
+    Test that updates made by another process clear the cached settings.
+
+    """
+    settings_data = SettingsData(dbi, redis)
+    other_settings_data = SettingsData(dbi, redis)
+
+    task = asyncio.create_task(settings_data.listen())
+    await asyncio.sleep(0.1)
+
+    assert (await settings_data.get_all()).enable_api is True
+
+    await other_settings_data.update(UpdateSettingsSchema(enable_api=False))
+    await asyncio.sleep(0.1)
+
+    assert (await settings_data.get_all()).enable_api is False
+
+    task.cancel()
+    await task
+
+
+async def test_listen_during_read(mocker, dbi, redis, test_settings):
+    """
+    Test that settings read while an update is published by another process are not
+    cached.
+
+    """
+    settings_data = SettingsData(dbi, redis)
+    other_settings_data = SettingsData(dbi, redis)
+
+    task = asyncio.create_task(settings_data.listen())
+    await asyncio.sleep(0.1)
+
+    find_one = dbi.settings.find_one
+    published = False
+
+    async def find_one_and_publish(*args, **kwargs):
+        nonlocal published
+
+        document = await find_one(*args, **kwargs)
+
+        if not published:
+            published = True
+            await other_settings_data.update(UpdateSettingsSchema(enable_api=False))
+            await asyncio.sleep(0.1)
+
+        return document
+
+    mocker.patch.object(dbi.settings, "find_one", find_one_and_publish)
+
+    assert (await settings_data.get_all()).enable_api is True
+    assert (await settings_data.get_all()).enable_api is False
+
+    task.cancel()
+    await task
@@ -1,4 +1,5 @@
 import hashlib
+import time
 
 import pytest
 
@@ -6,6 +7,8 @@ import virtool.errors
 from virtool.mongo.transforms import apply_transforms
 from virtool.users.db import (
     AttachUserTransform,
+    AuthCache,
+    UserCache,
     compose_groups_update,
     compose_primary_group_update,
     update_sessions_and_keys,
@@ -33,6 +36,51 @@ async def test_attach_user_transform(multiple, snapshot, dbi, fake2):
     assert await apply_transforms(documents, [AttachUserTransform(dbi)]) == snapshot
 
 
+async def test_user_cache(mocker, dbi, fake2):
+    """
+    Test that users are fetched once until they expire or are invalidated.
+
+    """
+    user_1 = await fake2.users.create()
+    user_2 = await fake2.users.create()
+
+    cache = UserCache(dbi.users, ttl=60)
+
+    find = mocker.spy(dbi.users, "find")
+
+    assert await cache.get_many([user_1.id, "missing"]) == {
+        user_1.id: {
+            "id": user_1.id,
+            "administrator": user_1.administrator,
+            "handle": user_1.handle,
+        }
+    }
+
+    assert await cache.get(user_1.id) == {
+        "id": user_1.id,
+        "administrator": user_1.administrator,
+        "handle": user_1.handle,
+    }
+
+    assert find.call_count == 1
+
+    await dbi.users.update_one({"_id": user_1.id}, {"$set": {"administrator": True}})
+    cache.invalidate(user_1.id)
+
+    users = await cache.get_many([user_1.id, user_2.id])
+
+    assert users[user_1.id]["administrator"] is True
+    assert users[user_2.id]["handle"] == user_2.handle
+    assert find.call_args[0][0] == {"_id": {"$in": [user_1.id, user_2.id]}}
+
+    mocker.patch("time.monotonic", return_value=time.monotonic() + 61)
+
+    await cache.get(user_2.id)
+
+    assert find.call_count == 3
+    assert find.call_args[0][0] == {"_id": {"$in": [user_2.id]}}
+
+
 @pytest.mark.parametrize("groups", [None, [], ["kings"], ["kings", "peasants"]])
 async def test_compose_groups_update(
     groups, dbi, kings, all_permissions, no_permissions
@@ -169,9 +217,49 @@ async def test_update_sessions_and_keys(
 
     target_permissions = all_permissions if elevate else no_permissions
 
+    dbi.auth_cache.set(("session", "foobar", "token"), {}, "bob", session_id="foobar")
+
     await update_sessions_and_keys(
         dbi, "bob", administrator, ["peasants", "kings"], target_permissions
     )
 
     assert await dbi.sessions.find_one() == snapshot
     assert await dbi.keys.find_one() == snapshot
+    assert dbi.auth_cache.get(("session", "foobar", "token")) is None
+
+
+def test_auth_cache(mocker):
+    """
+    Test that entries are returned until they expire, are invalidated or are removed
+    to keep the cache under its maximum size.
+
+    """
+    cache = AuthCache(ttl=10, max_size=3)
+
+    cache.set(("session", "foo", "a"), "foo", "bob", session_id="foo")
+    cache.set(("session", "bar", "b"), "bar", "bob", session_id="bar")
+    cache.set(("key", "c", "fred"), "baz", "fred")
+
+    assert cache.get(("session", "foo", "a")) == "foo"
+    assert cache.get(("session", "foo", "b")) is None
+
+    # The least recently used entry is removed.
+    cache.set(("key", "d", "fred"), "qux", "fred")
+
+    assert cache.get(("session", "bar", "b")) is None
+    assert cache.get(("session", "foo", "a")) == "foo"
+
+    cache.invalidate_session("foo")
+
+    assert cache.get(("session", "foo", "a")) is None
+    assert cache.get(("key", "c", "fred")) == "baz"
+
+    mocker.patch("time.monotonic", return_value=time.monotonic() + 11)
+
+    assert cache.get(("key", "c", "fred")) is None
+
+    cache.set(("key", "c", "fred"), "baz", "fred")
+    cache.invalidate_user("fred")
+
+    assert cache.get(("key", "c", "fred")) is None
+    assert cache.get(("key", "d", "fred")) is None
@@ -186,6 +186,7 @@ class AccountData:
         :param user_id: the user ID
         """
         await self._db.keys.delete_many({"user.id": user_id})
+        self._db.auth_cache.invalidate_user(user_id)
 
     async def get_key(self, user_id: str, key_id: str) -> APIKey:
         """
@@ -239,6 +240,8 @@ class AccountData:
             projection=API_KEY_PROJECTION,
         )
 
+        self._db.auth_cache.invalidate_user(user_id)
+
         return APIKey(**document)
 
     async def delete_key(self, user_id: str, key_id: str):
@@ -252,6 +255,8 @@ class AccountData:
             {"id": key_id, "user.id": user_id}
         )
 
+        self._db.auth_cache.invalidate_user(user_id)
+
         if delete_result.deleted_count == 0:
             raise ResourceNotFoundError()
 
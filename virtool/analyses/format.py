@@ -18,7 +18,7 @@ import visvalingamwyatt as vw
 
 import virtool.analyses.utils
 from virtool.config.cls import Config
-from virtool.history.db import patch_to_version
+from virtool.history.db import get_patched_otu
 from virtool.otus.utils import format_isolate_name
 
 
@@ -140,9 +140,7 @@ async def format_pathoscope(config, db, document: Dict[str, Any]) -> Dict[str, A
 async def format_pathoscope_hits(
     config, db, otu_id: str, otu_version, hits: List[Dict]
 ):
-    _, patched_otu, _ = await patch_to_version(
-        config.data_path, db, otu_id, otu_version
-    )
+    patched_otu = await get_patched_otu(config.data_path, db, otu_id, otu_version)
 
     max_sequence_length = 0
 
@@ -382,12 +380,12 @@ async def gather_patched_otus(config, db, results: List[dict]) -> Dict[str, dict
 
     patched_otus = await asyncio.gather(
         *[
-            patch_to_version(config.data_path, db, otu_id, version)
+            get_patched_otu(config.data_path, db, otu_id, version)
             for otu_id, version in otu_specifiers
         ]
     )
 
-    return {patched["_id"]: patched for _, patched, _ in patched_otus}
+    return {patched["_id"]: patched for patched in patched_otus}
 
 
 def transform_coverage_to_coordinates(
@@ -1,16 +1,38 @@
 import asyncio
+import base64
+import datetime
 import math
 import re
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple, Union, Mapping, Any
 
 from aiohttp.web import Request
+from bson import Decimal128, ObjectId, Regex, Timestamp, json_util
 from multidict import MultiDictProxy
 
+from virtool.api.response import InvalidQuery
+from virtool.errors import InvalidCursorError
 from virtool.types import Projection, Document
 from virtool.utils import coerce_list, to_bool
 
 
+#: The Python types and BSON type aliases of sort values in the order MongoDB sorts
+#: them. Values of different types are never compared directly.
+SORT_TYPE_ORDER = [
+    ((type(None),), ["null"]),
+    ((int, float, Decimal128), ["int", "long", "double", "decimal"]),
+    ((str,), ["string", "symbol"]),
+    ((dict,), ["object"]),
+    ((list,), ["array"]),
+    ((bytes,), ["binData"]),
+    ((ObjectId,), ["objectId"]),
+    ((bool,), ["bool"]),
+    ((datetime.datetime,), ["date"]),
+    ((Timestamp,), ["timestamp"]),
+    ((Regex, re.Pattern), ["regex"]),
+]
+
+
 @dataclass
 class Paginated:
     documents: List[Document]
@@ -57,6 +79,194 @@ def compose_regex_query(term, fields: List[str]) -> Dict[str, List[Dict[str, dic
     }
 
 
+def get_cursor_sort(sort: Optional[List[Tuple[str, int]]]) -> List[Tuple[str, int]]:
+    """
+    Get a sort that gives every document a unique position, so it can be used for
+    paging with a cursor.
+
+    Documents are sorted by ``_id`` after the fields in ``sort``, in the same direction
+    as the last field.
+
+    :param sort: the sort to extend
+    :return: the extended sort
+
+    """
+    sort = list(sort or [])
+
+    if all(field != "_id" for field, _ in sort):
+        sort.append(("_id", sort[-1][1] if sort else 1))
+
+    return sort
+
+
+def encode_cursor(document: Document, sort: List[Tuple[str, int]]) -> str:
+    """
+    Encode an opaque cursor that points to the position of ``document`` in a search
+    sorted by ``sort``.
+
+    :param document: the document the cursor points to
+    :param sort: the sort the cursor is for
+    :return: the cursor
+
+    """
+    values = []
+
+    for field, _ in sort:
+        value = document
+
+        for key in field.split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+
+        values.append(value)
+
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: List[Tuple[str, int]]) -> list:
+    """
+    Decode a cursor created with :func:`encode_cursor` into the sort values of the
+    document it points to.
+
+    :param cursor: the cursor
+    :param sort: the sort the cursor is for
+    :return: the sort values
+    :raises InvalidCursorError: if the cursor can't be decoded for ``sort``
+
+    """
+    try:
+        values = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError) as err:
+        raise InvalidCursorError(cursor) from err
+
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise InvalidCursorError(cursor)
+
+    return values
+
+
+def get_sort_type_index(value: Any) -> int:
+    """
+    Get the position of the type of ``value`` in :data:`SORT_TYPE_ORDER`.
+
+    :param value: a sort value
+    :return: the position of its type
+    :raises InvalidCursorError: if the type can't be used in a cursor
+
+    """
+    for index, (types, _) in enumerate(SORT_TYPE_ORDER):
+        if isinstance(value, types) and (bool in types or not isinstance(value, bool)):
+            return index
+
+    raise InvalidCursorError(value)
+
+
+def compose_after_conditions(value: Any, direction: int) -> List[Any]:
+    """
+    Compose the conditions that match the values of a field that come after ``value``
+    when sorted in ``direction``.
+
+    MongoDB only compares values of the same type with ``$gt`` and ``$lt``, so values
+    of types that sort after ``value`` are matched with ``$type``. Null and missing
+    values sort before all other types.
+
+    :param value: the sort value of the last document on the previous page
+    :param direction: the sort direction
+    :return: the conditions
+
+    """
+    type_index = get_sort_type_index(value)
+
+    conditions = []
+
+    if value is not None:
+        conditions.append({"$gt" if direction == 1 else "$lt": value})
+
+    if direction == 1:
+        following = SORT_TYPE_ORDER[type_index + 1 :]
+    else:
+        following = SORT_TYPE_ORDER[1:type_index]
+
+    if following:
+        conditions.append(
+            {"$type": [alias for _, aliases in following for alias in aliases]}
+        )
+
+    if direction != 1 and value is not None:
+        conditions.append(None)
+
+    return conditions
+
+
+def compose_cursor_query(sort: List[Tuple[str, int]], values: list) -> Dict:
+    """
+    Compose a MongoDB query that matches the documents that come after the sort
+    ``values`` when sorted by ``sort``.
+
+    :param sort: the sort
+    :param values: the sort values of the last document on the previous page
+    :return: a query
+    :raises InvalidCursorError: if a value can't be used in a cursor
+
+    """
+    clauses = []
+
+    for index, (field, direction) in enumerate(sort):
+        preceding = {
+            preceding_field: value
+            for (preceding_field, _), value in zip(sort[:index], values)
+        }
+
+        for condition in compose_after_conditions(values[index], direction):
+            clauses.append({**preceding, field: condition})
+
+    return {"$or": clauses}
+
+
+async def find_after(
+    collection,
+    query: Dict,
+    after: str,
+    per_page: int,
+    sort: Optional[List[Tuple[str, int]]] = None,
+    projection: Optional[Projection] = None,
+) -> Tuple[List[Document], Optional[str]]:
+    """
+    Find a page of documents using a cursor instead of skipping documents.
+
+    The cursor ``after`` points to the last document on the previous page. An empty
+    cursor returns the first page. Returns the unprocessed documents and the cursor for
+    the next page, which is ``None`` on the last page.
+
+    The fields in ``sort`` must be included in ``projection``.
+
+    :param collection: the database collection
+    :param query: the query to match documents with
+    :param after: the cursor for the page
+    :param per_page: the number of documents to return
+    :param sort: the sort to apply
+    :param projection: the projection to apply to the returned documents
+    :return: the documents and the cursor for the next page
+    :raises InvalidCursorError: if the cursor is invalid
+
+    """
+    sort = get_cursor_sort(sort)
+
+    if after:
+        query = {
+            "$and": [query, compose_cursor_query(sort, decode_cursor(after, sort))]
+        }
+
+    documents = await asyncio.shield(
+        collection.find(query, projection, sort=sort, limit=per_page + 1).to_list(None)
+    )
+
+    if len(documents) > per_page:
+        documents = documents[:per_page]
+        return documents, encode_cursor(documents[-1], sort)
+
+    return documents, None
+
+
 async def paginate(
     collection,
     db_query: Union[Dict, MultiDictProxy[str]],
@@ -92,6 +302,12 @@ async def paginate(
     `per_page`: the `documents` to return for each page request
     `page`: the page number to return (starts at one)
 
+    If the `url_query` contains an `after` cursor, pages are found using the cursor
+    instead of the `page` number. Pass an empty cursor to get the first page. The
+    result then includes a `next` cursor for the following page, which is `None` on
+    the last page. Deep pages are as fast to find as the first one and the counts are
+    cached for a short time.
+
     :param collection: the database collection
     :param db_query: a query derived from user supplied - affects found count
     :param url_query: the raw URL query; used to get the `page` and `page_count` values
@@ -119,6 +335,29 @@ async def paginate(
 
     db_query = {"$and": [base_query, db_query]}
 
+    if (after := url_query.get("after")) is not None:
+        try:
+            documents, next_cursor = await find_after(
+                collection, db_query, after, per_page, sort, projection
+            )
+        except InvalidCursorError:
+            raise InvalidQuery({"after": ["Invalid cursor"]})
+
+        found_count, total_count = await asyncio.gather(
+            collection.mongo.count_cache.count(collection, db_query),
+            collection.mongo.count_cache.count(collection, base_query),
+        )
+
+        return {
+            "documents": [await collection.apply_processor(d) for d in documents],
+            "total_count": total_count,
+            "found_count": found_count,
+            "page_count": int(math.ceil(found_count / per_page)),
+            "per_page": per_page,
+            "page": page,
+            "next": next_cursor,
+        }
+
     cursor = collection.find(db_query, projection, sort=sort)
 
     found_count = await collection.count_documents(db_query)
@@ -10,6 +10,8 @@ from virtool_core.logging import configure_logs
 import virtool.jobs.main
 from virtool.app import run_app
 from virtool.config.cls import Config
+from virtool.dispatcher.client import COALESCE_WINDOW
+from virtool.references.db import INSERT_BATCH_SIZE
 
 logger = getLogger("config")
 
@@ -48,6 +50,31 @@ def entry():
     "--db-name", default="virtool", help="The MongoDB database name", type=str
 )
 @click.option("--dev", help="Run in development mode", is_flag=True)
+@click.option(
+    "--dispatch-change-streams",
+    help="Dispatch changes to MongoDB collections by watching change streams "
+    "(requires a replica set)",
+    is_flag=True,
+)
+@click.option(
+    "--dispatch-group",
+    help="The Redis consumer group this instance reads dispatched changes with, "
+    "required for --dispatch-stream. Must be unique to the instance and the same "
+    "across restarts",
+    type=str,
+)
+@click.option(
+    "--dispatch-stream",
+    help="Dispatch changes through a Redis stream instead of Pub/Sub",
+    is_flag=True,
+)
+@click.option(
+    "--dispatch-window",
+    default=COALESCE_WINDOW,
+    help="The number of seconds to collect changes for before combining and "
+    "publishing them",
+    type=click.FloatRange(min=0),
+)
 @click.option(
     "--force-version",
     help="Make the instance think it is a different version",
@@ -85,6 +112,10 @@ def cli(
     db_connection_string,
     db_name,
     dev,
+    dispatch_change_streams,
+    dispatch_group,
+    dispatch_stream,
+    dispatch_window,
     force_version,
     no_sentry,
     proxy,
@@ -93,6 +124,9 @@ def cli(
     verbose,
     sentry_dsn,
 ):
+    if dispatch_stream and not dispatch_group:
+        raise click.UsageError("--dispatch-group is required for --dispatch-stream")
+
     ctx.ensure_object(dict)
     ctx.obj.update(
         {
@@ -101,6 +135,10 @@ def cli(
             "db_connection_string": db_connection_string,
             "db_name": db_name,
             "dev": dev,
+            "dispatch_change_streams": dispatch_change_streams,
+            "dispatch_group": dispatch_group,
+            "dispatch_stream": dispatch_stream,
+            "dispatch_window": dispatch_window,
             "force_version": force_version,
             "no_sentry": no_sentry,
             "proxy": proxy,
@@ -126,6 +164,13 @@ def cli(
 @click.option(
     "--no-fetching", help="Start with automatic fetching disabled", is_flag=True
 )
+@click.option(
+    "--reference-batch-size",
+    default=INSERT_BATCH_SIZE,
+    help="The number of OTUs written in each bulk operation when importing, cloning, "
+    "installing, or updating a reference",
+    type=click.IntRange(min=1),
+)
 @click.option(
     "--b2c-client-id", help="Azure AD B2C client ID, required for --use-b2c", type=str
 )
@@ -149,6 +194,7 @@ def start_server(
     no_check_db,
     no_check_files,
     no_fetching,
+    reference_batch_size,
     b2c_client_id,
     b2c_client_secret,
     b2c_tenant,
@@ -170,6 +216,7 @@ def start_server(
         no_check_files=no_check_files,
         no_fetching=no_fetching,
         port=port,
+        reference_batch_size=reference_batch_size,
         use_b2c=use_b2c,
         sentry_dsn=sentry_dsn,
     )
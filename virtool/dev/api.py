@@ -26,6 +26,8 @@ async def dev(req):
         await req.app["db"].users.delete_many({})
         await req.app["db"].sessions.delete_many({})
         await req.app["db"].keys.delete_many({})
+        req.app["db"].auth_cache.clear()
+        req.app["db"].count_cache.clear()
 
         logger.debug("Cleared users")
 
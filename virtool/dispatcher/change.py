@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Sequence, Union
+from dataclasses import dataclass, field
+from typing import Optional, Sequence, Union
 
 from virtool.dispatcher.operations import Operation
 
@@ -18,6 +18,9 @@ class Change:
     operation: Operation
     id_list: Sequence[Union[int, str]]
 
+    #: The ID of the Redis stream entry the change was read from, if any.
+    stream_id: Optional[str] = field(default=None, compare=False)
+
     @property
     def target(self):
         return f"{self.interface}.{self.operation}"
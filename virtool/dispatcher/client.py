@@ -1,29 +1,72 @@
 import asyncio
 import json
 from asyncio import CancelledError
-from typing import Sequence, Union
+from typing import Dict, List, Sequence, Tuple, Union
 
 from aioredis import Redis
 
-from virtool.dispatcher.operations import Operation
+from virtool.dispatcher.operations import DELETE, INSERT, UPDATE, Operation
+
+#: The number of seconds to collect changes for before publishing them.
+COALESCE_WINDOW = 0.1
+
+#: The Redis stream changes are added to when streams are used for dispatch.
+DISPATCH_STREAM = "stream:dispatch"
+
+#: The approximate number of changes retained in the dispatch stream.
+DISPATCH_STREAM_LENGTH = 10000
 
 
 class DispatcherClient:
-    def __init__(self, redis: Redis):
+    """
+    Publishes changes to a Redis channel for processing by a dispatcher.
+
+    Changes are buffered for ``window`` seconds and coalesced, so a burst of changes
+    results in one message per interface and operation:
+
+    * IDs for the same interface and operation are merged.
+    * Updates to resources with a pending insert are dropped.
+    * Pending inserts and updates are dropped for resources that are deleted.
+
+    If ``stream`` is ``True``, changes are added to the :data:`DISPATCH_STREAM` Redis
+    stream instead of being published on a Pub/Sub channel.
+
+    """
+
+    def __init__(
+        self, redis: Redis, window: float = COALESCE_WINDOW, stream: bool = False
+    ):
         self._redis = redis
-        self._q = asyncio.Queue()
+        self._window = window
+        self._stream = stream
+        self._changes: Dict[Tuple[str, Operation], Dict[Union[str, int], None]] = {}
+        self._pending = asyncio.Event()
 
     async def run(self):
         """
         Run the dispatcher.
 
-        Continually publishes enqueued changes to a Redis channel.
+        Continually publishes enqueued changes to a Redis channel or stream.
 
         """
         try:
             while True:
-                json_string = await self._q.get()
-                await self._redis.publish("channel:dispatch", json_string)
+                await self._pending.wait()
+
+                if self._window:
+                    await asyncio.sleep(self._window)
+
+                self._pending.clear()
+
+                for json_string in self._flush():
+                    if self._stream:
+                        await self._redis.xadd(
+                            DISPATCH_STREAM,
+                            {"change": json_string},
+                            max_len=DISPATCH_STREAM_LENGTH,
+                        )
+                    else:
+                        await self._redis.publish("channel:dispatch", json_string)
         except CancelledError:
             pass
 
@@ -38,8 +81,42 @@ class DispatcherClient:
         :param id_list: the IDs of the resources changed
 
         """
-        json_string = json.dumps(
-            {"interface": interface, "operation": operation, "id_list": id_list}
+        if not id_list:
+            return
+
+        if operation == DELETE:
+            for superseded in (INSERT, UPDATE):
+                if pending := self._changes.get((interface, superseded)):
+                    for id_ in id_list:
+                        pending.pop(id_, None)
+        else:
+            if pending := self._changes.get((interface, DELETE)):
+                for id_ in id_list:
+                    pending.pop(id_, None)
+
+            if operation == UPDATE:
+                if inserted := self._changes.get((interface, INSERT)):
+                    id_list = [id_ for id_ in id_list if id_ not in inserted]
+
+        self._changes.setdefault((interface, operation), {}).update(
+            dict.fromkeys(id_list)
         )
 
-        self._q.put_nowait(json_string)
+        self._pending.set()
+
+    def _flush(self) -> List[str]:
+        """
+        Empty the buffer and return a JSON message for each buffered change.
+
+        :return: the JSON messages
+        """
+        changes = self._changes
+        self._changes = {}
+
+        return [
+            json.dumps(
+                {"interface": interface, "operation": operation, "id_list": list(ids)}
+            )
+            for (interface, operation), ids in changes.items()
+            if ids
+        ]
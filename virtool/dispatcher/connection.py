@@ -1,22 +1,80 @@
-from typing import Union
+import asyncio
+import json
+from collections import OrderedDict
+from itertools import count
+from logging import getLogger
+from typing import Callable, Dict, Hashable, Optional, Sequence, Set, Union
 
 from aiohttp.web_ws import WebSocketResponse
 
 from virtool.api.custom_json import dumps
 
+logger = getLogger(__name__)
+
+#: The maximum number of messages that can wait to be sent to a connection.
+MAX_QUEUE_SIZE = 200
+
+#: The number of seconds a message send can take before it is abandoned.
+SEND_TIMEOUT = 5
+
+#: Tells the client that messages were lost and it should reload its data.
+RESYNC_MESSAGE = json.dumps(
+    {"interface": "dispatcher", "operation": "resume_failed", "data": None}
+)
+
+#: The queue key of :data:`RESYNC_MESSAGE`.
+RESYNC_KEY = ("dispatcher", "resume_failed", None)
+
 
 class Connection:
     """
     Wraps a :class:``WebSocketResponse``.
+
+    Messages enqueued with :meth:`enqueue` are held in a bounded queue and sent by a
+    writer task started with :meth:`start`. When a message is enqueued with the same
+    key as a message that is still waiting, the waiting message is replaced. When the
+    queue is full, the oldest message with a key is dropped. Messages without a key,
+    such as deletes, are never dropped.
+
+    When a message is dropped, the client is sent a ``resume_failed`` message so it
+    reloads its data.
+
+    A connection receives messages for all interfaces until the client subscribes to
+    an interface. From then on, it only receives messages for the interfaces and
+    resources it is subscribed to.
+
     """
 
-    def __init__(self, ws: WebSocketResponse, session):
+    def __init__(
+        self, ws: WebSocketResponse, session, max_queue_size: int = MAX_QUEUE_SIZE
+    ):
         self._ws = ws
         self.ping = self._ws.ping
         self.user_id = session.user_id
         self.groups = session.groups
         self.permissions = session.permissions
 
+        self._max_queue_size = max_queue_size
+        self._queue: OrderedDict = OrderedDict()
+        self._queued: Optional[asyncio.Event] = None
+        self._unkeyed = count()
+        self._writer: Optional[asyncio.Task] = None
+        self._on_error: Optional[Callable[["Connection"], None]] = None
+
+        #: Whether the writer task stopped because sending a message failed.
+        self.failed = False
+
+        #: Maps subscribed interfaces to subscribed resource IDs, where ``None`` means
+        #: all resources in the interface. Is ``None`` until the client subscribes.
+        self._subscriptions: Optional[Dict[str, Optional[Set]]] = None
+
+        #: The number of messages replaced by newer messages before being sent.
+        self.coalesced = 0
+
+        #: The number of messages dropped because the queue was full or the send timed
+        #: out.
+        self.dropped = 0
+
     async def send(self, message: Union[dict, list]):
         """
         Sends the passed JSON-encodable message to the connected client.
@@ -30,6 +88,258 @@ class Connection:
 
             await self.close(1002)
 
+    async def send_encoded(self, message: str):
+        """
+        Sends an already JSON-encoded message to the connected client.
+
+        Used by the dispatcher to avoid encoding the same message once per connection.
+
+        :param message: the JSON-encoded message to send
+        """
+        try:
+            await self._ws.send_str(message)
+        except ConnectionResetError as err:
+            if "Cannot write to closing transport" not in str(err):
+                raise
+
+            await self.close(1002)
+
+    def subscribe(self, interface: str, id_list: Optional[Sequence] = None):
+        """
+        Subscribe to changes in ``interface``.
+
+        If ``id_list`` is provided, only subscribe to changes in the resources with
+        those IDs.
+
+        :param interface: the interface to subscribe to
+        :param id_list: the IDs of the resources to subscribe to
+        """
+        if self._subscriptions is None:
+            self._subscriptions = {}
+
+        if id_list is None:
+            self._subscriptions[interface] = None
+        elif interface not in self._subscriptions:
+            self._subscriptions[interface] = set(id_list)
+        elif self._subscriptions[interface] is not None:
+            self._subscriptions[interface].update(id_list)
+
+    def unsubscribe(self, interface: str, id_list: Optional[Sequence] = None):
+        """
+        Unsubscribe from changes in ``interface``.
+
+        If ``id_list`` is provided, only unsubscribe from the resources with those IDs.
+        Has no effect if the connection has never subscribed to anything.
+
+        :param interface: the interface to unsubscribe from
+        :param id_list: the IDs of the resources to unsubscribe from
+        """
+        if self._subscriptions is None or interface not in self._subscriptions:
+            return
+
+        ids = self._subscriptions[interface]
+
+        if id_list is None:
+            del self._subscriptions[interface]
+        elif ids is not None:
+            ids.difference_update(id_list)
+
+            if not ids:
+                del self._subscriptions[interface]
+
+    def is_subscribed(self, interface: str, id_: Optional[Union[int, str]] = None):
+        """
+        Check whether the connection should receive messages for ``interface``.
+
+        If ``id_`` is provided, check whether the connection should receive messages
+        for that resource.
+
+        :param interface: the interface to check
+        :param id_: the ID of a resource in the interface
+        :return: whether the connection is subscribed
+        """
+        if self._subscriptions is None:
+            return True
+
+        try:
+            ids = self._subscriptions[interface]
+        except KeyError:
+            return False
+
+        return ids is None or id_ is None or id_ in ids
+
+    def get_subscribed_ids(self, interface: str) -> Optional[Set]:
+        """
+        Get the IDs of the resources in ``interface`` the connection is subscribed to.
+
+        :param interface: the interface
+        :return: the subscribed IDs or ``None`` if the connection receives all resources
+        """
+        if self._subscriptions is None:
+            return None
+
+        return self._subscriptions.get(interface, set())
+
+    def handle_message(self, data: str):
+        """
+        Handle a message sent by the client.
+
+        Subscription messages take the form::
+
+            {"operation": "subscribe", "interface": "samples", "id_list": ["foo"]}
+
+        The ``id_list`` is optional. Unrecognized messages are ignored.
+
+        :param data: the raw message text
+        """
+        try:
+            message = json.loads(data)
+            operation = message["operation"]
+            interface = message["interface"]
+            id_list = message.get("id_list")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            logger.debug("Ignored malformed message from %s", self.user_id)
+            return
+
+        if not isinstance(interface, str) or not (
+            id_list is None
+            or isinstance(id_list, list)
+            and all(isinstance(id_, (int, str)) for id_ in id_list)
+        ):
+            logger.debug("Ignored malformed message from %s", self.user_id)
+            return
+
+        if operation == "subscribe":
+            self.subscribe(interface, id_list)
+        elif operation == "unsubscribe":
+            self.unsubscribe(interface, id_list)
+
+    def enqueue(self, message: str, key: Optional[Hashable] = None):
+        """
+        Add an encoded message to the queue of messages to send.
+
+        If a message with the same ``key`` is already waiting, it is removed and
+        ``message`` is added to the end of the queue. Messages without a key are never
+        replaced.
+
+        :param message: the JSON-encoded message to send
+        :param key: a key identifying the resource and operation the message is for
+        """
+        if self.failed:
+            return
+
+        if key is not None and key in self._queue:
+            # Move the replacement to the end so messages stay in the order of the
+            # changes that caused them.
+            self._queue[key] = message
+            self._queue.move_to_end(key)
+            self.coalesced += 1
+            return
+
+        if len(self._queue) >= self._max_queue_size:
+            self._drop_oldest()
+
+        self._queue[next(self._unkeyed) if key is None else key] = message
+
+        if self._queued:
+            self._queued.set()
+
+    def _drop_oldest(self):
+        """
+        Drop the oldest waiting message that has a key and queue a resync message.
+
+        Messages without a key can't be replaced by later messages, so nothing is
+        dropped if none of the waiting messages have a key.
+
+        """
+        try:
+            key = next(
+                key
+                for key in self._queue
+                if isinstance(key, tuple) and key != RESYNC_KEY
+            )
+        except StopIteration:
+            return
+
+        del self._queue[key]
+
+        self._dropped()
+
+        logger.warning(
+            "Dropped message for slow connection: %s (%s dropped)",
+            self.user_id,
+            self.dropped,
+        )
+
+    def _dropped(self):
+        self.dropped += 1
+
+        if RESYNC_KEY not in self._queue:
+            self._queue[RESYNC_KEY] = RESYNC_MESSAGE
+
+    def start(self, on_error: Optional[Callable[["Connection"], None]] = None):
+        """
+        Start the writer task that sends enqueued messages.
+
+        If sending a message fails, the writer stops, no more messages are queued and
+        ``on_error`` is called with the connection.
+
+        :param on_error: a function to call when sending a message fails
+        """
+        if self._writer is None:
+            self._on_error = on_error
+            self._queued = asyncio.Event()
+
+            if self._queue:
+                self._queued.set()
+
+            self._writer = asyncio.create_task(self._write())
+
+    def stop(self):
+        """
+        Stop the writer task. Messages that are still queued will not be sent.
+
+        """
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+
+    async def _write(self):
+        try:
+            while True:
+                await self._queued.wait()
+                self._queued.clear()
+
+                while self._queue:
+                    _, message = self._queue.popitem(last=False)
+
+                    try:
+                        await asyncio.wait_for(
+                            self.send_encoded(message), timeout=SEND_TIMEOUT
+                        )
+                    except asyncio.TimeoutError:
+                        self._dropped()
+                        logger.warning(
+                            "Timed out sending message to connection: %s",
+                            self.user_id,
+                        )
+        except asyncio.CancelledError:
+            pass
+        except Exception as err:
+            if isinstance(err, RuntimeError) and (
+                "unable to perform operation on <TCPTransport" in str(err)
+            ):
+                logger.debug("Connection closed: %s", self.user_id)
+            else:
+                logger.exception("Could not send message to %s", self.user_id)
+
+            self.failed = True
+            self._queue.clear()
+            self._writer = None
+
+            if self._on_error:
+                self._on_error(self)
+
     async def close(self, code: int):
         """
         Closes the underlying websocket connection.
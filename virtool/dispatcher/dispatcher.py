@@ -1,10 +1,12 @@
 """
 The dispatcher
 """
+import asyncio
 from asyncio import CancelledError
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, replace
 from logging import getLogger
-from typing import List
+from typing import Dict, Hashable, List, Optional, Union
 
 from sqlalchemy.ext.asyncio import AsyncEngine
 
@@ -16,6 +18,7 @@ import virtool.jobs.db
 import virtool.otus.db
 import virtool.subtractions.db
 import virtool.users.db
+from virtool.api.custom_json import dumps
 from virtool.dispatcher.change import Change
 from virtool.dispatcher.connection import Connection
 from virtool.dispatcher.fetchers import (
@@ -27,12 +30,70 @@ from virtool.dispatcher.fetchers import (
     TasksFetcher,
     UploadsFetcher,
 )
-from virtool.dispatcher.listener import RedisDispatcherListener
+from virtool.dispatcher.listener import (
+    MergedDispatcherListener,
+    MongoChangeStreamDispatcherListener,
+    RedisDispatcherListener,
+    RedisStreamDispatcherListener,
+    parse_stream_id,
+)
 from virtool.dispatcher.operations import DELETE, INSERT, UPDATE
 from virtool.mongo.core import DB
 
 logger = getLogger(__name__)
 
+#: Identical changes received within this many seconds of each other are dispatched
+#: once at the end of the window.
+REPEAT_WINDOW = 0.5
+
+
+def get_message_key(message: dict) -> Optional[Hashable]:
+    """
+    Get a key identifying the resource and operation a websocket message is for.
+
+    Messages with the same key supersede each other, so only the latest needs to be
+    sent. Messages that aren't about a single resource have no key.
+
+    :param message: the message
+    :return: the key or ``None``
+
+    """
+    data = message["data"]
+
+    if isinstance(data, dict) and "id" in data:
+        return message["interface"], message["operation"], data["id"]
+
+    return None
+
+
+def narrow_change(change: Change, connections: List[Connection]) -> Change:
+    """
+    Remove IDs that none of ``connections`` are subscribed to from ``change``.
+
+    Deletions are not narrowed because dispatching them doesn't require a fetch.
+
+    :param change: the change to narrow
+    :param connections: the connections subscribed to the change interface
+    :return: the narrowed change
+
+    """
+    if change.operation == DELETE:
+        return change
+
+    subscribed_ids = set()
+
+    for connection in connections:
+        ids = connection.get_subscribed_ids(change.interface)
+
+        if ids is None:
+            return change
+
+        subscribed_ids.update(ids)
+
+    return replace(
+        change, id_list=[id_ for id_ in change.id_list if id_ in subscribed_ids]
+    )
+
 
 @dataclass
 class Fetchers:
@@ -57,7 +118,17 @@ class Fetchers:
 
 
 class Dispatcher:
-    def __init__(self, pg: AsyncEngine, db: DB, listener: RedisDispatcherListener):
+    def __init__(
+        self,
+        pg: AsyncEngine,
+        db: DB,
+        listener: Union[
+            MergedDispatcherListener,
+            MongoChangeStreamDispatcherListener,
+            RedisDispatcherListener,
+            RedisStreamDispatcherListener,
+        ],
+    ):
         #: A dict of all active connections.
         self.db = db
         self._listener = listener
@@ -97,6 +168,18 @@ class Dispatcher:
         #: All active client connections.
         self._connections = []
 
+        #: The times recent changes were dispatched, oldest first.
+        self._recent: OrderedDict = OrderedDict()
+
+        #: Tasks that will dispatch repeated changes when their windows end.
+        self._deferred: Dict[tuple, asyncio.Task] = {}
+
+        #: The latest repeat of each deferred change.
+        self._repeats: Dict[tuple, Change] = {}
+
+        #: Live changes held for connections until changes are replayed to them.
+        self._held: Dict[Connection, List[Change]] = {}
+
     async def run(self):
         """
         Start the dispatcher.
@@ -109,7 +192,7 @@ class Dispatcher:
 
         try:
             async for change in self._listener:
-                await self._dispatch(change)
+                await self._handle(change)
                 logger.debug("Received change: %s", change.target)
         except CancelledError:
             pass
@@ -126,6 +209,7 @@ class Dispatcher:
 
         """
         self._connections.append(connection)
+        connection.start(self.remove_connection)
         logger.debug("Added connection to dispatcher: %s", connection.user_id)
 
     def remove_connection(self, connection: Connection):
@@ -135,9 +219,16 @@ class Dispatcher:
         :param connection: the connection to remove
 
         """
+        connection.stop()
+
         try:
             self._connections.remove(connection)
-            logger.debug("Removed connection from dispatcher: %s", connection.user_id)
+            logger.debug(
+                "Removed connection from dispatcher: %s (%s coalesced, %s dropped)",
+                connection.user_id,
+                connection.coalesced,
+                connection.dropped,
+            )
         except ValueError:
             pass
 
@@ -149,11 +240,128 @@ class Dispatcher:
         """
         return [conn for conn in self._connections if conn.user_id]
 
-    async def _dispatch(self, change: Change):
+    async def _handle(self, change: Change):
+        """
+        Dispatch ``change`` unless an identical change was dispatched recently.
+
+        Repeats of a recently dispatched change are deferred until
+        :data:`REPEAT_WINDOW` seconds after it. Any number of repeats in the window
+        result in one deferred dispatch, which fetches the resources at that time.
+        Frequently updated resources, like task progress, are fetched about once a
+        window no matter how often they change.
+
+        :param change: the change to handle
+
+        """
+        if change.operation == DELETE:
+            await self._dispatch(change)
+            return
+
+        key = (change.interface, change.operation, tuple(change.id_list))
+        now = asyncio.get_event_loop().time()
+
+        while self._recent:
+            oldest_key, dispatched_at = next(iter(self._recent.items()))
+
+            if now - dispatched_at < REPEAT_WINDOW:
+                break
+
+            del self._recent[oldest_key]
+
+        if key in self._recent:
+            self._repeats[key] = change
+
+            if key not in self._deferred:
+                self._deferred[key] = asyncio.create_task(
+                    self._dispatch_later(key, self._recent[key] + REPEAT_WINDOW - now)
+                )
+
+            return
+
+        self._recent[key] = now
+        await self._dispatch(change)
+
+    async def _dispatch_later(self, key: tuple, delay: float):
+        await asyncio.sleep(delay)
+
+        del self._deferred[key]
+        change = self._repeats.pop(key)
+
+        self._recent.pop(key, None)
+        self._recent[key] = asyncio.get_event_loop().time()
+
+        await self._dispatch(change)
+
+    async def replay(self, connection: Connection, stream_id: str):
+        """
+        Dispatch the changes received after ``stream_id`` to ``connection``.
+
+        Used when a client reconnects and asks to resume from the last change it
+        received. If the changes can't be replayed, the client is sent a
+        ``resume_failed`` message and should reload its data.
+
+        Live changes for the connection are held until the replay is done and are then
+        dispatched in order, skipping those that were already replayed.
+
+        :param connection: the connection to replay changes to
+        :param stream_id: the ID of the last change the client received
+
+        """
+        held = self._held[connection] = []
+
+        try:
+            changes = await self._listener.read_since(stream_id)
+
+            if changes is None:
+                replayed_id = None
+
+                connection.enqueue(
+                    dumps(
+                        {
+                            "interface": "dispatcher",
+                            "operation": "resume_failed",
+                            "data": None,
+                        }
+                    )
+                )
+            else:
+                replayed_id = parse_stream_id(
+                    changes[-1].stream_id if changes else stream_id
+                )
+
+                for change in changes:
+                    await self._dispatch(change, [connection])
+
+                logger.debug(
+                    "Replayed %s changes to connection: %s",
+                    len(changes),
+                    connection.user_id,
+                )
+
+            while held:
+                change = held.pop(0)
+
+                if (
+                    replayed_id is None
+                    or change.stream_id is None
+                    or parse_stream_id(change.stream_id) > replayed_id
+                ):
+                    await self._dispatch(change, [connection])
+        finally:
+            self._held.pop(connection, None)
+
+    async def _dispatch(
+        self, change: Change, connections: Optional[List[Connection]] = None
+    ):
         """
         Dispatch a ``message`` with a conserved format to authenticated connections.
 
+        If the change was read from a stream, messages include its ``stream_id`` so
+        clients can resume from it when they reconnect.
+
         :param change: the change to dispatch
+        :param connections: the connections to dispatch to instead of all
+            authenticated connections
 
         """
         try:
@@ -165,18 +373,51 @@ class Dispatcher:
         if change.operation not in (DELETE, INSERT, UPDATE):
             raise ValueError(f"Unknown dispatch operation: {change.operation}")
 
-        async for connection, message in fetcher.fetch(
-            change, self.authenticated_connections
-        ):
+        if connections is None:
+            connections = []
+
+            for connection in self.authenticated_connections:
+                if connection in self._held:
+                    self._held[connection].append(change)
+                else:
+                    connections.append(connection)
+
+        connections = [
+            connection
+            for connection in connections
+            if connection.is_subscribed(change.interface)
+        ]
+
+        if not connections:
+            logger.debug("No subscribers for %s", change.target)
+            return
+
+        change = narrow_change(change, connections)
+
+        if not change.id_list:
+            logger.debug("No subscribers for resources in %s", change.target)
+            return
+
+        prepared: Dict[int, tuple] = {}
+
+        async for connection, message in fetcher.fetch(change, connections):
             try:
-                await connection.send(message)
-            except RuntimeError as err:
-                if "RuntimeError: unable to perform operation on <TCPTransport" in str(
-                    err
-                ):
-                    self.remove_connection(connection)
+                _, key, encoded = prepared[id(message)]
+            except KeyError:
+                key = get_message_key(message)
+                encoded = dumps(
+                    {**message, "stream_id": change.stream_id}
+                    if change.stream_id
+                    else message
+                )
+
+                # Keep a reference to the message so its id can't be reused.
+                prepared[id(message)] = (message, key, encoded)
 
-        logger.debug("Dispatcher sent messages for %s", change.target)
+            if key is None or connection.is_subscribed(change.interface, key[2]):
+                connection.enqueue(encoded, key)
+
+        logger.debug("Dispatcher queued messages for %s", change.target)
 
     async def close(self):
         """
@@ -185,7 +426,11 @@ class Dispatcher:
         """
         logger.debug("Closing dispatcher")
 
+        for task in self._deferred.values():
+            task.cancel()
+
         for connection in self._connections:
+            connection.stop()
             await connection.close(1001)
 
         logger.debug("Closed dispatcher")
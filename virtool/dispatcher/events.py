@@ -5,6 +5,7 @@ from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
 
 from virtool.dispatcher.operations import Operation
+from virtool.labels.db import clear_label_caches
 from virtool.pg.base import Base
 
 
@@ -32,6 +33,8 @@ class DispatcherSQLEvents:
     Calls enqueue change with the correct dispatcher interface and list of modified IDs when a
     transaction is committed. Gracefully handles rollbacks.
 
+    Clears the label caches when a change to a label is committed.
+
     Inspired by signalling in [Flask-SQLAlchemy](https://github.com/pallets/flask-sqlalchemy).
 
     """
@@ -61,6 +64,10 @@ class DispatcherSQLEvents:
 
         for data, change_type in changes:
             interface = get_interface_from_model(data)
+
+            if interface == "labels":
+                clear_label_caches()
+
             self._enqueue_change(interface, change_type, [data.id])
 
         del self._changes[id(session)]
@@ -2,7 +2,6 @@
 Fetchers provide a get() method
 """
 from abc import ABC, abstractmethod
-from asyncio import gather
 from typing import Any, AsyncIterable, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
@@ -123,7 +122,8 @@ class IndexesFetcher(AbstractFetcher):
         """
         Prepare index websocket message-connection pairs for dispatch.
 
-        Calls indexes processor to add additional fields to the outgoing message.
+        Processes the indexes together to add additional fields to the outgoing
+        messages.
 
         :param change: the change triggering the dispatch
         :param connections: the current authenticated connections in the dispatcher
@@ -133,17 +133,17 @@ class IndexesFetcher(AbstractFetcher):
             {"_id": {"$in": change.id_list}}, projection=virtool.indexes.db.PROJECTION
         ).to_list(None)
 
-        documents = await gather(
-            *[virtool.indexes.db.processor(self._db, d) for d in documents]
-        )
+        documents = await virtool.indexes.db.process_many(self._db, documents)
 
         for document in documents:
+            message = {
+                "interface": change.interface,
+                "operation": change.operation,
+                "data": document,
+            }
+
             for connection in connections:
-                yield connection, {
-                    "interface": change.interface,
-                    "operation": change.operation,
-                    "data": document,
-                }
+                yield connection, message
 
 
 class LabelsFetcher(AbstractFetcher):
@@ -170,12 +170,14 @@ class LabelsFetcher(AbstractFetcher):
         records = await apply_transforms(records, [SampleCountTransform(self._db)])
 
         for record in records:
+            message = {
+                "interface": change.interface,
+                "operation": change.operation,
+                "data": record,
+            }
+
             for connection in connections:
-                yield connection, {
-                    "interface": change.interface,
-                    "operation": change.operation,
-                    "data": record,
-                }
+                yield connection, message
 
 
 class ReferencesFetcher(AbstractFetcher):
@@ -199,23 +201,35 @@ class ReferencesFetcher(AbstractFetcher):
             projection=virtool.references.db.PROJECTION,
         ).to_list(None)
 
-        documents = await gather(
-            *[virtool.references.db.processor(self._db, d) for d in documents]
-        )
+        eligible = []
 
         for document in documents:
             user_ids = {user["id"] for user in document["users"]}
             group_ids = {group["id"] for group in document["groups"]}
 
-            for connection in connections:
-                if connection.user_id in user_ids or set(connection.groups).union(
-                    set(group_ids)
-                ):
-                    yield connection, {
-                        "interface": change.interface,
-                        "operation": change.operation,
-                        "data": document,
-                    }
+            document_connections = [
+                connection
+                for connection in connections
+                if connection.user_id in user_ids
+                or set(connection.groups).union(set(group_ids))
+            ]
+
+            if document_connections:
+                eligible.append((document, document_connections))
+
+        documents = await virtool.references.db.process_many(
+            self._db, [document for document, _ in eligible]
+        )
+
+        for document, (_, document_connections) in zip(documents, eligible):
+            message = {
+                "interface": change.interface,
+                "operation": change.operation,
+                "data": document,
+            }
+
+            for connection in document_connections:
+                yield connection, message
 
 
 class SamplesFetcher(AbstractFetcher):
@@ -224,10 +238,20 @@ class SamplesFetcher(AbstractFetcher):
         self._db = db
 
     async def prepare(self, change: Change, connections: List[Connection]):
+        user_ids = [connection.user_id for connection in connections]
+        groups = list({group for c in connections for group in c.groups})
+
         documents = await self._db.samples.find(
-            {"_id": {"$in": change.id_list}}, projection=virtool.samples.db.PROJECTION
+            {
+                "_id": {"$in": change.id_list},
+                "$or": [{"user.id": {"$in": user_ids}}, {"group": {"$in": groups}}],
+            },
+            projection=virtool.samples.db.PROJECTION,
         ).to_list(None)
 
+        if not documents:
+            return
+
         documents = [base_processor(document) for document in documents]
 
         documents = await apply_transforms(
@@ -238,13 +262,15 @@ class SamplesFetcher(AbstractFetcher):
             user = document["user"]["id"]
             group = document["group"]
 
+            message = {
+                "interface": change.interface,
+                "operation": change.operation,
+                "data": base_processor(document),
+            }
+
             for connection in connections:
                 if connection.user_id == user or group in connection.groups:
-                    yield connection, {
-                        "interface": change.interface,
-                        "operation": change.operation,
-                        "data": base_processor(document),
-                    }
+                    yield connection, message
 
 
 class UploadsFetcher(AbstractFetcher):
@@ -276,19 +302,21 @@ class UploadsFetcher(AbstractFetcher):
         )
 
         for record in records:
+            if record["removed"]:
+                message = {
+                    "interface": change.interface,
+                    "operation": DELETE,
+                    "data": change.id_list,
+                }
+            else:
+                message = {
+                    "interface": change.interface,
+                    "operation": change.operation,
+                    "data": record,
+                }
+
             for connection in connections:
-                if record["removed"]:
-                    yield connection, {
-                        "interface": change.interface,
-                        "operation": DELETE,
-                        "data": change.id_list,
-                    }
-                else:
-                    yield connection, {
-                        "interface": change.interface,
-                        "operation": change.operation,
-                        "data": record,
-                    }
+                yield connection, message
 
 
 class TasksFetcher(AbstractFetcher):
@@ -312,9 +340,11 @@ class TasksFetcher(AbstractFetcher):
         records = [object_as_dict(r) for r in result.scalars()]
 
         for record in records:
+            message = {
+                "interface": change.interface,
+                "operation": change.operation,
+                "data": record,
+            }
+
             for connection in connections:
-                yield connection, {
-                    "interface": change.interface,
-                    "operation": change.operation,
-                    "data": record,
-                }
+                yield connection, message
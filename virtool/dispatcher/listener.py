@@ -1,10 +1,24 @@
 import asyncio
+import json
 import sys
-from typing import AsyncIterable, AsyncGenerator
+from collections import deque
+from typing import (
+    AsyncIterable,
+    AsyncGenerator,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from aioredis import Channel, ChannelClosedError, Redis
+from aioredis import Channel, ChannelClosedError, Redis, RedisError, ReplyError
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure, PyMongoError
 
 from virtool.dispatcher.change import Change
+from virtool.dispatcher.operations import DELETE, INSERT, UPDATE
 
 from virtool_core.redis import resubscribe
 
@@ -12,6 +26,27 @@ from logging import getLogger
 
 logger = getLogger(__name__)
 
+#: The number of milliseconds a stream read blocks for while waiting for changes.
+STREAM_BLOCK_MS = 5000
+
+#: The maximum number of changes to read from a stream at once.
+STREAM_READ_COUNT = 100
+
+#: The dispatch operations for the MongoDB change stream events that are dispatched.
+CHANGE_STREAM_OPERATIONS = {
+    "insert": INSERT,
+    "update": UPDATE,
+    "replace": UPDATE,
+    "delete": DELETE,
+}
+
+#: The maximum number of change stream events to read at once.
+CHANGE_STREAM_READ_COUNT = 100
+
+#: The collections that are written in bulk when a reference is imported, cloned,
+#: installed or updated.
+REFERENCE_BULK_COLLECTIONS = ["history", "otus", "sequences"]
+
 
 class RedisDispatcherListener(AsyncIterable):
     """
@@ -50,3 +85,475 @@ class RedisDispatcherListener(AsyncIterable):
                     sys.exit(1)
             except TypeError:
                 pass
+
+    async def read_since(self, stream_id: str) -> Optional[List[Change]]:
+        """
+        Pub/Sub messages are not retained, so changes can't be read again.
+
+        :param stream_id: the ID of the last change the caller received
+        :return: ``None``
+
+        """
+        return None
+
+
+def parse_stream_id(stream_id: str) -> Tuple[int, int]:
+    """
+    Parse a Redis stream entry ID into a tuple that can be compared with others.
+
+    :param stream_id: the entry ID (eg. ``1526919030474-55``)
+    :return: the millisecond time and sequence number of the entry
+    """
+    milliseconds, _, sequence = stream_id.partition("-")
+    return int(milliseconds), int(sequence or 0)
+
+
+class RedisStreamDispatcherListener(AsyncIterable):
+    """
+    Asynchronously iterates through changes added to a Redis stream, returning
+    :class:`.Change` objects.
+
+    Changes are read through a consumer group, so changes added while the listener is
+    disconnected are read once it reconnects. A change is acknowledged when the next
+    change is requested, so changes that were being dispatched when the process
+    stopped are read again on restart.
+
+    Every change is delivered to only one consumer in a group. Each API instance needs
+    its own ``group_name`` to receive all changes.
+
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        stream_name: str,
+        group_name: str,
+        consumer_name: str = "dispatcher",
+    ):
+        self._redis = redis
+        self._stream_name = stream_name
+        self._group_name = group_name
+        self._consumer_name = consumer_name
+        self._buffer = deque()
+        self._group_created = False
+        self._unacknowledged: Optional[str] = None
+
+        # Read entries left pending by a previous run first, then new entries.
+        self._latest_id = "0"
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Change:
+        """
+        Get the next change from the stream.
+
+        :return: the change derived from the stream entry
+
+        """
+        if self._unacknowledged:
+            try:
+                await self._redis.xack(
+                    self._stream_name, self._group_name, self._unacknowledged
+                )
+            except (OSError, RedisError) as err:
+                logger.warning("Could not acknowledge dispatch stream entry: %s", err)
+
+            self._unacknowledged = None
+
+        while not self._buffer:
+            await self._read()
+
+        change = self._buffer.popleft()
+        self._unacknowledged = change.stream_id
+
+        return change
+
+    async def _read(self):
+        try:
+            if not self._group_created:
+                await self._create_group()
+
+            with await self._redis as conn:
+                entries = await conn.xread_group(
+                    self._group_name,
+                    self._consumer_name,
+                    [self._stream_name],
+                    timeout=STREAM_BLOCK_MS,
+                    count=STREAM_READ_COUNT,
+                    latest_ids=[self._latest_id],
+                )
+        except ReplyError as err:
+            if "NOGROUP" not in str(err):
+                raise
+
+            logger.warning("Dispatch stream group is missing. Recreating it.")
+            self._group_created = False
+            return
+        except (OSError, RedisError) as err:
+            logger.warning("Could not read dispatch stream: %s", err)
+            await asyncio.sleep(1)
+            return
+
+        if not entries and self._latest_id == "0":
+            self._latest_id = ">"
+
+        malformed = []
+
+        for _, stream_id, fields in entries:
+            stream_id = decode_redis_value(stream_id)
+            change = parse_stream_entry(stream_id, fields)
+
+            if change:
+                self._buffer.append(change)
+            else:
+                malformed.append(stream_id)
+
+        if malformed:
+            try:
+                await self._redis.xack(self._stream_name, self._group_name, *malformed)
+            except (OSError, RedisError) as err:
+                logger.warning("Could not acknowledge dispatch stream entry: %s", err)
+
+    async def _create_group(self):
+        try:
+            await self._redis.xgroup_create(
+                self._stream_name, self._group_name, latest_id="$", mkstream=True
+            )
+        except ReplyError as err:
+            if "BUSYGROUP" not in str(err):
+                raise
+
+        self._group_created = True
+
+    async def read_since(self, stream_id: str) -> Optional[List[Change]]:
+        """
+        Read all the changes added to the stream after the entry with ``stream_id``.
+
+        Returns ``None`` if entries after ``stream_id`` have been removed from the
+        stream and the complete set of changes can't be read.
+
+        :param stream_id: the ID of the last change the caller received
+        :return: the changes or ``None``
+
+        """
+        try:
+            after = parse_stream_id(stream_id)
+        except ValueError:
+            return None
+
+        first = await self._redis.xrange(self._stream_name, count=1)
+
+        if not first:
+            return []
+
+        # The entry with ``stream_id`` and possibly some after it have been trimmed.
+        if parse_stream_id(decode_redis_value(first[0][0])) > after:
+            return None
+
+        changes = []
+
+        for entry_id, fields in await self._redis.xrange(
+            self._stream_name, start=stream_id
+        ):
+            entry_id = decode_redis_value(entry_id)
+
+            if parse_stream_id(entry_id) > after:
+                change = parse_stream_entry(entry_id, fields)
+
+                if change:
+                    changes.append(change)
+
+        return changes
+
+
+def decode_redis_value(value: Union[bytes, str]) -> str:
+    """
+    Decode a value returned by Redis if the connection doesn't decode responses.
+
+    :param value: the value
+    :return: the value as a string
+    """
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def parse_stream_entry(stream_id: str, fields: Optional[dict]) -> Optional[Change]:
+    """
+    Parse a dispatch stream entry into a :class:`.Change`.
+
+    :param stream_id: the ID of the entry
+    :param fields: the fields of the entry
+    :return: the change or ``None`` if the entry is malformed
+    """
+    fields = {
+        decode_redis_value(key): decode_redis_value(value)
+        for key, value in (fields or {}).items()
+    }
+
+    try:
+        change = json.loads(fields["change"])
+
+        return Change(
+            change["interface"],
+            change["operation"],
+            change["id_list"],
+            stream_id=stream_id,
+        )
+    except (KeyError, TypeError, ValueError):
+        logger.warning("Ignored malformed dispatch stream entry: %s", stream_id)
+
+    return None
+
+
+class MongoChangeStreamDispatcherListener(AsyncIterable):
+    """
+    Asynchronously iterates through the MongoDB change stream events for the
+    collections named in ``collection_names``, returning :class:`.Change` objects.
+
+    Every write to the collections is seen, including writes that are not made
+    through :class:`~virtool.mongo.core.Collection`. The collection names are used as
+    the change interfaces. Change streams are only available when MongoDB is run as a
+    replica set.
+
+    Events that are available together are read at once, and consecutive events with
+    the same collection and operation are combined into one change.
+
+    Writes that are made silently through :class:`~virtool.mongo.core.Collection` are
+    also seen. The bulk writes made while a reference is processing or updating are
+    not dispatched, nor are the history relabels made when an index is built.
+
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, collection_names: Sequence[str]):
+        self._db = db
+        self._collection_names = list(collection_names)
+        self._buffer = deque()
+        self._resume_token: Optional[dict] = None
+        self._stream = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Change:
+        """
+        Get the next change from the change stream.
+
+        :return: the change derived from one or more change stream events
+
+        """
+        while not self._buffer:
+            await self._read()
+
+        return self._buffer.popleft()
+
+    async def _read(self):
+        try:
+            if self._stream is None:
+                self._stream = self._db.watch(
+                    [
+                        {
+                            "$match": {
+                                "ns.coll": {"$in": self._collection_names},
+                                "operationType": {
+                                    "$in": list(CHANGE_STREAM_OPERATIONS)
+                                },
+                                "$nor": [
+                                    {
+                                        "ns.coll": "history",
+                                        "updateDescription.updatedFields.index": {
+                                            "$exists": True
+                                        },
+                                    }
+                                ],
+                            }
+                        },
+                        {
+                            "$project": {
+                                "documentKey": True,
+                                "fullDocument.reference.id": True,
+                                "ns": True,
+                                "operationType": True,
+                            }
+                        },
+                    ],
+                    resume_after=self._resume_token,
+                )
+
+            events = [await self._stream.next()]
+
+            while len(events) < CHANGE_STREAM_READ_COUNT:
+                event = await self._stream.try_next()
+
+                if event is None:
+                    break
+
+                events.append(event)
+
+            events = await self._drop_reference_bulk_events(events)
+        except PyMongoError as err:
+            if isinstance(err, OperationFailure) and self._resume_token:
+                logger.warning(
+                    "Could not resume change stream. Some changes were not dispatched."
+                )
+                self._resume_token = None
+            else:
+                logger.warning("Could not read change stream: %s", err)
+
+            await self._close_stream()
+            await asyncio.sleep(1)
+
+            return
+
+        self._resume_token = self._stream.resume_token
+        self._buffer.extend(group_change_events(events))
+
+    async def _drop_reference_bulk_events(self, events: List[dict]) -> List[dict]:
+        """
+        Drop the events for documents inserted in bulk for references that are
+        processing or updating.
+
+        :param events: the change stream events
+        :return: the events that should be dispatched
+
+        """
+        if not any(get_event_ref_id(event) for event in events):
+            return events
+
+        ref_ids = set(
+            await self._db.references.distinct(
+                "_id", {"$or": [{"processing": True}, {"updating": True}]}
+            )
+        )
+
+        return [event for event in events if get_event_ref_id(event) not in ref_ids]
+
+    async def _close_stream(self):
+        if self._stream is not None:
+            try:
+                await self._stream.close()
+            except PyMongoError:
+                pass
+
+            self._stream = None
+
+    async def read_since(self, stream_id: str) -> Optional[List[Change]]:
+        """
+        Change stream events are not read again, so changes can't be replayed.
+
+        :param stream_id: the ID of the last change the caller received
+        :return: ``None``
+
+        """
+        return None
+
+
+def get_event_ref_id(event: dict) -> Optional[str]:
+    """
+    Get the ID of the reference a change stream event belongs to.
+
+    Only events for documents inserted or replaced in the collections that are written
+    in bulk for references have a reference ID.
+
+    :param event: the change stream event
+    :return: the reference ID or ``None``
+
+    """
+    if event["ns"]["coll"] not in REFERENCE_BULK_COLLECTIONS:
+        return None
+
+    try:
+        return event["fullDocument"]["reference"]["id"]
+    except (KeyError, TypeError):
+        return None
+
+
+def group_change_events(events: Sequence[dict]) -> List[Change]:
+    """
+    Convert MongoDB change stream events into :class:`.Change` objects.
+
+    Consecutive events with the same collection and operation are combined into one
+    change, so changes are still dispatched in the order they were made.
+
+    :param events: the change stream events
+    :return: the changes
+
+    """
+    changes = []
+
+    for event in events:
+        interface = event["ns"]["coll"]
+        operation = CHANGE_STREAM_OPERATIONS[event["operationType"]]
+        id_ = event["documentKey"]["_id"]
+
+        if changes and (changes[-1].interface, changes[-1].operation) == (
+            interface,
+            operation,
+        ):
+            if id_ not in changes[-1].id_list:
+                changes[-1].id_list.append(id_)
+        else:
+            changes.append(Change(interface, operation, [id_]))
+
+    return changes
+
+
+class MergedDispatcherListener(AsyncIterable):
+    """
+    Asynchronously iterates through the changes from several listeners in the order
+    they are received.
+
+    """
+
+    def __init__(self, *listeners: AsyncIterable):
+        self._listeners = listeners
+        self._pending: Dict[asyncio.Task, AsyncIterable] = {}
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Change:
+        """
+        Get the next change from any of the listeners.
+
+        :return: the change
+
+        """
+        if not self._pending:
+            for listener in self._listeners:
+                self._pending[asyncio.create_task(listener.__anext__())] = listener
+
+        while self._pending:
+            try:
+                done, _ = await asyncio.wait(
+                    self._pending, return_when=asyncio.FIRST_COMPLETED
+                )
+            except asyncio.CancelledError:
+                for task in self._pending:
+                    task.cancel()
+
+                raise
+
+            task = next(task for task in self._pending if task in done)
+            listener = self._pending.pop(task)
+
+            try:
+                change = task.result()
+            except StopAsyncIteration:
+                continue
+
+            self._pending[asyncio.create_task(listener.__anext__())] = listener
+
+            return change
+
+        raise StopAsyncIteration
+
+    async def read_since(self, stream_id: str) -> Optional[List[Change]]:
+        """
+        Changes from several listeners can't be replayed in the order they were
+        received.
+
+        :param stream_id: the ID of the last change the caller received
+        :return: ``None``
+
+        """
+        return None
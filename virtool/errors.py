@@ -20,3 +20,7 @@ class ProxyError(Exception):
 
 class PolicyError(Exception):
     ...
+
+
+class InvalidCursorError(Exception):
+    pass
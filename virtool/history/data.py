@@ -93,5 +93,11 @@ class HistoryData:
                 )
 
             await self._db.history.delete_many({"_id": {"$in": history_to_delete}})
+
+            # Keyframes share IDs with the changes they were created for.
+            await self._db.keyframes.delete_many({"_id": {"$in": history_to_delete}})
+
+            # Reverted versions will be reused by later changes to the OTU.
+            await self._db.snapshots.invalidate(otu_id)
         except DatabaseError:
             raise ResourceConflictError()
@@ -2,9 +2,11 @@
 Work with OTU history in the database.
 
 """
+import asyncio
+import datetime
 from copy import deepcopy
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import dictdiffer
 import pymongo.errors
@@ -17,13 +19,14 @@ import virtool.otus.db
 import virtool.utils
 from virtool.api.utils import paginate
 from virtool.history.utils import (
-    calculate_diff,
-    derive_otu_information,
+    check_document_too_large,
+    compose_change_document,
     write_diff_file,
 )
 from virtool.mongo.transforms import AbstractTransform, apply_transforms
 from virtool.types import Document
 from virtool.users.db import ATTACH_PROJECTION, AttachUserTransform
+from virtool.utils import run_in_thread
 
 MOST_RECENT_PROJECTION = [
     "_id",
@@ -47,6 +50,10 @@ LIST_PROJECTION = [
 
 PROJECTION = LIST_PROJECTION + ["diff"]
 
+#: A keyframe containing the complete joined OTU is stored every time the OTU version
+#: reaches a multiple of this value.
+KEYFRAME_INTERVAL = 20
+
 
 class DiffTransform(AbstractTransform):
     def __init__(self, data_path: Path):
@@ -106,27 +113,12 @@ async def add(
     """
     db = app["db"]
 
-    otu_id, otu_name, otu_version, ref_id = derive_otu_information(old, new)
-
-    document = {
-        "_id": ".".join([str(otu_id), str(otu_version)]),
-        "method_name": method_name.value,
-        "description": description,
-        "created_at": virtool.utils.timestamp(),
-        "otu": {"id": otu_id, "name": otu_name, "version": otu_version},
-        "reference": {"id": ref_id},
-        "index": {"id": "unbuilt", "version": "unbuilt"},
-        "user": {"id": user_id},
-    }
-
-    if method_name.value == "create":
-        document["diff"] = new
-
-    elif method_name.value == "remove":
-        document["diff"] = old
+    document = compose_change_document(
+        method_name.value, old, new, description, user_id, virtool.utils.timestamp()
+    )
 
-    else:
-        document["diff"] = calculate_diff(old, new)
+    otu_id = document["otu"]["id"]
+    otu_version = document["otu"]["version"]
 
     try:
         await db.history.insert_one(document, silent=silent, session=session)
@@ -139,6 +131,145 @@ async def add(
             dict(document, diff="file"), silent=silent, session=session
         )
 
+    if check_keyframe_version(otu_version):
+        await add_keyframe(db, new, session=session)
+
+    return document
+
+
+async def add_many(
+    app,
+    method_name: HistoryMethod,
+    changes: Sequence[Tuple[Optional[dict], Optional[dict], str]],
+    user_id: str,
+    silent: bool = False,
+    session: Optional[AsyncIOMotorClientSession] = None,
+) -> List[dict]:
+    """
+    Add change documents for many OTUs in a single bulk operation.
+
+    Use this instead of :func:`add` when the joined OTU documents are already in memory,
+    such as when importing or updating a whole reference. The change documents and their
+    diffs are composed in a worker thread. Diffs that are too large to store in the
+    database are written to diff files.
+
+    :param app: the application object
+    :param method_name: the name of the handler method that executed the changes
+    :param changes: the old joined OTU, new joined OTU, and description for each change
+    :param user_id: the id of the requesting user
+    :param silent: don't dispatch a message
+    :param session: a Motor session to use for database operations
+    :return: the change documents
+
+    """
+    if not changes:
+        return []
+
+    db = app["db"]
+
+    documents, oversized = await run_in_thread(
+        compose_change_documents,
+        method_name.value,
+        changes,
+        user_id,
+        virtool.utils.timestamp(),
+    )
+
+    await asyncio.gather(
+        *[
+            write_diff_file(
+                app["config"].data_path,
+                document["otu"]["id"],
+                document["otu"]["version"],
+                document["diff"],
+            )
+            for document in oversized
+        ]
+    )
+
+    for document in oversized:
+        document["diff"] = "file"
+
+    await db.history.insert_many(documents, silent=silent, session=session)
+
+    for document, (_, new, _) in zip(documents, changes):
+        if check_keyframe_version(document["otu"]["version"]):
+            await add_keyframe(db, new, session=session)
+
+    return documents
+
+
+def compose_change_documents(
+    method_name: str,
+    changes: Sequence[Tuple[Optional[dict], Optional[dict], str]],
+    user_id: str,
+    created_at: datetime.datetime,
+) -> Tuple[List[Document], List[Document]]:
+    """
+    Compose change documents for :func:`add_many`.
+
+    :param method_name: the name of the handler method that executed the changes
+    :param changes: the old joined OTU, new joined OTU, and description for each change
+    :param user_id: the id of the requesting user
+    :param created_at: the timestamp for the changes
+    :return: all change documents and the change documents too large to store
+
+    """
+    documents = [
+        compose_change_document(method_name, old, new, description, user_id, created_at)
+        for old, new, description in changes
+    ]
+
+    return documents, [d for d in documents if check_document_too_large(d)]
+
+
+def check_keyframe_version(otu_version: Union[int, str]) -> bool:
+    """
+    Check if a keyframe should be stored for an OTU that has reached ``otu_version``.
+
+    :param otu_version: the version of the OTU after a change
+    :return: whether a keyframe should be stored
+
+    """
+    return (
+        isinstance(otu_version, int)
+        and otu_version > 0
+        and otu_version % KEYFRAME_INTERVAL == 0
+    )
+
+
+async def add_keyframe(
+    db, joined: Document, session: Optional[AsyncIOMotorClientSession] = None
+) -> Optional[Document]:
+    """
+    Store a complete copy of a joined otu at its current version.
+
+    Keyframes allow :func:`patch_to_version` to start patching from a nearby version
+    instead of from the current otu. Keyframes that are too large to store are skipped.
+
+    :param db: the application database client
+    :param joined: the joined otu to store
+    :param session: a Motor session to use for database operations
+    :return: the keyframe document
+
+    """
+    otu_id = joined["_id"]
+    otu_version = joined["version"]
+
+    document = {
+        "_id": f"{otu_id}.{otu_version}",
+        "otu": {"id": otu_id, "version": otu_version},
+        "reference": {"id": joined["reference"]["id"]},
+        "joined": joined,
+    }
+
+    try:
+        await db.keyframes.replace_one(
+            {"_id": document["_id"]}, document, upsert=True, session=session
+        )
+    except pymongo.errors.DocumentTooLarge:
+        return None
+
     return document
 
 
@@ -254,31 +385,135 @@ async def patch_to_version(
     if "version" in current and current["version"] == version:
         return current, deepcopy(current), reverted_history_ids
 
-    patched = deepcopy(current)
+    keyframe = await get_nearest_keyframe(db, otu_id, version)
+
+    if keyframe is None:
+        patched = deepcopy(current)
+
+        # Sort the changes by descending timestamp.
+        async for change in db.history.find(
+            {"otu.id": otu_id}, sort=[("otu.version", -1)]
+        ):
+            if (
+                change["otu"]["version"] == "removed"
+                or change["otu"]["version"] > version
+            ):
+                reverted_history_ids.append(change["_id"])
+                patched = await revert_change(data_path, change, patched)
+            else:
+                break
+    else:
+        patched = keyframe["joined"]
+
+        reverted_history_ids = [
+            change["_id"]
+            async for change in db.history.find(
+                {
+                    "otu.id": otu_id,
+                    "$or": [
+                        {"otu.version": "removed"},
+                        {"otu.version": {"$gt": version}},
+                    ],
+                },
+                ["_id"],
+                sort=[("otu.version", -1)],
+            )
+        ]
+
+        # Only the changes between the requested version and the keyframe need to be
+        # reverted.
+        async for change in db.history.find(
+            {
+                "otu.id": otu_id,
+                "otu.version": {"$gt": version, "$lte": keyframe["otu"]["version"]},
+            },
+            sort=[("otu.version", -1)],
+        ):
+            patched = await revert_change(data_path, change, patched)
 
-    # Sort the changes by descending timestamp.
-    async for change in db.history.find({"otu.id": otu_id}, sort=[("otu.version", -1)]):
-        if change["otu"]["version"] == "removed" or change["otu"]["version"] > version:
-            reverted_history_ids.append(change["_id"])
+    if current == {}:
+        current = None
 
-            if change["diff"] == "file":
-                change["diff"] = await virtool.history.utils.read_diff_file(
-                    data_path, otu_id, change["otu"]["version"]
-                )
+    return current, patched, reverted_history_ids
 
-            if change["method_name"] == "remove":
-                patched = change["diff"]
 
-            elif change["method_name"] == "create":
-                patched = None
+async def get_nearest_keyframe(
+    db, otu_id: str, version: Union[str, int]
+) -> Optional[Document]:
+    """
+    Get the keyframe with the lowest version greater than or equal to ``version`` for
+    the otu identified by ``otu_id``.
 
-            else:
-                diff = dictdiffer.swap(change["diff"])
-                patched = dictdiffer.patch(diff, patched)
-        else:
-            break
+    Returns ``None`` if there is no such keyframe.
 
-    if current == {}:
-        current = None
+    :param db: the application database client
+    :param otu_id: the id of the otu
+    :param version: the version the otu will be patched to
+    :return: the keyframe document
 
-    return current, patched, reverted_history_ids
+    """
+    return await db.keyframes.find_one(
+        {"otu.id": otu_id, "otu.version": {"$gte": version}},
+        sort=[("otu.version", 1)],
+    )
+
+
+async def revert_change(
+    data_path: Path, change: Document, patched: Optional[Document]
+) -> Optional[Document]:
+    """
+    Reverse-apply a single change to a joined otu.
+
+    :param data_path: the data path
+    :param change: the change document to revert
+    :param patched: the joined otu at the version of the change
+    :return: the joined otu at the version prior to the change
+
+    """
+    if change["diff"] == "file":
+        change["diff"] = await virtool.history.utils.read_diff_file(
+            data_path, change["otu"]["id"], change["otu"]["version"]
+        )
+
+    if change["method_name"] == "remove":
+        return change["diff"]
+
+    if change["method_name"] == "create":
+        return None
+
+    return dictdiffer.patch(dictdiffer.swap(change["diff"]), patched)
+
+
+async def get_patched_otu(
+    data_path: Path, db, otu_id: str, version: Union[str, int]
+) -> Optional[Document]:
+    """
+    Get a joined otu patched to the passed ``version``.
+
+    Patched otus are served from the snapshot cache for the ``data_path`` when
+    possible. Otherwise, the otu is patched using :func:`patch_to_version` and the
+    result is stored in the cache for next time.
+
+    Use :func:`patch_to_version` directly if the current otu or the ids of the reverted
+    changes are also required.
+
+    :param data_path: the data path
+    :param db: the database object
+    :param otu_id: the id of the otu to patch
+    :param version: the version to patch to
+    :return: the patched otu
+
+    """
+    if patched := await db.snapshots.get(otu_id, version):
+        return patched
+
+    _, patched, reverted_history_ids = await patch_to_version(
+        data_path, db, otu_id, version
+    )
+
+    # Only store otus that were actually patched to the requested version. The current
+    # otu is cheap to join and can still change.
+    if reverted_history_ids and patched and patched.get("version") == version:
+        await db.snapshots.set(otu_id, version, patched)
+
+    return patched
@@ -0,0 +1,256 @@
+"""
+Store joined OTUs that have been patched back to a previous version.
+
+Patching an OTU to a previous version requires the current OTU to be joined and every
+later change to be reverse-applied. Once a version exists in history, its content
+never changes unless the history of the OTU is reverted, so patched OTUs can be safely
+computed once and reused.
+
+"""
+import glob
+import json
+import os
+from collections import OrderedDict
+from copy import deepcopy
+from pathlib import Path
+from typing import Iterable, Optional, Tuple, Union
+
+import aiofiles
+
+from virtool.history.utils import json_encoder, json_object_hook
+from virtool.types import Document
+from virtool.utils import random_alphanumeric, run_in_thread
+
+#: The maximum number of patched OTUs to keep in memory.
+MAX_SNAPSHOTS = 500
+
+#: The maximum number of snapshot files to keep on disk.
+MAX_SNAPSHOT_FILES = 20000
+
+
+class OTUSnapshotCache:
+    """
+    An LRU-bounded, versioned store of patched OTUs keyed by OTU ID and version.
+
+    Recently used snapshots are kept in memory. Snapshots are also written to JSON
+    files in ``path`` so they survive eviction and application restarts. When there
+    are more than ``max_files`` files, the oldest are removed.
+
+    The files are shared by all processes using ``path`` and are replaced rather than
+    rewritten. A snapshot held in memory is only used while its file is unchanged, so
+    snapshots invalidated or replaced by another process are never served.
+
+    Documents are copied when stored and when retrieved, so callers are free to
+    mutate them.
+
+    If ``path`` is ``None``, no snapshots are stored.
+
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path],
+        max_size: int = MAX_SNAPSHOTS,
+        max_files: int = MAX_SNAPSHOT_FILES,
+    ):
+        self._path = path
+        self._max_size = max_size
+        self._max_files = max_files
+        self._file_count: Optional[int] = None
+
+        #: Snapshots and the identities of the files they were read from.
+        self._snapshots: "OrderedDict[Tuple[str, int], Tuple[tuple, Document]]" = (
+            OrderedDict()
+        )
+
+    def __contains__(self, key: Tuple[str, int]) -> bool:
+        return key in self._snapshots
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def join_path(self, otu_id: str, version: Union[int, str]) -> Path:
+        """
+        Derive the path to the snapshot file for the passed OTU ID and version.
+
+        :param otu_id: the ID of the OTU
+        :param version: the version of the OTU
+        :return: the snapshot file path
+
+        """
+        return self._path / f"{otu_id}_{version}.json"
+
+    async def get(self, otu_id: str, version: int) -> Optional[Document]:
+        """
+        Get the snapshot of the OTU identified by ``otu_id`` at ``version``.
+
+        The snapshot is loaded from disk if it is not held in memory. Returns ``None``
+        if no snapshot exists.
+
+        :param otu_id: the ID of the OTU
+        :param version: the version of the OTU
+        :return: the patched OTU
+
+        """
+        if self._path is None:
+            return None
+
+        key = (otu_id, version)
+        path = self.join_path(otu_id, version)
+
+        try:
+            file_id = await run_in_thread(get_file_id, path)
+        except FileNotFoundError:
+            self._snapshots.pop(key, None)
+            return None
+
+        try:
+            remembered_file_id, snapshot = self._snapshots[key]
+        except KeyError:
+            pass
+        else:
+            if remembered_file_id == file_id:
+                self._snapshots.move_to_end(key)
+                return deepcopy(snapshot)
+
+        try:
+            async with aiofiles.open(path, "r") as f:
+                snapshot = json.loads(await f.read(), object_hook=json_object_hook)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        self._remember(key, file_id, snapshot)
+
+        return deepcopy(snapshot)
+
+    async def set(self, otu_id: str, version: int, patched: Document):
+        """
+        Store ``patched`` as the snapshot of the OTU identified by ``otu_id`` at
+        ``version``.
+
+        :param otu_id: the ID of the OTU
+        :param version: the version of the OTU
+        :param patched: the OTU patched to ``version``
+
+        """
+        if self._path is None:
+            return
+
+        snapshot = deepcopy(patched)
+        path = self.join_path(otu_id, version)
+
+        await run_in_thread(self._path.mkdir, parents=True, exist_ok=True)
+
+        temp_path = path.with_name(f"{path.name}.{random_alphanumeric(8)}.tmp")
+
+        async with aiofiles.open(temp_path, "w") as f:
+            await f.write(json.dumps(snapshot, default=json_encoder))
+
+        await run_in_thread(os.replace, temp_path, path)
+
+        self._remember(
+            (otu_id, version), await run_in_thread(get_file_id, path), snapshot
+        )
+
+        await run_in_thread(self._limit_files)
+
+    async def invalidate(self, otu_id: str):
+        """
+        Remove all snapshots of the OTU identified by ``otu_id``.
+
+        This must be called whenever history for the OTU is removed or rewritten.
+
+        :param otu_id: the ID of the OTU
+
+        """
+        await self.invalidate_many([otu_id])
+
+    async def invalidate_many(self, otu_ids: Iterable[str]):
+        """
+        Remove all snapshots of the OTUs identified by ``otu_ids``.
+
+        :param otu_ids: the IDs of the OTUs
+
+        """
+        otu_ids = set(otu_ids)
+
+        if self._path is None or not otu_ids:
+            return
+
+        for key in [key for key in self._snapshots if key[0] in otu_ids]:
+            del self._snapshots[key]
+
+        await run_in_thread(self._remove_files, otu_ids)
+
+    def _remember(self, key: Tuple[str, int], file_id: tuple, snapshot: Document):
+        self._snapshots[key] = (file_id, snapshot)
+        self._snapshots.move_to_end(key)
+
+        while len(self._snapshots) > self._max_size:
+            self._snapshots.popitem(last=False)
+
+    def _limit_files(self):
+        """
+        Remove the oldest snapshot files if there are more than ``max_files``.
+
+        The files are only listed when the number of files written since they were
+        last listed could exceed the limit.
+
+        """
+        if self._file_count is not None and self._file_count < self._max_files:
+            self._file_count += 1
+            return
+
+        paths = sorted(self._path.glob("*.json"), key=get_mtime)
+
+        # Remove a tenth more than necessary, so the files aren't listed on every
+        # write once the limit is reached.
+        excess = max(0, len(paths) - int(self._max_files * 0.9))
+
+        if len(paths) <= self._max_files:
+            excess = 0
+
+        for path in paths[:excess]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        self._file_count = len(paths) - excess
+
+    def _remove_files(self, otu_ids: set):
+        for otu_id in otu_ids:
+            # The pattern also matches OTU IDs that start with ``otu_id`` and an
+            # underscore, so the ID is checked exactly.
+            for path in self._path.glob(f"{glob.escape(otu_id)}_*.json"):
+                if path.stem.rpartition("_")[0] == otu_id:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+
+def get_file_id(path: Path) -> Tuple[int, int, int]:
+    """
+    Get a tuple that changes whenever the file at ``path`` is replaced or modified.
+
+    :param path: the file path
+    :return: the inode, modification time and size of the file
+
+    """
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def get_mtime(path: Path) -> int:
+    """
+    Get the modification time of the file at ``path`` or ``0`` if it doesn't exist.
+
+    :param path: the file path
+    :return: the modification time in nanoseconds
+
+    """
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
@@ -6,8 +6,11 @@ from typing import List, Optional, Tuple, Union
 
 import aiofiles
 import arrow
+import bson
 import dictdiffer
+from pymongo.common import MAX_BSON_SIZE
 
+from virtool.types import Document
 from virtool.utils import run_in_thread
 
 
@@ -23,6 +26,63 @@ def calculate_diff(old: dict, new: dict) -> list:
     return list(dictdiffer.diff(old, new))
 
 
+def compose_change_document(
+    method_name: str,
+    old: Optional[dict],
+    new: Optional[dict],
+    description: str,
+    user_id: str,
+    created_at: datetime.datetime,
+) -> Document:
+    """
+    Compose a history change document from the joined OTU documents before and after
+    the change.
+
+    :param method_name: the name of the handler method that executed the change
+    :param old: the joined OTU document prior to the change
+    :param new: the joined OTU document after the change
+    :param description: a human readable description of the change
+    :param user_id: the id of the requesting user
+    :param created_at: the timestamp for the change
+    :return: the change document
+
+    """
+    otu_id, otu_name, otu_version, ref_id = derive_otu_information(old, new)
+
+    document = {
+        "_id": ".".join([str(otu_id), str(otu_version)]),
+        "method_name": method_name,
+        "description": description,
+        "created_at": created_at,
+        "otu": {"id": otu_id, "name": otu_name, "version": otu_version},
+        "reference": {"id": ref_id},
+        "index": {"id": "unbuilt", "version": "unbuilt"},
+        "user": {"id": user_id},
+    }
+
+    if method_name == "create":
+        document["diff"] = new
+
+    elif method_name == "remove":
+        document["diff"] = old
+
+    else:
+        document["diff"] = calculate_diff(old, new)
+
+    return document
+
+
+def check_document_too_large(document: Document) -> bool:
+    """
+    Check if a document is too large to be stored in MongoDB.
+
+    :param document: the document to check
+    :return: whether the document exceeds the maximum BSON size
+
+    """
+    return len(bson.encode(document)) > MAX_BSON_SIZE
+
+
 def compose_create_description(document: dict) -> str:
     """
     Compose a change description for the creation of a new OTU given its document.
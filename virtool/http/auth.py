@@ -70,15 +70,23 @@ async def authenticate_with_api_key(
 ) -> Response:
     db = req.app["db"]
 
-    document, user = await asyncio.gather(
-        db.keys.find_one({"_id": hash_key(key)}, ["permissions", "user"]),
-        db.users.find_one(
-            {"handle": handle}, ["administrator", "groups", "permissions"]
-        ),
-    )
+    hashed_key = hash_key(key)
+    cache_key = ("key", hashed_key, handle)
+
+    if cached := db.auth_cache.get(cache_key):
+        document, user = cached
+    else:
+        document, user = await asyncio.gather(
+            db.keys.find_one({"_id": hashed_key}, ["permissions", "user"]),
+            db.users.find_one(
+                {"handle": handle}, ["administrator", "groups", "permissions"]
+            ),
+        )
+
+        if not document or not user or document["user"]["id"] != user["_id"]:
+            raise HTTPUnauthorized(text="Invalid authorization header")
 
-    if not document or not user or document["user"]["id"] != user["_id"]:
-        raise HTTPUnauthorized(text="Invalid authorization header")
+        db.auth_cache.set(cache_key, (document, user), user["_id"])
 
     req["client"] = UserClient(
         db=db,
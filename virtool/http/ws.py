@@ -1,6 +1,6 @@
 import logging
 
-from aiohttp import web
+from aiohttp import WSMsgType, web
 
 import virtool.dispatcher.dispatcher
 from virtool.http.policy import policy, WebSocketRoutePolicy
@@ -13,6 +13,9 @@ async def root(req: web.Request) -> web.WebSocketResponse:
     """
     Handles requests for WebSocket connections.
 
+    Reconnecting clients can set the ``resume`` query parameter to the ``stream_id`` of
+    the last message they received to be sent the changes they missed.
+
     """
     ws = web.WebSocketResponse(autoping=True, heartbeat=5)
 
@@ -26,9 +29,14 @@ async def root(req: web.Request) -> web.WebSocketResponse:
 
     req.app["dispatcher"].add_connection(connection)
 
+    # Live changes are held for the connection until the missed changes are replayed.
+    if "resume" in req.query:
+        await req.app["dispatcher"].replay(connection, req.query["resume"])
+
     try:
-        async for _ in ws:
-            pass
+        async for message in ws:
+            if message.type == WSMsgType.TEXT:
+                connection.handle_message(message.data)
     except RuntimeError as err:
         if "TCPTransport" not in str(err):
             raise
@@ -4,7 +4,7 @@ Work with indexes in the database.
 """
 import asyncio
 import asyncio.tasks
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import pymongo
 from sqlalchemy.ext.asyncio import AsyncEngine
@@ -68,6 +68,41 @@ class IndexCountsTransform(AbstractTransform):
 
         return {"change_count": change_count, "modified_otu_count": len(otu_ids)}
 
+    async def prepare_many(
+        self, documents: List[Document]
+    ) -> Dict[Union[int, str], Any]:
+        index_ids = [document["id"] for document in documents]
+
+        counts = {
+            result["_id"]: {
+                "change_count": result["change_count"],
+                "modified_otu_count": result["modified_otu_count"],
+            }
+            async for result in self._db.history.aggregate(
+                [
+                    {"$match": {"index.id": {"$in": index_ids}}},
+                    {
+                        "$group": {
+                            "_id": "$index.id",
+                            "change_count": {"$sum": 1},
+                            "otu_ids": {"$addToSet": "$otu.id"},
+                        }
+                    },
+                    {
+                        "$project": {
+                            "change_count": True,
+                            "modified_otu_count": {"$size": "$otu_ids"},
+                        }
+                    },
+                ]
+            )
+        }
+
+        return {
+            index_id: counts.get(index_id, {"change_count": 0, "modified_otu_count": 0})
+            for index_id in index_ids
+        }
+
 
 async def create(
     db, ref_id: str, user_id: str, job_id: str, index_id: Optional[str] = None
@@ -103,9 +138,12 @@ async def create(
 
     document = await db.indexes.insert_one(document)
 
+    # Relabelling history for a whole reference is a single silent write. Clients learn
+    # about the build from the new index.
     await db.history.update_many(
         {"index.id": "unbuilt", "reference.id": ref_id},
         {"$set": {"index": {"id": index_id, "version": index_version}}},
+        silent=True,
     )
 
     return document
@@ -126,6 +164,24 @@ async def processor(db, document: dict) -> dict:
     )
 
 
+async def process_many(db, documents: List[dict]) -> List[dict]:
+    """
+    Process many index documents at once. Adds computed data about the indexes.
+
+    :param db: the application database client
+    :param documents: the documents to be processed
+    :return: the processed documents
+
+    """
+    if not documents:
+        return []
+
+    return await apply_transforms(
+        [virtool.utils.base_processor(document) for document in documents],
+        [AttachUserTransform(db), IndexCountsTransform(db)],
+    )
+
+
 async def find(db, req_query: dict, ref_id: Optional[str] = None) -> dict:
     """
     Find an index document matching the `req_query`
@@ -300,10 +356,10 @@ async def reset_history(db, index_id: str):
     :param index_id: The ID of the index which failed to build
 
     """
-    query = {"_id": {"$in": await db.history.distinct("_id", {"index.id": index_id})}}
-
     return await db.history.update_many(
-        query, {"$set": {"index": {"id": "unbuilt", "version": "unbuilt"}}}
+        {"index.id": index_id},
+        {"$set": {"index": {"id": "unbuilt", "version": "unbuilt"}}},
+        silent=True,
     )
 
 
@@ -318,17 +374,14 @@ async def get_patched_otus(db, config: Config, manifest: Dict[str, int]) -> List
 
     """
 
-    return [
-        j[1]
-        for j in await asyncio.tasks.gather(
-            *[
-                virtool.history.db.patch_to_version(
-                    config.data_path, db, patch_id, patch_version
-                )
-                for patch_id, patch_version in manifest.items()
-            ]
-        )
-    ]
+    return await asyncio.tasks.gather(
+        *[
+            virtool.history.db.get_patched_otu(
+                config.data_path, db, patch_id, patch_version
+            )
+            for patch_id, patch_version in manifest.items()
+        ]
+    )
 
 
 async def update_last_indexed_versions(db, ref_id: str):
@@ -6,7 +6,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from virtool_core.utils import file_stats
 
-from virtool.history.db import patch_to_version
+from virtool.history.db import get_patched_otu
 from virtool.indexes.db import FILES
 from virtool.indexes.models import IndexFile, IndexType
 from virtool.indexes.utils import join_index_path
@@ -202,7 +202,7 @@ async def export_index(app: App, manifest: Dict[str, int]) -> List[Document]:
     otu_list = []
 
     for otu_id, otu_version in manifest.items():
-        _, joined, _ = await patch_to_version(
+        joined = await get_patched_otu(
             app["config"].data_path, app["db"], otu_id, otu_version
         )
         otu_list.append(format_otu_for_export(joined))
@@ -1,4 +1,6 @@
-from typing import Any, Awaitable, List
+import time
+from typing import Any, Awaitable, Dict, Iterable, List, Optional
+from weakref import WeakKeyDictionary
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
@@ -7,42 +9,156 @@ from virtool.labels.models import Label
 from virtool.mongo.transforms import AbstractTransform
 from virtool.types import Document
 
+#: The number of seconds labels are cached for.
+LABEL_CACHE_TTL = 60
 
-class AttachLabelsTransform(AbstractTransform):
-    def __init__(self, pg: AsyncEngine):
+_label_caches: WeakKeyDictionary = WeakKeyDictionary()
+
+
+class LabelCache:
+    """
+    Caches all labels.
+
+    There are few labels and they rarely change, so all of them are fetched at once.
+    The cache is cleared by :func:`clear_label_caches` when a change to a label is
+    committed in this process, and expires after ``ttl`` seconds so changes committed
+    by other processes are eventually seen.
+
+    """
+
+    def __init__(self, pg: AsyncEngine, ttl: float = LABEL_CACHE_TTL):
         self._pg = pg
+        self._ttl = ttl
+        self._labels: Optional[Dict[int, Document]] = None
+        self._expires_at = 0.0
+        self._generation = 0
+
+    async def get_all(self) -> Dict[int, Document]:
+        """
+        Get all labels keyed by their IDs, ordered by ID.
+
+        The returned labels are shared, so they must be copied before being changed.
+
+        :return: the labels
+
+        """
+        if self._labels is not None and self._expires_at > time.monotonic():
+            return self._labels
+
+        generation = self._generation
 
-    async def _fetch_labels(self, label_ids: List[int]) -> List[Document]:
         async with AsyncSession(self._pg) as session:
-            results = await session.execute(
-                select(Label).filter(Label.id.in_(label_ids))
-            )
+            results = await session.execute(select(Label).order_by(Label.id))
+
+        labels = {label.id: label.to_dict() for label in results.scalars()}
+
+        # Don't cache labels that were fetched before the cache was cleared.
+        if generation == self._generation:
+            self._labels = labels
+            self._expires_at = time.monotonic() + self._ttl
+
+        return labels
+
+    async def get_many(self, label_ids: Iterable[int]) -> Dict[int, Document]:
+        """
+        Get the labels with the given IDs keyed by their IDs.
+
+        Labels created by other processes might not be cached yet, so the labels are
+        fetched again once if any of the IDs are missing from the cache. IDs that don't
+        belong to any label are ignored.
+
+        The returned labels are shared, so they must be copied before being changed.
+
+        :param label_ids: the IDs of the labels to get
+        :return: the labels
+
+        """
+        label_ids = set(label_ids)
+
+        labels = await self.get_all()
+
+        if not label_ids.issubset(labels):
+            self.clear()
+            labels = await self.get_all()
+
+        return {
+            label_id: label
+            for label_id, label in labels.items()
+            if label_id in label_ids
+        }
 
-        return [label.to_dict() for label in results.scalars()]
+    def clear(self):
+        """
+        Clear the cache so labels are fetched again on next use.
+
+        """
+        self._labels = None
+        self._generation += 1
+
+
+def get_label_cache(pg: AsyncEngine) -> LabelCache:
+    """
+    Get the label cache for ``pg``, creating it if it doesn't exist.
+
+    :param pg: the PostgreSQL engine
+    :return: the label cache
+
+    """
+    try:
+        return _label_caches[pg.sync_engine]
+    except KeyError:
+        cache = _label_caches[pg.sync_engine] = LabelCache(pg)
+        return cache
+
+
+def clear_label_caches():
+    """
+    Clear all label caches.
+
+    Called by :class:`~virtool.dispatcher.events.DispatcherSQLEvents` when a change to
+    a label is committed.
+
+    """
+    for cache in list(_label_caches.values()):
+        cache.clear()
+
+
+class AttachLabelsTransform(AbstractTransform):
+    def __init__(self, pg: AsyncEngine):
+        self._pg = pg
+
+    async def _fetch_labels(self, label_ids: Iterable[int]) -> Dict[int, Document]:
+        return await get_label_cache(self._pg).get_many(label_ids)
 
     async def attach_one(self, document: Document, prepared: Any) -> Document:
         return {**document, "labels": prepared}
 
     async def prepare_one(self, document):
         if document.get("labels"):
-            return await self._fetch_labels(document["labels"])
+            labels_by_id = await self._fetch_labels(document["labels"])
+
+            return [
+                {**labels_by_id[label_id]}
+                for label_id in document["labels"]
+                if label_id in labels_by_id
+            ]
 
         return []
 
     async def prepare_many(self, documents):
-        label_ids = {
+        labels_by_id = await self._fetch_labels(
             label_id
             for document in documents
             if document.get("labels")
             for label_id in document["labels"]
-        }
-
-        labels_by_id = {
-            label["id"]: label for label in await self._fetch_labels(list(label_ids))
-        }
+        )
 
         return {
-            document["id"]: [labels_by_id[label_id] for label_id in document["labels"]]
+            document["id"]: [
+                {**labels_by_id[label_id]}
+                for label_id in document["labels"]
+                if label_id in labels_by_id
+            ]
             for document in documents
         }
 
@@ -61,3 +177,20 @@ class SampleCountTransform(AbstractTransform):
 
     async def prepare_one(self, document) -> Awaitable[Any]:
         return await self._db.samples.count_documents({"labels": document["id"]})
+
+    async def prepare_many(self, documents: List[Document]) -> Dict[int, int]:
+        label_ids = [document["id"] for document in documents]
+
+        counts = dict.fromkeys(label_ids, 0)
+
+        async for result in self._db.samples.aggregate(
+            [
+                {"$match": {"labels": {"$in": label_ids}}},
+                {"$project": {"labels": {"$setIntersection": ["$labels", label_ids]}}},
+                {"$unwind": "$labels"},
+                {"$group": {"_id": "$labels", "count": {"$sum": 1}}},
+            ]
+        ):
+            counts[result["_id"]] = result["count"]
+
+        return counts
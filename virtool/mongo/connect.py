@@ -91,8 +91,10 @@ async def create_indexes(db):
         [("version", ASCENDING), ("reference.id", ASCENDING)],
         unique=True,
     )
+    await db.keyframes.create_index([("otu.id", ASCENDING), ("otu.version", ASCENDING)])
     await db.keys.create_index("id", unique=True)
     await db.keys.create_index("user.id")
+    await db.otu_hashes.create_index("reference.id")
     await db.otus.create_index([("_id", ASCENDING), ("isolate.id", ASCENDING)])
     await db.otus.create_index("name")
     await db.otus.create_index("nickname")
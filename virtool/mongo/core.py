@@ -7,11 +7,13 @@ collection.
 
 """
 from contextlib import asynccontextmanager
+from pathlib import Path
 from typing import (
     Any,
     Awaitable,
     Callable,
     Dict,
+    List,
     Optional,
     Sequence,
     Union,
@@ -23,11 +25,12 @@ from motor.motor_asyncio import (
 )
 from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError
-from pymongo.results import DeleteResult, UpdateResult
+from pymongo.results import DeleteResult, InsertManyResult, UpdateResult
 
 import virtool.analyses.db
 import virtool.caches.db
 import virtool.history.db
+import virtool.history.snapshots
 import virtool.hmm.db
 import virtool.indexes.db
 import virtool.jobs.db
@@ -82,7 +85,6 @@ class Collection:
         self.drop_indexes = self._collection.drop_indexes
         self.find_one = self._collection.find_one
         self.find = self._collection.find
-        self.insert_many = self._collection.insert_many
         self.rename = self._collection.rename
 
     async def apply_processor(self, document):
@@ -107,6 +109,28 @@ class Collection:
         if not self.silent:
             self.mongo.enqueue_change(self.name, operation, id_list)
 
+    async def _get_ids(
+        self, query: dict, session: Optional[AsyncIOMotorClientSession] = None
+    ) -> list:
+        """
+        Get the IDs of the documents matching `query` so changes to them can be
+        dispatched.
+
+        The IDs are taken from the query without a database round trip when it only
+        matches on `_id`.
+
+        :param query: a MongoDB query
+        :param session: an optional Motor session to use
+        :return: the matching IDs
+
+        """
+        id_list = virtool.mongo.utils.get_query_ids(query)
+
+        if id_list is None:
+            return await self._collection.distinct("_id", query, session=session)
+
+        return id_list
+
     async def delete_many(
         self,
         query: dict,
@@ -116,17 +140,23 @@ class Collection:
         """
         Delete many documents based on the passed `query`.
 
+        Silent deletions are a single write. Otherwise, the IDs of the documents to
+        delete are found first so the deletion can be dispatched.
+
         :param query: a MongoDB query
         :param silent: don't dispatch websocket messages for this operation
         :param session: an optional Motor session to use
         :return: the result
 
         """
-        id_list = await self.distinct("_id", query)
+        if silent or self.silent:
+            return await self._collection.delete_many(query, session=session)
+
+        id_list = await self._get_ids(query, session)
 
         delete_result = await self._collection.delete_many(query, session=session)
 
-        if not silent and len(id_list):
+        if delete_result.deleted_count and len(id_list):
             self.enqueue_change(DELETE, *id_list)
 
         return delete_result
@@ -235,6 +265,35 @@ class Collection:
 
         return inserted
 
+    async def insert_many(
+        self,
+        documents: List[Document],
+        silent: bool = False,
+        session: Optional[AsyncIOMotorClientSession] = None,
+    ) -> InsertManyResult:
+        """
+        Insert the `documents` in a single bulk operation.
+
+        Documents without an `_id` are assigned one in-place. A single change is
+        dispatched for all of the inserted documents.
+
+        :param documents: the documents to insert
+        :param silent: don't dispatch the change to connected clients
+        :param session: an optional Motor session to use
+        :return: the Pymongo `InsertManyResult` object
+
+        """
+        for document in documents:
+            if "_id" not in document:
+                document["_id"] = self.mongo.id_provider.get()
+
+        insert_result = await self._collection.insert_many(documents, session=session)
+
+        if not silent:
+            self.enqueue_change(INSERT, *insert_result.inserted_ids)
+
+        return insert_result
+
     async def replace_one(
         self,
         query: Dict[str, Any],
@@ -274,6 +333,9 @@ class Collection:
         """
         Update all documents that match `query` by applying the `update`.
 
+        Silent updates are a single write. Otherwise, the IDs of the documents to
+        update are found first so the update can be dispatched.
+
         :param query: the query to match
         :param update: the update to apply to matching documents
         :param silent: don't dispatch the change to connected clients
@@ -281,12 +343,15 @@ class Collection:
         :return: the Pymongo `UpdateResult` object
 
         """
-        updated_ids = await self._collection.distinct("_id", query, session=session)
+        if silent or self.silent:
+            return await self._collection.update_many(query, update, session=session)
+
+        updated_ids = await self._get_ids(query, session)
         update_result = await self._collection.update_many(
             query, update, session=session
         )
 
-        if not silent:
+        if update_result.matched_count:
             self.enqueue_change(UPDATE, *updated_ids)
 
         return update_result
@@ -302,6 +367,13 @@ class Collection:
         """
         Update one document matching the `query` by applying the `update`.
 
+        When the `query` matches on a single `_id` or the update is silent, the update
+        is sent as-is. Otherwise, unless `upsert` is set, the update is made with
+        `find_one_and_update` so the ID of the updated document can be dispatched
+        without a separate query. Whether the document was changed isn't known in that
+        case, so the `modified_count` of the result is always 0. Use `matched_count` to
+        check whether a document was updated.
+
         :param query: the query to match
         :param update: the update to apply to matching document
         :param upsert: insert a new document if there is no match for the query
@@ -310,15 +382,49 @@ class Collection:
         :return: the Pymongo `UpdateResult` object
 
         """
-        document = await self.find_one(query, ["_id"], session=session)
-        update_result = await self._collection.update_one(
-            query, update, upsert=upsert, session=session
+        id_list = virtool.mongo.utils.get_query_ids(query)
+
+        if silent or self.silent or (id_list is not None and len(id_list) == 1):
+            update_result = await self._collection.update_one(
+                query, update, upsert=upsert, session=session
+            )
+
+            if not silent and id_list and update_result.matched_count:
+                self.enqueue_change(UPDATE, *id_list)
+
+            return update_result
+
+        if upsert:
+            # Upserted documents are not dispatched. The ID of the updated document is
+            # looked up first, so the result of the update is returned unchanged.
+            document = await self._collection.find_one(query, ["_id"], session=session)
+
+            update_result = await self._collection.update_one(
+                query, update, upsert=True, session=session
+            )
+
+            if document:
+                self.enqueue_change(UPDATE, document["_id"])
+
+            return update_result
+
+        # Get the ID of the updated document in the same round trip as the update.
+        document = await self._collection.find_one_and_update(
+            query,
+            update,
+            projection=["_id"],
+            return_document=ReturnDocument.BEFORE,
+            session=session,
         )
 
-        if not silent and document:
-            self.enqueue_change(UPDATE, document["_id"])
+        if document is None:
+            return UpdateResult(
+                {"n": 0, "nModified": 0, "updatedExisting": False}, True
+            )
 
-        return update_result
+        self.enqueue_change(UPDATE, document["_id"])
+
+        return UpdateResult({"n": 1, "nModified": 0, "updatedExisting": True}, True)
 
 
 class DB:
@@ -327,8 +433,15 @@ class DB:
         motor_client: AsyncIOMotorClient,
         enqueue_change: Callable[[str, str, Sequence[str]], None],
         id_provider: AbstractIdProvider,
+        silent: bool = False,
+        snapshot_path: Optional[Path] = None,
     ):
         self.motor_client = motor_client
+
+        #: Don't dispatch changes for any collection. Used when changes are read from
+        #: MongoDB change streams instead.
+        self.silent = silent
+
         self.start_session = motor_client.start_session
         self.enqueue_change = enqueue_change
         self.id_provider = id_provider
@@ -363,12 +476,16 @@ class DB:
             processor=virtool.jobs.db.processor,
         )
 
+        self.keyframes = self.bind_collection("keyframes", silent=True)
+
         self.keys = self.bind_collection("keys", silent=True)
 
         self.labels = self.bind_collection("labels")
 
         self.otus = self.bind_collection("otus", projection=virtool.otus.db.PROJECTION)
 
+        self.otu_hashes = self.bind_collection("otu_hashes", silent=True)
+
         self.tasks = self.bind_collection("tasks")
 
         self.references = self.bind_collection(
@@ -398,6 +515,19 @@ class DB:
             "users", projection=virtool.users.db.PROJECTION
         )
 
+        #: Caches the user data attached to other documents.
+        self.user_cache = virtool.users.db.UserCache(self.users)
+
+        #: Caches the sessions and API keys used to authenticate requests.
+        self.auth_cache = virtool.users.db.AuthCache()
+
+        #: Caches the document counts returned when paging with a cursor.
+        self.count_cache = virtool.mongo.utils.CountCache()
+
+        #: Stores OTUs that have been patched to previous versions. Nothing is stored if
+        #: no ``snapshot_path`` is given.
+        self.snapshots = virtool.history.snapshots.OTUSnapshotCache(snapshot_path)
+
     def bind_collection(
         self,
         name: str,
@@ -410,7 +540,7 @@ class DB:
             name,
             processor,
             projection,
-            silent,
+            silent or self.silent,
         )
 
     @asynccontextmanager
@@ -2,13 +2,22 @@
 Utilities for working with MongoDB.
 
 """
+import time
+from collections import OrderedDict
 from typing import Any, Dict, Optional, Sequence, Set, Union
 
+from bson import json_util
 from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorCollection
 
 import virtool.utils
 from virtool.types import Projection
 
+#: The number of seconds document counts are cached for.
+COUNT_CACHE_TTL = 30
+
+#: The maximum number of document counts that are cached.
+COUNT_CACHE_SIZE = 1000
+
 
 def apply_projection(document: Dict, projection: Projection):
     """
@@ -40,6 +49,87 @@ def apply_projection(document: Dict, projection: Projection):
     return {key: document[key] for key in document if projection.get(key, False)}
 
 
+def get_query_ids(query: Any) -> Optional[list]:
+    """
+    Get the IDs a query matches if it only matches on ``_id``.
+
+    Supports queries like ``{"_id": "foo"}`` and ``{"_id": {"$in": ["foo", "bar"]}}``.
+    Returns ``None`` for other queries, whose matching IDs can only be found by
+    querying the database.
+
+    :param query: a MongoDB query
+    :return: the IDs or ``None``
+
+    """
+    if not isinstance(query, dict) or list(query) != ["_id"]:
+        return None
+
+    value = query["_id"]
+
+    if not isinstance(value, dict):
+        return [value]
+
+    if list(value) == ["$in"] and isinstance(value["$in"], (list, tuple, set)):
+        return list(value["$in"])
+
+    return None
+
+
+class CountCache:
+    """
+    Caches the number of documents matching queries.
+
+    Used where counts don't need to be exact, like when paging through search results
+    with a cursor. Counts expire after ``ttl`` seconds. When the cache is full, the
+    least recently used count is removed.
+
+    """
+
+    def __init__(self, ttl: float = COUNT_CACHE_TTL, max_size: int = COUNT_CACHE_SIZE):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._counts: OrderedDict = OrderedDict()
+
+    async def count(self, collection, query: Dict) -> int:
+        """
+        Get the number of documents in ``collection`` that match ``query``.
+
+        The documents are only counted if there is no unexpired count for the query.
+
+        :param collection: the collection to count documents in
+        :param query: the query to match documents with
+        :return: the number of matching documents
+
+        """
+        key = (collection.name, json_util.dumps(query))
+
+        try:
+            expires_at, count = self._counts[key]
+        except KeyError:
+            pass
+        else:
+            if expires_at > time.monotonic():
+                self._counts.move_to_end(key)
+                return count
+
+        count = await collection.count_documents(query)
+
+        self._counts[key] = (time.monotonic() + self._ttl, count)
+        self._counts.move_to_end(key)
+
+        while len(self._counts) > self._max_size:
+            self._counts.popitem(last=False)
+
+        return count
+
+    def clear(self):
+        """
+        Remove all counts.
+
+        """
+        self._counts.clear()
+
+
 async def delete_unready(collection):
     """
     Delete documents in the `collection` where the `ready` field is set to `false`.
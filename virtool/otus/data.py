@@ -1,6 +1,6 @@
 import asyncio
 from copy import deepcopy
-from typing import Optional, Tuple, Mapping
+from typing import List, Optional, Tuple, Mapping
 
 from pymongo.results import DeleteResult
 from virtool_core.models.enums import HistoryMethod
@@ -24,7 +24,13 @@ from virtool.otus.oas import UpdateSequenceRequest, CreateOTURequest, UpdateOTUR
 from virtool.otus.utils import find_isolate, format_isolate_name
 from virtool.types import App, Document
 from virtool.users.db import AttachUserTransform
-from virtool.utils import base_processor
+from virtool.utils import base_processor, chunk_list
+
+#: The number of OTUs to remove in each bulk operation in :meth:`OTUData.remove_many`.
+REMOVE_BATCH_SIZE = 100
+
+#: The maximum number of OTU batches to remove concurrently.
+REMOVE_CONCURRENCY = 4
 
 
 class OTUData:
@@ -255,8 +261,81 @@ class OTUData:
                 session=session,
             )
 
+        await self._db.snapshots.invalidate(otu_id)
+
         return delete_result
 
+    async def remove_many(
+        self, otu_ids: List[str], user_id: str, silent: bool = False
+    ) -> int:
+        """
+        Remove many OTUs.
+
+        OTUs are joined, deleted, and recorded in history in batches of
+        :const:`REMOVE_BATCH_SIZE` using bulk operations. Up to
+        :const:`REMOVE_CONCURRENCY` batches are removed at once.
+
+        :param otu_ids: the IDs of the OTUs
+        :param user_id: the ID of the requesting user
+        :param silent: prevents dispatch of the changes
+        :return: the number of OTUs that were removed
+
+        """
+        semaphore = asyncio.Semaphore(REMOVE_CONCURRENCY)
+
+        async def remove_batch(batch: List[str]) -> int:
+            async with semaphore:
+                joined_otus = list(
+                    (await virtool.otus.db.join_many(self._db, batch)).values()
+                )
+
+                if not joined_otus:
+                    return 0
+
+                found_ids = [joined["_id"] for joined in joined_otus]
+
+                async with self._db.create_session() as session:
+                    _, delete_result, _ = await asyncio.gather(
+                        self._db.sequences.delete_many(
+                            {"otu_id": {"$in": found_ids}}, silent=True, session=session
+                        ),
+                        self._db.otus.delete_many(
+                            {"_id": {"$in": found_ids}}, silent=silent, session=session
+                        ),
+                        # Unset the internal_control of references that use one of the
+                        # OTUs being removed.
+                        self._db.references.update_many(
+                            {"internal_control.id": {"$in": found_ids}},
+                            {"$set": {"internal_control": None}},
+                            session=session,
+                        ),
+                    )
+
+                    await virtool.history.db.add_many(
+                        self._app,
+                        HistoryMethod.remove,
+                        [
+                            (joined, None, compose_remove_description(joined))
+                            for joined in joined_otus
+                        ],
+                        user_id,
+                        silent=silent,
+                        session=session,
+                    )
+
+                await self._db.snapshots.invalidate_many(found_ids)
+
+                return delete_result.deleted_count
+
+        return sum(
+            await asyncio.gather(
+                *[
+                    remove_batch(batch)
+                    for batch in chunk_list(list(otu_ids), REMOVE_BATCH_SIZE)
+                ]
+            )
+        )
+
     async def add_isolate(
         self,
         otu_id: str,
@@ -2,6 +2,7 @@
 Work with OTUs in the database.
 
 """
+from collections import defaultdict
 from typing import Any, Dict, List, Optional, Union, Mapping
 
 from motor.motor_asyncio import AsyncIOMotorClientSession
@@ -134,6 +135,36 @@ async def join(
     return virtool.otus.utils.merge_otu(document, [d async for d in cursor])
 
 
+async def join_many(
+    db,
+    otu_ids: List[str],
+    session: Optional[AsyncIOMotorClientSession] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Join many OTUs with their sequences using one query per collection.
+
+    OTUs that do not exist are omitted from the result.
+
+    :param db: the application database client
+    :param otu_ids: the ids of the OTUs to join
+    :param session: a Motor session to use for database operations
+    :return: the joined OTU documents keyed by OTU id
+    """
+    sequences = defaultdict(list)
+
+    async for sequence in db.sequences.find(
+        {"otu_id": {"$in": otu_ids}}, session=session
+    ):
+        sequences[sequence["otu_id"]].append(sequence)
+
+    return {
+        document["_id"]: virtool.otus.utils.merge_otu(
+            document, sequences[document["_id"]]
+        )
+        async for document in db.otus.find({"_id": {"$in": otu_ids}}, session=session)
+    }
+
+
 async def join_and_format(
     db,
     otu_id: str,
@@ -112,9 +112,7 @@ class ReferencesView(PydanticView):
         await apply_transforms(data["documents"], [AttachUserTransform(db)])
 
         documents, official_installed = await gather(
-            gather(
-                *[virtool.references.db.processor(db, d) for d in data["documents"]]
-            ),
+            virtool.references.db.process_many(db, data["documents"]),
             get_official_installed(db),
         )
 
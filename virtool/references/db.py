@@ -5,10 +5,13 @@ Work with references in the database
 import asyncio
 import datetime
 import logging
+import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import pymongo
+from pymongo import ReplaceOne, UpdateOne
 from aiohttp import ClientConnectorError
 from aiohttp.web import Request
 from motor.motor_asyncio import AsyncIOMotorClientSession
@@ -23,18 +26,25 @@ import virtool.history.db
 import virtool.mongo.utils
 import virtool.utils
 from virtool.data.utils import get_data_from_app
+from virtool.dispatcher.operations import INSERT, UPDATE
 from virtool.http.utils import download_file
-from virtool.mongo.transforms import apply_transforms
+from virtool.mongo.transforms import AbstractTransform, apply_transforms
 from virtool.otus.db import join
 from virtool.otus.utils import verify
 from virtool.pg.utils import get_row
 from virtool.references.utils import (
     RIGHTS,
+    DuplicateDetector,
+    check_metadata,
+    check_otu_batch,
     check_will_change,
+    compute_otu_hash,
     get_owner_user,
-    load_reference_file,
+    load_reference_metadata,
+    read_reference_batch,
+    stream_reference_file,
 )
-from virtool.types import App
+from virtool.types import App, Document
 from virtool.uploads.models import Upload
 from virtool.users.db import AttachUserTransform, extend_user
 from virtool.utils import run_in_thread
@@ -62,6 +72,120 @@ PROJECTION = [
     "groups",
 ]
 
+#: The default number of OTUs to write to the database in each bulk operation when
+#: importing, cloning or installing a reference.
+INSERT_BATCH_SIZE = 100
+
+#: The number of OTUs to validate in each process pool job when checking a reference
+#: file.
+VALIDATION_BATCH_SIZE = 250
+
+
+class LatestBuildTransform(AbstractTransform):
+    """
+    Attaches the latest ready index build to reference documents.
+    """
+
+    def __init__(self, db):
+        self._db = db
+
+    async def attach_one(self, document: Document, prepared: Any) -> Document:
+        return {**document, "latest_build": prepared}
+
+    async def prepare_one(self, document: Document) -> Any:
+        return await get_latest_build(self._db, document["id"])
+
+    async def prepare_many(
+        self, documents: List[Document]
+    ) -> Dict[Union[int, str], Any]:
+        ref_ids = [document["id"] for document in documents]
+
+        latest_builds = {}
+
+        async for result in self._db.indexes.aggregate(
+            [
+                {"$match": {"reference.id": {"$in": ref_ids}, "ready": True}},
+                {"$sort": {"version": pymongo.DESCENDING}},
+                {
+                    "$group": {
+                        "_id": "$reference.id",
+                        "build": {
+                            "$first": {
+                                "_id": "$_id",
+                                "created_at": "$created_at",
+                                "version": "$version",
+                                "user": "$user",
+                                "has_json": "$has_json",
+                            }
+                        },
+                    }
+                },
+            ]
+        ):
+            latest_builds[result["_id"]] = virtool.utils.base_processor(result["build"])
+
+        if latest_builds:
+            builds = await apply_transforms(
+                list(latest_builds.values()), [AttachUserTransform(self._db)]
+            )
+
+            latest_builds = dict(zip(latest_builds, builds))
+
+        return {ref_id: latest_builds.get(ref_id) for ref_id in ref_ids}
+
+
+class ReferenceCountsTransform(AbstractTransform):
+    """
+    Attaches OTU and unbuilt change counts to reference documents.
+    """
+
+    def __init__(self, db):
+        self._db = db
+
+    async def attach_one(self, document: Document, prepared: Any) -> Document:
+        return {**document, **prepared}
+
+    async def prepare_one(self, document: Document) -> Any:
+        otu_count, unbuilt_count = await asyncio.gather(
+            get_otu_count(self._db, document["id"]),
+            get_unbuilt_count(self._db, document["id"]),
+        )
+
+        return {"otu_count": otu_count, "unbuilt_change_count": unbuilt_count}
+
+    async def prepare_many(
+        self, documents: List[Document]
+    ) -> Dict[Union[int, str], Any]:
+        ref_ids = [document["id"] for document in documents]
+
+        otu_counts, unbuilt_counts = await asyncio.gather(
+            self._count(self._db.otus, {"reference.id": {"$in": ref_ids}}),
+            self._count(
+                self._db.history,
+                {"reference.id": {"$in": ref_ids}, "index.id": "unbuilt"},
+            ),
+        )
+
+        return {
+            ref_id: {
+                "otu_count": otu_counts.get(ref_id, 0),
+                "unbuilt_change_count": unbuilt_counts.get(ref_id, 0),
+            }
+            for ref_id in ref_ids
+        }
+
+    @staticmethod
+    async def _count(collection, query: dict) -> Dict[str, int]:
+        return {
+            result["_id"]: result["count"]
+            async for result in collection.aggregate(
+                [
+                    {"$match": query},
+                    {"$group": {"_id": "$reference.id", "count": {"$sum": 1}}},
+                ]
+            )
+        }
+
 
 async def processor(db, document: dict) -> dict:
     """
@@ -74,33 +198,40 @@ async def processor(db, document: dict) -> dict:
     :return: the processed document
 
     """
-    try:
-        ref_id = document.pop("_id")
-    except KeyError:
-        ref_id = document["id"]
+    return (await process_many(db, [document]))[0]
 
-    latest_build, otu_count, unbuilt_count = await asyncio.gather(
-        get_latest_build(db, ref_id),
-        get_otu_count(db, ref_id),
-        get_unbuilt_count(db, ref_id),
-    )
 
-    document.update(
-        {
-            "latest_build": latest_build,
-            "otu_count": otu_count,
-            "unbuilt_change_count": unbuilt_count,
-        }
-    )
+async def process_many(db, documents: List[dict]) -> List[dict]:
+    """
+    Process reference documents to a form that can be dispatched or returned in a list.
 
-    try:
-        document["installed"] = document.pop("updates")[-1]
-    except (KeyError, IndexError):
-        pass
+    The computed fields are fetched for all the documents at once, using one query for
+    each field.
+
+    :param db: the application database client
+    :param documents: the documents to process
+    :return: the processed documents
 
-    document["id"] = ref_id
+    """
+    if not documents:
+        return []
 
-    return document
+    for document in documents:
+        try:
+            ref_id = document.pop("_id")
+        except KeyError:
+            ref_id = document["id"]
+
+        try:
+            document["installed"] = document.pop("updates")[-1]
+        except (KeyError, IndexError):
+            pass
+
+        document["id"] = ref_id
+
+    return await apply_transforms(
+        documents, [LatestBuildTransform(db), ReferenceCountsTransform(db)]
+    )
 
 
 async def attach_computed(db, document: dict) -> dict:
@@ -695,18 +826,91 @@ async def create_remote(
     }
 
 
+async def check_reference_file_in_processes(
+    app: App, path: Path, strict: bool = True, verify: bool = True
+) -> Tuple[List[dict], Dict[str, dict]]:
+    """
+    Check the reference file at ``path`` using the application process pool.
+
+    Performs the same checks as :func:`virtool.references.utils.check_reference_file`.
+    The file is streamed in a thread and duplicates are detected as it is read. Batches
+    of :const:`VALIDATION_BATCH_SIZE` OTUs are validated and verified in the process
+    pool. Only a few batches are in flight at once, so memory use stays bounded.
+
+    :param app: the application object
+    :param path: the path to the otus.json.gz file
+    :param strict: require reference metadata and identifiers
+    :param verify: verify the OTUs
+    :return: a list of errors and the issues found in each OTU keyed by OTU ID
+
+    """
+    detector = DuplicateDetector()
+    metadata = {}
+    stream = stream_reference_file(path)
+
+    semaphore = asyncio.Semaphore((os.cpu_count() or 1) + 1)
+
+    def read_batch() -> List[dict]:
+        otus = read_reference_batch(stream, metadata, VALIDATION_BATCH_SIZE)
+
+        for otu in otus:
+            detector.add(otu)
+
+        return otus
+
+    async def check_batch(otus: List[dict]) -> Dict[str, dict]:
+        try:
+            return await app["run_in_process"](check_otu_batch, otus, strict, verify)
+        finally:
+            semaphore.release()
+
+    jobs = []
+
+    try:
+        while True:
+            await semaphore.acquire()
+
+            if not (otus := await run_in_thread(read_batch)):
+                semaphore.release()
+                break
+
+            jobs.append(asyncio.create_task(check_batch(otus)))
+
+        issues = {}
+
+        for result in await asyncio.gather(*jobs):
+            issues.update(result)
+    except BaseException:
+        for job in jobs:
+            job.cancel()
+
+        raise
+
+    return detector.compose_errors() + check_metadata(metadata, strict), issues
+
+
 async def download_and_parse_release(
-    app, url: str, task_id: int, progress_handler: callable
-):
+    app, url: str, task_id: int, progress_handler: callable, download_path: Path
+) -> Tuple[dict, int]:
+    """
+    Download a reference release to ``download_path`` and load its metadata.
 
-    with virtool.utils.get_temp_dir() as tempdir:
-        download_path = Path(tempdir) / "reference.tar.gz"
+    The OTUs in the release are not loaded. Stream them from ``download_path`` using
+    :func:`virtool.references.utils.iter_reference_otus`.
 
-        await download_file(app, url, download_path, progress_handler)
+    :param app: the application object
+    :param url: the release download URL
+    :param task_id: the ID of the task downloading the release
+    :param progress_handler: a callable that is passed the size of each downloaded chunk
+    :param download_path: the path to download the release to
+    :return: the reference metadata and the number of OTUs in the release
 
-        await get_data_from_app(app).tasks.pg.update(task_id, step="unpack")
+    """
+    await download_file(app, url, download_path, progress_handler)
 
-        return await run_in_thread(load_reference_file, download_path)
+    await get_data_from_app(app).tasks.pg.update(task_id, step="unpack")
+
+    return await run_in_thread(load_reference_metadata, download_path)
 
 
 async def edit(db, ref_id: str, data: dict) -> dict:
@@ -736,41 +940,56 @@ async def edit(db, ref_id: str, data: dict) -> dict:
     return document
 
 
-async def insert_change(
+async def insert_changes(
     app,
-    otu_id: str,
     verb: HistoryMethod,
+    changes: Sequence[Tuple[Optional[dict], dict]],
     user_id: str,
-    old: Optional[dict] = None,
     session: Optional[AsyncIOMotorClientSession] = None,
 ):
     """
-    Insert a history document for the OTU identified by `otu_id` and the passed `verb`.
+    Insert history documents for many OTUs changed by the passed ``verb``.
+
+    The changes are written with a single bulk insert. The new joined OTU documents
+    must already be in memory, so no additional queries are made to join them.
 
     :param app: the application object
-    :param otu_id: the ID of the OTU the change is for
     :param verb: the change verb (eg. remove, insert)
+    :param changes: the old and new joined OTU document for each change
     :param user_id: the ID of the requesting user
-    :param old: the old joined OTU document
     :param session: a Mongo session
 
     """
-    db = app["db"]
+    await virtool.history.db.add_many(
+        app,
+        verb,
+        [
+            (old, joined, compose_change_description(verb, joined))
+            for old, joined in changes
+        ],
+        user_id,
+        silent=True,
+        session=session,
+    )
 
-    joined = await join(db, otu_id, session=session)
 
-    name = joined["name"]
+def compose_change_description(verb: HistoryMethod, joined: dict) -> str:
+    """
+    Compose a history description for a change made to an OTU in a reference-wide task.
+
+    :param verb: the change verb (eg. remove, insert)
+    :param joined: the joined OTU after the change
+    :return: the description
 
+    """
     e = "" if verb.value[-1] == "e" else "e"
 
-    description = f"{verb.value.capitalize()}{e}d {name}"
+    description = f"{verb.value.capitalize()}{e}d {joined['name']}"
 
     if abbreviation := joined.get("abbreviation"):
         description = f"{description} ({abbreviation})"
 
-    await virtool.history.db.add(
-        app, verb, old, joined, description, user_id, silent=True, session=session
-    )
+    return description
 
 
 async def insert_joined_otu(
@@ -781,35 +1000,230 @@ async def insert_joined_otu(
     user_id: str,
     session: Optional[AsyncIOMotorClientSession] = None,
 ) -> str:
-    issues = verify(otu)
+    (joined,) = await insert_joined_otus(
+        db, [otu], created_at, ref_id, user_id, session=session
+    )
 
-    document = await db.otus.insert_one(
-        {
-            "abbreviation": otu["abbreviation"],
-            "created_at": created_at,
-            "imported": True,
-            "isolates": [
-                {
-                    key: isolate[key]
-                    for key in ("id", "default", "source_type", "source_name")
-                }
-                for isolate in otu["isolates"]
+    return joined["_id"]
+
+
+async def insert_joined_otus(
+    db,
+    otus: List[dict],
+    created_at: datetime.datetime,
+    ref_id: str,
+    user_id: str,
+    session: Optional[AsyncIOMotorClientSession] = None,
+    batch_size: int = INSERT_BATCH_SIZE,
+) -> List[dict]:
+    """
+    Insert joined OTUs and their sequences.
+
+    The OTUs and sequences in each batch of ``batch_size`` OTUs are each written with
+    a single bulk insert.
+
+    The inserted OTUs are joined in memory and returned so callers can create history
+    without querying them again.
+
+    :param db: the application database client
+    :param otus: the joined OTUs to insert
+    :param created_at: the creation timestamp to apply to the OTUs
+    :param ref_id: the ID of the parent reference
+    :param user_id: the ID of the requesting user
+    :param session: a Mongo session
+    :param batch_size: the maximum number of OTUs to write in each bulk insert
+    :return: the inserted joined OTUs in the order they were passed
+
+    """
+    inserted = []
+
+    for chunk in virtool.utils.chunk_list(otus, batch_size):
+        hashes = [compute_otu_hash(otu) for otu in chunk]
+
+        documents = [
+            compose_otu_document(otu, created_at, ref_id, user_id) for otu in chunk
+        ]
+
+        await db.otus.insert_many(documents, silent=True, session=session)
+
+        await store_otu_hashes(
+            db,
+            [
+                (document["_id"], otu_hash, document["version"])
+                for document, otu_hash in zip(documents, hashes)
             ],
-            "issues": issues,
-            "lower_name": otu["name"].lower(),
-            "last_indexed_version": None,
-            "name": otu["name"],
-            "reference": {"id": ref_id},
-            "remote": {"id": otu["_id"]},
-            "schema": otu.get("schema", []),
-            "user": {"id": user_id},
-            "verified": issues is None,
-            "version": 0,
-        },
-        silent=True,
-        session=session,
-    )
+            ref_id,
+            session=session,
+        )
+
+        sequences = [
+            sequence
+            for otu, document in zip(chunk, documents)
+            for sequence in compose_sequence_documents(otu, document["_id"], ref_id)
+        ]
+
+        if sequences:
+            await db.sequences.insert_many(sequences, session=session)
+
+        sequences_by_isolate = defaultdict(list)
+
+        for sequence in sequences:
+            sequences_by_isolate[(sequence["otu_id"], sequence["isolate_id"])].append(
+                sequence
+            )
+
+        inserted += [
+            {
+                **document,
+                "isolates": [
+                    {
+                        **isolate,
+                        "sequences": sequences_by_isolate[
+                            (document["_id"], isolate["id"])
+                        ],
+                    }
+                    for isolate in document["isolates"]
+                ],
+            }
+            for document in documents
+        ]
+
+    return inserted
+
+
+async def store_otu_hashes(
+    db,
+    hashes: Sequence[Tuple[str, str, int]],
+    ref_id: str,
+    session: Optional[AsyncIOMotorClientSession] = None,
+):
+    """
+    Store the content hashes of OTUs in a reference.
+
+    Each hash is stored with the version of the OTU it was computed for. If the OTU is
+    later modified locally, its version changes and the hash is no longer used.
+
+    :param db: the application database client
+    :param hashes: the OTU ID, content hash, and OTU version for each OTU
+    :param ref_id: the ID of the parent reference
+    :param session: a Mongo session
+
+    """
+    if hashes:
+        await db.otu_hashes.bulk_write(
+            [
+                ReplaceOne(
+                    {"_id": otu_id},
+                    {
+                        "_id": otu_id,
+                        "hash": otu_hash,
+                        "reference": {"id": ref_id},
+                        "version": version,
+                    },
+                    upsert=True,
+                )
+                for otu_id, otu_hash, version in hashes
+            ],
+            ordered=False,
+            session=session,
+        )
+
+
+async def get_remote_otu_hashes(
+    db, ref_id: str, remote_ids: List[str]
+) -> Dict[str, dict]:
+    """
+    Get the IDs, versions, and content hashes of the OTUs in a reference with the
+    passed remote IDs.
+
+    The hash is ``None`` if none was stored or if the OTU has been modified since the
+    hash was stored.
+
+    :param db: the application database client
+    :param ref_id: the ID of the reference
+    :param remote_ids: the remote IDs of the OTUs
+    :return: dictionaries with ``_id``, ``version``, and ``hash`` keyed by remote ID
+
+    """
+    otus = await db.otus.find(
+        {"reference.id": ref_id, "remote.id": {"$in": remote_ids}},
+        ["_id", "remote", "version"],
+    ).to_list(None)
+
+    hashes = {
+        document["_id"]: document
+        async for document in db.otu_hashes.find(
+            {"_id": {"$in": [otu["_id"] for otu in otus]}}
+        )
+    }
+
+    result = {}
+
+    for otu in otus:
+        stored = hashes.get(otu["_id"])
+
+        result[otu["remote"]["id"]] = {
+            "_id": otu["_id"],
+            "version": otu["version"],
+            "hash": stored["hash"]
+            if stored and stored["version"] == otu["version"]
+            else None,
+        }
+
+    return result
 
+
+def compose_otu_document(
+    otu: dict, created_at: datetime.datetime, ref_id: str, user_id: str
+) -> dict:
+    """
+    Compose a new OTU document from a joined OTU being imported into a reference.
+
+    :param otu: the joined OTU
+    :param created_at: the creation timestamp
+    :param ref_id: the ID of the parent reference
+    :param user_id: the ID of the requesting user
+    :return: an OTU document ready for insertion
+
+    """
+    issues = verify(otu)
+
+    return {
+        "abbreviation": otu["abbreviation"],
+        "created_at": created_at,
+        "imported": True,
+        "isolates": [
+            {
+                key: isolate[key]
+                for key in ("id", "default", "source_type", "source_name")
+            }
+            for isolate in otu["isolates"]
+        ],
+        "issues": issues,
+        "lower_name": otu["name"].lower(),
+        "last_indexed_version": None,
+        "name": otu["name"],
+        "reference": {"id": ref_id},
+        "remote": {"id": otu["_id"]},
+        "schema": otu.get("schema", []),
+        "user": {"id": user_id},
+        "verified": issues is None,
+        "version": 0,
+    }
+
+
+def compose_sequence_documents(otu: dict, otu_id: str, ref_id: str) -> List[dict]:
+    """
+    Compose new sequence documents from the isolates of a joined OTU being imported.
+
+    The ``sequences`` field is removed from each isolate in ``otu``.
+
+    :param otu: the joined OTU
+    :param otu_id: the ID the OTU was inserted with
+    :param ref_id: the ID of the parent reference
+    :return: sequence documents ready for insertion
+
+    """
     sequences = []
 
     for isolate in otu["isolates"]:
@@ -825,17 +1239,14 @@ async def insert_joined_otu(
                     **sequence,
                     "accession": sequence["accession"],
                     "isolate_id": isolate["id"],
-                    "otu_id": document["_id"],
+                    "otu_id": otu_id,
                     "segment": sequence.get("segment", ""),
                     "reference": {"id": ref_id},
                     "remote": {"id": remote_sequence_id},
                 }
             )
 
-    for sequence in sequences:
-        await db.sequences.insert_one(sequence, session=session)
-
-    return document["_id"]
+    return sequences
 
 
 async def refresh_remotes(app: App):
@@ -857,6 +1268,26 @@ async def refresh_remotes(app: App):
     logging.debug("Stopped reference refresher")
 
 
+async def set_processing(db, ref_id: str, processing: bool):
+    """
+    Mark a reference as having its OTUs, sequences and history written in bulk.
+
+    Change events for OTUs, sequences and history inserted for a processing reference
+    are not dispatched when changes are read from MongoDB change streams.
+
+    :param db: the application database client
+    :param ref_id: the ID of the reference
+    :param processing: whether the reference is being processed
+
+    """
+    if processing:
+        update = {"$set": {"processing": True}}
+    else:
+        update = {"$unset": {"processing": ""}}
+
+    await db.references.update_one({"_id": ref_id}, update, silent=True)
+
+
 async def update(
     req: Request,
     created_at: datetime.datetime,
@@ -882,6 +1313,71 @@ async def update(
     return release, update_subdocument
 
 
+async def upsert_remote_sequences(
+    db, old: dict, sequence_updates: List[dict], ref_id: str
+):
+    """
+    Write updated sequences from a remote release for the existing OTU ``old``.
+
+    Sequences are matched to existing sequences in the reference by remote ID and
+    updated or inserted with a single bulk write. Sequences of ``old`` that are not in
+    ``sequence_updates`` no longer exist in the remote reference and are removed.
+    Sequences that were added locally and have no remote ID are left alone.
+
+    :param db: the application database client
+    :param old: the joined OTU before the update
+    :param sequence_updates: the updated sequences
+    :param ref_id: the ID of the reference
+
+    """
+    remote_sequence_ids = [s["remote"]["id"] for s in sequence_updates]
+
+    if sequence_updates:
+        result = await db.sequences.bulk_write(
+            [
+                UpdateOne(
+                    {
+                        "reference.id": ref_id,
+                        "remote.id": sequence_update["remote"]["id"],
+                    },
+                    {
+                        "$set": sequence_update,
+                        "$setOnInsert": {"_id": db.id_provider.get()},
+                    },
+                    upsert=True,
+                )
+                for sequence_update in sequence_updates
+            ],
+            ordered=False,
+        )
+
+        existing_sequence_ids = {
+            sequence["remote"]["id"]: sequence["_id"]
+            for isolate in old["isolates"]
+            for sequence in isolate["sequences"]
+            if sequence.get("remote")
+        }
+
+        updated_ids = [
+            existing_sequence_ids[remote_sequence_id]
+            for remote_sequence_id in remote_sequence_ids
+            if remote_sequence_id in existing_sequence_ids
+        ]
+
+        if updated_ids:
+            db.sequences.enqueue_change(UPDATE, *updated_ids)
+
+        if result.upserted_ids:
+            db.sequences.enqueue_change(INSERT, *result.upserted_ids.values())
+
+    await db.sequences.delete_many(
+        {
+            "otu_id": old["_id"],
+            "remote.id": {"$exists": True, "$nin": remote_sequence_ids},
+        }
+    )
+
+
 async def update_joined_otu(
     db, otu: dict, created_at: datetime.datetime, ref_id: str, user_id: str
 ) -> Union[dict, str, None]:
@@ -925,16 +1421,7 @@ async def update_joined_otu(
             },
         )
 
-        for sequence_update in sequence_updates:
-            remote_sequence_id = sequence_update["remote"]["id"]
-
-            update_result = await db.sequences.update_one(
-                {"reference.id": ref_id, "remote.id": remote_sequence_id},
-                {"$set": sequence_update},
-            )
-
-            if not update_result.matched_count:
-                await db.sequences.insert_one(sequence_update)
+        await upsert_remote_sequences(db, old, sequence_updates, ref_id)
 
         return old
 
@@ -5,6 +5,7 @@ from asyncio import gather
 from datetime import timedelta
 from logging import getLogger
 from pathlib import Path
+from typing import Dict
 
 import aiohttp
 import arrow
@@ -14,34 +15,55 @@ from virtool.data.utils import get_data_from_app
 from virtool.mongo.utils import get_one_field
 from virtool.errors import GitHubError
 from virtool.github import create_update_subdocument
-from virtool.history.db import patch_to_version
+from virtool.history.db import get_patched_otu
 from virtool.history.utils import remove_diff_files
 from virtool.http.utils import download_file
+from virtool.otus.db import join_many
 from virtool.references.db import (
+    check_reference_file_in_processes,
+    get_remote_otu_hashes,
+    store_otu_hashes,
     download_and_parse_release,
     fetch_and_update_release,
-    insert_change,
-    insert_joined_otu,
+    insert_changes,
+    insert_joined_otus,
+    set_processing,
     update_joined_otu,
 )
 from virtool.references.utils import (
-    check_import_data,
-    load_reference_file,
+    compute_otu_hash,
+    iter_reference_otus,
+    load_reference_metadata,
+    read_otu_batch,
 )
 from virtool.tasks.task import Task
-from virtool.utils import chunk_list, get_temp_dir, run_in_thread
+from virtool.utils import chunk_list, run_in_thread
 from virtool_core.models.enums import HistoryMethod
 
 logger = getLogger(__name__)
 
 
+def log_otu_issues(issues: Dict[str, dict]):
+    """
+    Log the issues found in OTUs being imported.
+
+    The issues don't prevent the OTUs from being imported, so they are only logged.
+
+    :param issues: the issues found in each OTU keyed by OTU ID
+
+    """
+    if issues:
+        logger.warning("Importing %d OTUs with issues", len(issues))
+        logger.debug("OTU issues: %s", issues)
+
+
 class CloneReferenceTask(Task):
     task_type = "clone_reference"
 
     def __init__(self, app, task_id):
         super().__init__(app, task_id)
 
-        self.steps = [self.copy_otus, self.create_history]
+        self.steps = [self.copy_otus]
 
     async def copy_otus(self):
         manifest = self.context["manifest"]
@@ -51,36 +73,40 @@ class CloneReferenceTask(Task):
 
         tracker = await self.get_tracker(len(manifest))
 
-        inserted_otu_ids = []
-
         await get_data_from_app(self.app).tasks.update(self.id, step="copy_otus")
 
-        for source_otu_id, version in manifest.items():
-            _, patched, _ = await patch_to_version(
-                self.app["config"].data_path, self.db, source_otu_id, version
-            )
-
-            otu_id = await insert_joined_otu(
-                self.db, patched, created_at, ref_id, user_id
-            )
+        batch_size = self.app["config"].reference_batch_size
+        data_path = self.app["config"].data_path
 
-            inserted_otu_ids.append(otu_id)
+        await set_processing(self.db, ref_id, True)
 
-            await tracker.add(1)
-
-        await self.update_context({"inserted_otu_ids": inserted_otu_ids})
+        for chunk in chunk_list(list(manifest.items()), batch_size):
+            patched_otus = await gather(
+                *[
+                    get_patched_otu(data_path, self.db, source_otu_id, version)
+                    for source_otu_id, version in chunk
+                ]
+            )
 
-    async def create_history(self):
-        user_id = self.context["user_id"]
-        inserted_otu_ids = self.context["inserted_otu_ids"]
+            joined_otus = await insert_joined_otus(
+                self.db,
+                patched_otus,
+                created_at,
+                ref_id,
+                user_id,
+                batch_size=batch_size,
+            )
 
-        tracker = await self.get_tracker(len(inserted_otu_ids))
+            await insert_changes(
+                self.app,
+                HistoryMethod.clone,
+                [(None, joined) for joined in joined_otus],
+                user_id,
+            )
 
-        await get_data_from_app(self.app).tasks.update(self.id, step="create_history")
+            await tracker.add(len(chunk))
 
-        for otu_id in inserted_otu_ids:
-            await insert_change(self.app, otu_id, HistoryMethod.clone, user_id)
-            await tracker.add(1)
+        await set_processing(self.db, ref_id, False)
 
     async def cleanup(self):
         ref_id = self.context["ref_id"]
@@ -91,14 +117,19 @@ class CloneReferenceTask(Task):
             "_id", {**query, "diff": "file"}
         )
 
+        otu_ids = await self.db.otus.distinct("_id", query)
+
         await get_data_from_app(self.app).tasks.update(self.id, step="cleanup")
 
         await gather(
             self.db.references.delete_one({"_id": ref_id}),
-            self.db.history.delete_many(query),
-            self.db.otus.delete_many(query),
-            self.db.sequences.delete_many(query),
+            self.db.history.delete_many(query, silent=True),
+            self.db.keyframes.delete_many(query),
+            self.db.otu_hashes.delete_many(query),
+            self.db.otus.delete_many(query, silent=True),
+            self.db.sequences.delete_many(query, silent=True),
             remove_diff_files(self.app, diff_file_change_ids),
+            self.db.snapshots.invalidate_many(otu_ids),
         )
 
 
@@ -115,12 +146,15 @@ class ImportReferenceTask(Task):
         ]
 
         self.import_data = None
+        self.otu_count = 0
 
     async def load_file(self):
         path = Path(self.context["path"])
 
         try:
-            self.import_data = await self.run_in_thread(load_reference_file, path)
+            self.import_data, self.otu_count = await self.run_in_thread(
+                load_reference_metadata, path
+            )
         except json.decoder.JSONDecodeError as err:
             return await self.error(str(err).split("JSONDecodeError: ")[1])
         except OSError as err:
@@ -130,9 +164,15 @@ class ImportReferenceTask(Task):
             return await self.error(str(err))
 
     async def validate(self):
-        if errors := check_import_data(self.import_data, strict=False, verify=True):
+        errors, issues = await check_reference_file_in_processes(
+            self.app, Path(self.context["path"]), strict=False, verify=True
+        )
+
+        if errors:
             return await self.error(errors)
 
+        log_otu_issues(issues)
+
     async def import_reference(self):
         ref_id = self.context["ref_id"]
         user_id = self.context["user_id"]
@@ -161,40 +201,38 @@ class ImportReferenceTask(Task):
 
         created_at = await get_one_field(self.db.references, "created_at", ref_id)
 
-        otus = self.import_data["otus"]
+        otus = iter_reference_otus(Path(self.context["path"]))
+
+        tracker = await self.get_tracker(self.otu_count)
 
-        tracker = await self.get_tracker(len(otus) * 2)
+        batch_size = self.app["config"].reference_batch_size
 
-        inserted_otu_ids = []
+        await set_processing(self.db, ref_id, True)
 
         async with self.db.create_session() as session:
-            for chunk in chunk_list(otus, 10):
-                chunk_otu_ids = await gather(
-                    *[
-                        insert_joined_otu(
-                            self.db, otu, created_at, ref_id, user_id, session
-                        )
-                        for otu in chunk
-                    ]
+            while chunk := await self.run_in_thread(read_otu_batch, otus, batch_size):
+                joined_otus = await insert_joined_otus(
+                    self.db,
+                    chunk,
+                    created_at,
+                    ref_id,
+                    user_id,
+                    session=session,
+                    batch_size=batch_size,
                 )
-                inserted_otu_ids.extend(chunk_otu_ids)
-                await tracker.add(len(chunk))
 
-            for chunk in chunk_list(inserted_otu_ids, 10):
-                await gather(
-                    *[
-                        insert_change(
-                            self.app,
-                            otu_id,
-                            HistoryMethod.import_otu,
-                            user_id,
-                            session=session,
-                        )
-                        for otu_id in chunk
-                    ]
+                await insert_changes(
+                    self.app,
+                    HistoryMethod.import_otu,
+                    [(None, joined) for joined in joined_otus],
+                    user_id,
+                    session=session,
                 )
+
                 await tracker.add(len(chunk))
 
+        await set_processing(self.db, ref_id, False)
+
 
 class RemoteReferenceTask(Task):
     task_type = "remote_reference"
@@ -204,15 +242,20 @@ class RemoteReferenceTask(Task):
 
         self.steps = [self.download, self.create_history, self.update_reference]
 
+        self.download_path = Path(self.temp_dir.name) / "reference.json.gz"
         self.import_data = None
-        self.inserted_otu_ids = []
+        self.otu_count = 0
 
     async def download(self):
         tracker = await self.get_tracker(self.context["release"]["size"])
 
         try:
-            self.import_data = await download_and_parse_release(
-                self.app, self.context["release"]["download_url"], self.id, tracker.add
+            self.import_data, self.otu_count = await download_and_parse_release(
+                self.app,
+                self.context["release"]["download_url"],
+                self.id,
+                tracker.add,
+                self.download_path,
             )
         except (aiohttp.ClientConnectorError, GitHubError):
             return await get_data_from_app(self.app).tasks.update(
@@ -236,41 +279,50 @@ class RemoteReferenceTask(Task):
             },
         )
 
-        error = check_import_data(self.import_data, strict=True, verify=True)
+        error, issues = await check_reference_file_in_processes(
+            self.app, self.download_path, strict=True, verify=True
+        )
 
         if error:
             return await get_data_from_app(self.app).tasks.update(self.id, error=error)
 
+        log_otu_issues(issues)
+
         await get_data_from_app(self.app).tasks.update(self.id, step="import")
 
     async def create_history(self):
-        otus = self.import_data["otus"]
+        otus = iter_reference_otus(self.download_path)
 
-        tracker = await self.get_tracker(len(otus))
+        tracker = await self.get_tracker(self.otu_count)
 
-        for otu in otus:
-            otu_id = await insert_joined_otu(
+        batch_size = self.app["config"].reference_batch_size
+
+        await set_processing(self.db, self.context["ref_id"], True)
+
+        while chunk := await self.run_in_thread(read_otu_batch, otus, batch_size):
+            joined_otus = await insert_joined_otus(
                 self.db,
-                otu,
+                chunk,
                 self.context["created_at"],
                 self.context["ref_id"],
                 self.context["user_id"],
+                batch_size=batch_size,
             )
-            self.inserted_otu_ids.append(otu_id)
-            await tracker.add(1)
 
-        await get_data_from_app(self.app).tasks.update(self.id, step="create_history")
+            await insert_changes(
+                self.app,
+                HistoryMethod.remote,
+                [(None, joined) for joined in joined_otus],
+                self.context["user_id"],
+            )
 
-    async def update_reference(self):
-        tracker = await self.get_tracker(len(self.import_data["otus"]))
+            await tracker.add(len(chunk))
 
-        for otu_id in self.inserted_otu_ids:
-            await insert_change(
-                self.app, otu_id, HistoryMethod.remote, self.context["user_id"]
-            )
+        await set_processing(self.db, self.context["ref_id"], False)
 
-            await tracker.add(1)
+        await get_data_from_app(self.app).tasks.update(self.id, step="create_history")
 
+    async def update_reference(self):
         await self.db.references.update_one(
             {
                 "_id": self.context["ref_id"],
@@ -356,12 +408,21 @@ class DeleteReferenceTask(Task):
             )
 
             await gather(
-                self.db.otus.delete_many({"_id": {"$in": unreferenced_otu_ids}}),
-                self.db.history.delete_many({"otu.id": {"$in": unreferenced_otu_ids}}),
+                self.db.otus.delete_many(
+                    {"_id": {"$in": unreferenced_otu_ids}}, silent=True
+                ),
+                self.db.history.delete_many(
+                    {"otu.id": {"$in": unreferenced_otu_ids}}, silent=True
+                ),
+                self.db.keyframes.delete_many(
+                    {"otu.id": {"$in": unreferenced_otu_ids}}
+                ),
+                self.db.otu_hashes.delete_many({"reference.id": ref_id}),
                 self.db.sequences.delete_many(
-                    {"otu_id": {"$in": unreferenced_otu_ids}}
+                    {"otu_id": {"$in": unreferenced_otu_ids}}, silent=True
                 ),
                 remove_diff_files(self.app, diff_file_change_ids),
+                self.db.snapshots.invalidate_many(unreferenced_otu_ids),
             )
 
             await get_data_from_app(self.app).tasks.update(
@@ -376,10 +437,11 @@ class DeleteReferenceTask(Task):
         user_id = self.context["user_id"]
 
         for ref_id in self.non_existent_references:
-            async for document in self.db.otus.find({"reference.id": ref_id}):
-                await get_data_from_app(self.app).otus.remove(
-                    document["_id"], user_id, silent=True
-                )
+            await get_data_from_app(self.app).otus.remove_many(
+                await self.db.otus.distinct("_id", {"reference.id": ref_id}),
+                user_id,
+                silent=True,
+            )
 
         await get_data_from_app(self.app).tasks.update(
             self.id,
@@ -402,6 +464,8 @@ class UpdateRemoteReferenceTask(Task):
             self.update_reference,
         ]
 
+        self.download_path = Path(self.temp_dir.name) / "reference.json.gz"
+
     async def download_and_extract(self):
         url = self.context["release"]["download_url"]
         file_size = self.context["release"]["size"]
@@ -409,43 +473,73 @@ class UpdateRemoteReferenceTask(Task):
         tracker = await self.get_tracker(file_size)
 
         try:
-            with get_temp_dir() as tempdir:
-                download_path = Path(tempdir) / "reference.tar.gz"
-
-                await download_file(self.app, url, download_path, tracker.add)
-
-                self.intermediate["update_data"] = await self.run_in_thread(
-                    load_reference_file, download_path
-                )
-
+            await download_file(self.app, url, self.download_path, tracker.add)
         except (aiohttp.ClientConnectorError, GitHubError):
             return await self.error("Could not download reference data")
 
+        _, self.intermediate["otu_count"] = await self.run_in_thread(
+            load_reference_metadata, self.download_path
+        )
+
         await get_data_from_app(self.app).tasks.update(self.id, step="download_and_extract")
 
     async def update_otus(self):
-        update_data = self.intermediate["update_data"]
+        tracker = await self.get_tracker(self.intermediate["otu_count"])
 
-        tracker = await self.get_tracker(len(update_data["otus"]))
+        otus = iter_reference_otus(self.download_path)
 
         # The remote ids in the update otus.
-        otu_ids_in_update = {otu["_id"] for otu in update_data["otus"]}
+        otu_ids_in_update = set()
 
         updated_list = []
 
-        for otu in update_data["otus"]:
-            old_or_id = await update_joined_otu(
-                self.db,
-                otu,
-                self.context["created_at"],
-                self.context["ref_id"],
-                self.context["user_id"],
+        ref_id = self.context["ref_id"]
+
+        batch_size = self.app["config"].reference_batch_size
+
+        while chunk := await self.run_in_thread(read_otu_batch, otus, batch_size):
+            hashes = await self.run_in_thread(
+                lambda: [compute_otu_hash(otu) for otu in chunk]
+            )
+
+            existing = await get_remote_otu_hashes(
+                self.db, ref_id, [otu["_id"] for otu in chunk]
             )
 
-            if old_or_id is not None:
+            new_hashes = []
+
+            for otu, otu_hash in zip(chunk, hashes):
+                otu_ids_in_update.add(otu["_id"])
+
+                document = existing.get(otu["_id"])
+
+                # Skip joining OTUs that haven't changed since they were last updated.
+                if document and document["hash"] == otu_hash:
+                    continue
+
+                old_or_id = await update_joined_otu(
+                    self.db,
+                    otu,
+                    self.context["created_at"],
+                    ref_id,
+                    self.context["user_id"],
+                )
+
+                if old_or_id is None:
+                    # The OTU is unchanged, but had no hash that could be used.
+                    new_hashes.append((document["_id"], otu_hash, document["version"]))
+                    continue
+
+                if isinstance(old_or_id, dict):
+                    new_hashes.append(
+                        (old_or_id["_id"], otu_hash, old_or_id["version"] + 1)
+                    )
+
                 updated_list.append(old_or_id)
 
-            await tracker.add(1)
+            await store_otu_hashes(self.db, new_hashes, ref_id)
+
+            await tracker.add(len(chunk))
 
         self.intermediate.update(
             {"otu_ids_in_update": otu_ids_in_update, "updated_list": updated_list}
@@ -458,23 +552,29 @@ class UpdateRemoteReferenceTask(Task):
 
         tracker = await self.get_tracker(len(updated_list))
 
-        for old_or_id in updated_list:
-            try:
-                otu_id = old_or_id["_id"]
-                old = old_or_id
-            except TypeError:
-                otu_id = old_or_id
-                old = None
+        for chunk in chunk_list(updated_list, self.app["config"].reference_batch_size):
+            old_otus = {d["_id"]: d for d in chunk if isinstance(d, dict)}
+            inserted_otu_ids = [d for d in chunk if isinstance(d, str)]
 
-            await insert_change(
+            joined_otus = await join_many(
+                self.db, [*old_otus.keys(), *inserted_otu_ids]
+            )
+
+            await insert_changes(
+                self.app,
+                HistoryMethod.update,
+                [(old, joined_otus[otu_id]) for otu_id, old in old_otus.items()],
+                self.context["user_id"],
+            )
+
+            await insert_changes(
                 self.app,
-                otu_id,
-                HistoryMethod.update if old else HistoryMethod.remote,
+                HistoryMethod.remote,
+                [(None, joined_otus[otu_id]) for otu_id in inserted_otu_ids],
                 self.context["user_id"],
-                old,
             )
 
-            await tracker.add(1)
+            await tracker.add(len(chunk))
 
         await get_data_from_app(self.app).tasks.update(self.id, step="create_history")
 
@@ -490,11 +590,13 @@ class UpdateRemoteReferenceTask(Task):
 
         tracker = await self.get_tracker(len(to_delete))
 
-        for otu_id in to_delete:
-            await get_data_from_app(self.app).otus.remove(
-                otu_id, self.context["user_id"]
-            )
-            await tracker.add(1)
+        await get_data_from_app(self.app).otus.remove_many(
+            to_delete, self.context["user_id"]
+        )
+
+        await tracker.add(len(to_delete))
+
+        await self.db.otu_hashes.delete_many({"_id": {"$in": to_delete}})
 
         await get_data_from_app(self.app).tasks.update(self.id, step="remove_otus")
 
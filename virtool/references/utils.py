@@ -1,7 +1,23 @@
 import gzip
+import hashlib
 import json
+import re
+import threading
+from itertools import islice
 from operator import itemgetter
-from typing import List, Set
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from cerberus import Validator
 
@@ -9,6 +25,11 @@ import virtool.otus.utils
 
 ISOLATE_KEYS = ["id", "source_type", "source_name", "default"]
 
+#: The number of characters to decompress at once when streaming a reference file.
+READ_CHUNK_SIZE = 2**16
+
+_validators = threading.local()
+
 RIGHTS = ["build", "modify", "modify_otu", "remove"]
 
 SEQUENCE_KEYS = ["accession", "definition", "host", "sequence"]
@@ -16,38 +37,172 @@ SEQUENCE_KEYS = ["accession", "definition", "host", "sequence"]
 
 def check_import_data(
     import_data: dict, strict: bool = True, verify: bool = True
-) -> List[dict]:
-    errors = detect_duplicates(import_data["otus"])
+) -> Tuple[List[dict], Dict[str, dict]]:
+    return check_otus_and_metadata(import_data, import_data["otus"], strict, verify)
+
+
+def check_reference_file(
+    path: Path, strict: bool = True, verify: bool = True
+) -> Tuple[List[dict], Dict[str, dict]]:
+    """
+    Check the reference file at ``path`` the same way as :func:`check_import_data`.
+
+    The file is streamed, so only one OTU is held in memory at a time.
+
+    :param path: the path to the otus.json.gz file
+    :param strict: require reference metadata and identifiers
+    :param verify: verify the OTUs
+    :return: a list of errors and the issues found in each OTU keyed by OTU ID
+
+    """
+    metadata = {}
 
-    v = Validator(get_import_schema(require_meta=strict), allow_unknown=True)
+    def otus():
+        for key, value in stream_reference_file(path):
+            if key is None:
+                yield value
+            else:
+                metadata[key] = value
 
-    v.validate(import_data)
+    errors, issues = check_otus(otus(), strict, verify)
+
+    return errors + check_metadata(metadata, strict), issues
+
+
+def check_otus_and_metadata(
+    metadata: dict, otus: Iterable[dict], strict: bool, verify: bool
+) -> Tuple[List[dict], Dict[str, dict]]:
+    errors, issues = check_otus(otus, strict, verify)
+
+    return errors + check_metadata(metadata, strict), issues
+
+
+def check_metadata(metadata: dict, strict: bool) -> List[dict]:
+    v = get_validator(get_import_schema, strict)
+
+    v.validate(metadata, normalize=False)
 
     if v.errors:
-        errors.append({"id": "file", "issues": v.errors})
+        return [{"id": "file", "issues": v.errors}]
+
+    return []
+
+
+def check_otus(
+    otus: Iterable[dict], strict: bool, verify: bool
+) -> Tuple[List[dict], Dict[str, dict]]:
+    """
+    Validate and verify ``otus`` and detect duplicates among them in a single pass.
+
+    ``otus`` can be any iterable, including a stream of OTUs being read from a file.
+
+    Only duplicates are errors. The issues found in each OTU are returned separately
+    and don't prevent the OTUs from being imported.
+
+    :param otus: the joined OTUs to check
+    :param strict: require OTU, isolate, and sequence identifiers
+    :param verify: verify the OTUs
+    :return: a list of errors and the issues found in each OTU keyed by OTU ID
+
+    """
+    issues_by_otu = {}
+
+    def checked():
+        for otu in otus:
+            if issues := check_otu(otu, strict, verify):
+                issues_by_otu[otu["_id"]] = issues
+
+            yield otu
+
+    return detect_duplicates(checked()), issues_by_otu
+
+
+def check_otu(otu: dict, strict: bool, verify: bool) -> Optional[dict]:
+    """
+    Validate and optionally verify a joined OTU.
+
+    :param otu: the joined OTU
+    :param strict: require OTU, isolate, and sequence identifiers
+    :param verify: verify the OTU
+    :return: the issues found in the OTU or ``None`` if there are none
+
+    """
+    verification = None
+
+    if verify:
+        verification = virtool.otus.utils.verify(otu)
+
+    validation = validate_otu(otu, strict)
+
+    issues = {}
+
+    if verification:
+        issues["verification"] = verification
+
+    if validation:
+        issues["validation"] = validation
+
+    return issues or None
 
-    otus = {}
 
-    for otu in import_data["otus"]:
-        verification = None
+def check_otu_batch(otus: List[dict], strict: bool, verify: bool) -> Dict[str, dict]:
+    """
+    Validate and optionally verify a batch of joined OTUs.
 
-        if verify:
-            verification = virtool.otus.utils.verify(otu)
+    This is CPU-bound and is intended to be run in a process pool.
 
-        validation = validate_otu(otu, strict)
+    :param otus: the joined OTUs
+    :param strict: require OTU, isolate, and sequence identifiers
+    :param verify: verify the OTUs
+    :return: the issues found in each OTU keyed by OTU ID
 
-        issues = {}
+    """
+    return {
+        otu["_id"]: issues for otu in otus if (issues := check_otu(otu, strict, verify))
+    }
 
-        if verification:
-            issues["verification"] = verification
 
-        if validation:
-            issues["validation"] = validation
+def compute_otu_hash(otu: dict) -> str:
+    """
+    Compute a hash of the content of a joined OTU from a reference file.
 
-        if issues:
-            otus[otu["_id"]] = issues
+    Only the fields compared by :func:`check_will_change` contribute to the hash. The
+    order of isolates and sequences is ignored.
 
-    return errors
+    :param otu: the joined OTU
+    :return: the hex digest of the hash
+
+    """
+    content = {
+        "abbreviation": otu.get("abbreviation", ""),
+        "name": otu["name"],
+        "schema": otu.get("schema", []),
+        "isolates": sorted(
+            (
+                {
+                    **{key: isolate.get(key) for key in ISOLATE_KEYS},
+                    "sequences": sorted(
+                        (
+                            {
+                                **{key: sequence.get(key) for key in SEQUENCE_KEYS},
+                                "id": (sequence.get("remote") or {}).get(
+                                    "id", sequence["_id"]
+                                ),
+                            }
+                            for sequence in isolate["sequences"]
+                        ),
+                        key=itemgetter("id"),
+                    ),
+                }
+                for isolate in otu["isolates"]
+            ),
+            key=itemgetter("id"),
+        ),
+    }
+
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True, default=str).encode()
+    ).hexdigest()
 
 
 def check_will_change(old: dict, imported: dict) -> bool:
@@ -157,86 +312,146 @@ def detect_duplicate_name(joined: dict, duplicates: Set[str], seen: Set[str]):
         seen.add(lowered)
 
 
-def detect_duplicates(otus: List[dict], strict: bool = True) -> List[dict]:
-    duplicate_abbreviations = set()
-    duplicate_ids = set()
-    duplicate_isolate_ids = {}
-    duplicate_names = set()
-    duplicate_sequence_ids = set()
-
-    seen_abbreviations = set()
-    seen_ids = set()
-    seen_names = set()
-    seen_sequence_ids = set()
+def detect_duplicates(otus: Iterable[dict], strict: bool = True) -> List[dict]:
+    detector = DuplicateDetector(strict)
 
     for joined in otus:
+        detector.add(joined)
+
+    return detector.compose_errors()
+
+
+class DuplicateDetector:
+    """
+    Detect duplicate names, abbreviations, and identifiers in OTUs as they are added.
+
+    Use this instead of :func:`detect_duplicates` when OTUs arrive in batches.
+
+    """
+
+    def __init__(self, strict: bool = True):
+        self.strict = strict
+
+        self.duplicate_abbreviations = set()
+        self.duplicate_ids = set()
+        self.duplicate_isolate_ids = {}
+        self.duplicate_names = set()
+        self.duplicate_sequence_ids = set()
+
+        self.seen_abbreviations = set()
+        self.seen_ids = set()
+        self.seen_names = set()
+        self.seen_sequence_ids = set()
+
+    def add(self, joined: dict):
+        """
+        Check a joined OTU against all previously added OTUs.
+
+        :param joined: the joined OTU
+        """
         detect_duplicate_abbreviation(
-            joined, duplicate_abbreviations, seen_abbreviations
+            joined, self.duplicate_abbreviations, self.seen_abbreviations
         )
 
-        detect_duplicate_name(joined, duplicate_names, seen_names)
+        detect_duplicate_name(joined, self.duplicate_names, self.seen_names)
 
-        if strict:
+        if self.strict:
             detect_duplicate_ids(
                 joined,
-                duplicate_ids,
-                seen_ids,
+                self.duplicate_ids,
+                self.seen_ids,
             )
 
-            detect_duplicate_isolate_ids(joined, duplicate_isolate_ids)
+            detect_duplicate_isolate_ids(joined, self.duplicate_isolate_ids)
 
             detect_duplicate_sequence_ids(
-                joined, duplicate_sequence_ids, seen_sequence_ids
+                joined, self.duplicate_sequence_ids, self.seen_sequence_ids
             )
 
-    errors = []
+    def compose_errors(self) -> List[dict]:
+        """
+        Compose errors for the duplicates found in all added OTUs.
+
+        :return: a list of errors
+        """
+        errors = []
+
+        if self.duplicate_abbreviations:
+            errors.append(
+                {
+                    "id": "duplicate_abbreviations",
+                    "message": "Duplicate OTU abbreviations found",
+                    "duplicates": list(self.duplicate_abbreviations),
+                }
+            )
 
-    if duplicate_abbreviations:
-        errors.append(
-            {
-                "id": "duplicate_abbreviations",
-                "message": "Duplicate OTU abbreviations found",
-                "duplicates": list(duplicate_abbreviations),
-            }
-        )
+        if self.duplicate_ids:
+            errors.append(
+                {
+                    "id": "duplicate_ids",
+                    "message": "Duplicate OTU ids found",
+                    "duplicates": list(self.duplicate_ids),
+                }
+            )
 
-    if duplicate_ids:
-        errors.append(
-            {
-                "id": "duplicate_ids",
-                "message": "Duplicate OTU ids found",
-                "duplicates": list(duplicate_ids),
-            }
-        )
+        if self.duplicate_isolate_ids:
+            errors.append(
+                {
+                    "id": "duplicate_isolate_ids",
+                    "message": "Duplicate isolate ids found in some OTUs",
+                    "duplicates": self.duplicate_isolate_ids,
+                }
+            )
 
-    if duplicate_isolate_ids:
-        errors.append(
-            {
-                "id": "duplicate_isolate_ids",
-                "message": "Duplicate isolate ids found in some OTUs",
-                "duplicates": duplicate_isolate_ids,
-            }
-        )
+        if self.duplicate_names:
+            errors.append(
+                {
+                    "id": "duplicate_names",
+                    "message": "Duplicate OTU names found",
+                    "duplicates": list(self.duplicate_names),
+                }
+            )
 
-    if duplicate_names:
-        errors.append(
-            {
-                "id": "duplicate_names",
-                "message": "Duplicate OTU names found",
-                "duplicates": list(duplicate_names),
-            }
-        )
+        if self.duplicate_sequence_ids:
+            errors.append(
+                {
+                    "id": "duplicate_sequence_ids",
+                    "message": "Duplicate sequence ids found",
+                    "duplicates": self.duplicate_sequence_ids,
+                }
+            )
 
-    if duplicate_sequence_ids:
-        errors.append(
-            {
-                "id": "duplicate_sequence_ids",
-                "message": "Duplicate sequence ids found",
-                "duplicates": duplicate_sequence_ids,
-            }
-        )
+        return errors
 
-    return errors
+
+def get_validator(get_schema: Callable[[bool], dict], strict: bool) -> Validator:
+    """
+    Get a cached validator for the schema returned by ``get_schema(strict)``.
+
+    Creating a Cerberus validator normalizes its schema, which is slow compared to
+    validating a single OTU. Validators hold the result of their last validation, so
+    one is cached for each schema and strictness level in each thread.
+
+    None of the reference schemas have normalization rules. Pass ``normalize=False``
+    when validating to skip copying the schema and document on every call.
+
+    :param get_schema: a schema function such as :func:`get_otu_schema`
+    :param strict: the value to pass to ``get_schema``
+    :return: the validator
+
+    """
+    try:
+        cache = _validators.cache
+    except AttributeError:
+        cache = _validators.cache = {}
+
+    key = (get_schema, strict)
+
+    try:
+        return cache[key]
+    except KeyError:
+        validator = cache[key] = Validator(get_schema(strict), allow_unknown=True)
+        return validator
 
 
 def get_import_schema(require_meta: bool = True) -> dict:
@@ -298,28 +513,258 @@ def load_reference_file(path: str) -> dict:
         return json.load(gzip_file)
 
 
+def load_reference_metadata(path: Path) -> Tuple[dict, int]:
+    """
+    Load the metadata from a reference file without holding its OTUs in memory.
+
+    The ``otus`` field of the returned metadata is an empty list if the file contains
+    a list of OTUs.
+
+    :param path: the path to the otus.json.gz file
+    :return: the reference metadata and the number of OTUs in the file
+
+    """
+    metadata = {}
+    otu_count = 0
+
+    for key, value in stream_reference_file(path):
+        if key is None:
+            otu_count += 1
+        else:
+            metadata[key] = value
+
+    return metadata, otu_count
+
+
+def iter_reference_otus(path: Path) -> Iterator[dict]:
+    """
+    Yield the OTUs in a reference file one at a time.
+
+    :param path: the path to the otus.json.gz file
+    :return: an iterator of joined OTUs
+
+    """
+    for key, value in stream_reference_file(path):
+        if key is None:
+            yield value
+
+
+def read_reference_batch(
+    stream: Iterator[Tuple[Optional[str], Any]], metadata: dict, size: int
+) -> List[dict]:
+    """
+    Read up to ``size`` OTUs from a stream returned by :func:`stream_reference_file`.
+
+    Top-level fields encountered while reading are added to ``metadata``. This is
+    intended to be called in a thread so that reading a reference file does not block
+    the event loop.
+
+    :param stream: the reference file stream
+    :param metadata: a dictionary to add top-level fields to
+    :param size: the maximum number of OTUs to read
+    :return: the OTUs
+
+    """
+    otus = []
+
+    for key, value in stream:
+        if key is None:
+            otus.append(value)
+
+            if len(otus) == size:
+                break
+        else:
+            metadata[key] = value
+
+    return otus
+
+
+def read_otu_batch(otus: Iterator[dict], size: int) -> List[dict]:
+    """
+    Read up to ``size`` OTUs from the iterator ``otus``.
+
+    This is intended to be called in a thread so that reading a reference file does not
+    block the event loop.
+
+    :param otus: an iterator of OTUs, as returned by :func:`iter_reference_otus`
+    :param size: the maximum number of OTUs to read
+    :return: the OTUs
+
+    """
+    return list(islice(otus, size))
+
+
+def stream_reference_file(path: Path) -> Iterator[Tuple[Optional[str], Any]]:
+    """
+    Incrementally parse a Virtool reference file.
+
+    Yields a ``(key, value)`` pair for each top-level field in the file. If the
+    ``otus`` field is a list, each OTU is yielded as ``(None, otu)`` and ``otus`` itself
+    is then yielded with an empty list as its value.
+
+    Only the OTU currently being parsed is held in memory.
+
+    :param path: the path to the otus.json.gz file
+    :return: an iterator of top-level fields and OTUs
+
+    """
+    with open(path, "rb") as handle, gzip.open(handle, "rt") as gzip_file:
+        reader = JSONStreamReader(gzip_file)
+
+        reader.consume("{")
+
+        if reader.peek() == "}":
+            return
+
+        while True:
+            key = reader.decode()
+            reader.consume(":")
+
+            if key == "otus" and reader.peek() == "[":
+                reader.consume("[")
+
+                if reader.peek() != "]":
+                    while True:
+                        yield None, reader.decode()
+
+                        if reader.peek() != ",":
+                            break
+
+                        reader.consume(",")
+
+                reader.consume("]")
+
+                yield key, []
+            else:
+                yield key, reader.decode()
+
+            if reader.peek() != ",":
+                break
+
+            reader.consume(",")
+
+        reader.consume("}")
+
+
+class JSONStreamReader:
+    """
+    Decode a JSON document from a text stream one value at a time.
+
+    Only the current value and the unread remainder of the last chunk read from the
+    stream are held in memory.
+
+    """
+
+    number_chars = frozenset("+-.0123456789Ee")
+    whitespace = re.compile(r"\s*")
+
+    def __init__(self, stream: IO[str], chunk_size: int = READ_CHUNK_SIZE):
+        self._buffer = ""
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._position = 0
+        self._stream = stream
+
+    def consume(self, char: str):
+        """
+        Consume the structural character ``char`` from the stream.
+
+        :param char: the expected character
+        :raises json.JSONDecodeError: if the next character is not ``char``
+        """
+        if self.peek() != char:
+            raise json.JSONDecodeError(
+                f"Expecting '{char}'", self._buffer, self._position
+            )
+
+        self._position += 1
+
+    def decode(self) -> Any:
+        """
+        Decode the next complete JSON value in the stream.
+
+        :return: the decoded value
+        :raises json.JSONDecodeError: if the value is invalid
+        """
+        self.peek()
+
+        # Double the read size on every retry, so a value spanning many chunks is
+        # decoded a logarithmic number of times rather than once per chunk.
+        size = self._chunk_size
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if self._read(size):
+                    size *= 2
+                    continue
+
+                raise
+
+            # A number could be truncated at the end of the buffer.
+            if (
+                end == len(self._buffer) or self._buffer[end] in self.number_chars
+            ) and self._read(size):
+                size *= 2
+                continue
+
+            self._position = end
+
+            return value
+
+    def peek(self) -> str:
+        """
+        Return the next non-whitespace character in the stream without consuming it.
+
+        :return: the next character
+        :raises json.JSONDecodeError: if the end of the stream is reached
+        """
+        while True:
+            self._position = self.whitespace.match(self._buffer, self._position).end()
+
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+
+            if not self._read():
+                raise json.JSONDecodeError(
+                    "Unexpected end of file", self._buffer, self._position
+                )
+
+    def _read(self, size: Optional[int] = None) -> bool:
+        chunk = self._stream.read(size or self._chunk_size)
+
+        if not chunk:
+            return False
+
+        self._buffer = self._buffer[self._position :] + chunk
+        self._position = 0
+
+        return True
+
+
 def validate_otu(otu: dict, strict: bool) -> dict:
     report = {"otu": None, "isolates": {}, "sequences": {}}
 
-    otu_validator = Validator(get_otu_schema(strict), allow_unknown=True)
+    otu_validator = get_validator(get_otu_schema, strict)
 
-    if not otu_validator.validate(otu):
+    if not otu_validator.validate(otu, normalize=False):
         report["otu"] = otu_validator.errors
 
     report["isolates"] = {}
 
     if "isolates" in otu:
-        isolate_validator = Validator(get_isolate_schema(strict), allow_unknown=True)
-        sequence_validator = Validator(get_sequence_schema(strict), allow_unknown=True)
+        isolate_validator = get_validator(get_isolate_schema, strict)
+        sequence_validator = get_validator(get_sequence_schema, strict)
 
         for isolate in otu["isolates"]:
-            if not isolate_validator.validate(isolate):
+            if not isolate_validator.validate(isolate, normalize=False):
                 report["isolates"][isolate["id"]] = isolate_validator.errors
 
             if "sequences" in isolate:
                 for sequence in isolate["sequences"]:
-                    if not sequence_validator.validate(sequence):
-                        report["sequences"][sequence["_id"]] = isolate_validator.errors
+                    if not sequence_validator.validate(sequence, normalize=False):
+                        report["sequences"][sequence["_id"]] = sequence_validator.errors
 
     if any(value for value in report.values()):
         return report
@@ -35,7 +35,7 @@ from virtool.caches.models import SampleArtifactCache
 from virtool.caches.utils import join_cache_path
 from virtool.data.errors import ResourceConflictError, ResourceNotFoundError
 from virtool.data.utils import get_data_from_req
-from virtool.errors import DatabaseError
+from virtool.errors import DatabaseError, InvalidCursorError
 from virtool.http.policy import policy, PermissionsRoutePolicy
 from virtool.http.routes import Routes
 from virtool.http.schema import schema
@@ -89,17 +89,30 @@ class SamplesView(PydanticView):
         page: conint(gt=0) = 1,
         per_page: conint(ge=1, le=100) = 25,
         workflows: Optional[List[str]] = Field(default_factory=lambda: []),
+        after: Optional[str] = None,
     ) -> Union[r200[SampleSearchResult], r400]:
         """
         Find samples, filtering by data passed as URL parameters
 
+        Pass an ``after`` cursor to page through samples without skipping. An empty
+        cursor returns the first page and each page includes a ``next`` cursor.
+
         Status Codes:
             200: Successful operation
             400: Invalid query
         """
-        search_result = await get_data_from_req(self.request).samples.find(
-            label, page, per_page, find, workflows, self.request["client"]
-        )
+        try:
+            search_result = await get_data_from_req(self.request).samples.find(
+                label,
+                page,
+                per_page,
+                find,
+                workflows,
+                self.request["client"],
+                after,
+            )
+        except InvalidCursorError:
+            raise InvalidQuery({"after": ["Invalid cursor"]})
 
         return json_response(search_result)
 
@@ -1,6 +1,6 @@
 import asyncio
 import math
-from typing import List, Optional
+from typing import List, Optional, Union
 
 import virtool_core.utils
 from motor.motor_asyncio import AsyncIOMotorClientSession
@@ -9,7 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncEngine
 from virtool_core.models.samples import SampleSearchResult, Sample
 
 import virtool.utils
-from virtool.api.utils import compose_regex_query
+from virtool.api.utils import compose_regex_query, find_after
 from virtool.config.cls import Config
 from virtool.data.errors import ResourceConflictError, ResourceNotFoundError
 from virtool.data.piece import DataLayerPiece
@@ -29,7 +29,11 @@ from virtool.samples.db import (
     ArtifactsAndReadsTransform,
     validate_force_choice_group,
 )
-from virtool.samples.oas import CreateSampleSchema, EditSampleSchema
+from virtool.samples.oas import (
+    CreateSampleSchema,
+    EditSampleSchema,
+    SampleCursorSearchResult,
+)
 from virtool.samples.utils import SampleRight, join_sample_path
 from virtool.subtractions.db import AttachSubtractionTransform
 from virtool.users.db import AttachUserTransform
@@ -50,9 +54,17 @@ class SamplesData(DataLayerPiece):
         term: str,
         workflows: List[str],
         client,
-    ) -> SampleSearchResult:
+        after: Optional[str] = None,
+    ) -> Union[SampleSearchResult, SampleCursorSearchResult]:
         """
         Find and filter samples.
+
+        If ``after`` is provided, the page after the sample it points to is found
+        instead of skipping to ``page``. An empty ``after`` gets the first page. The
+        result includes a ``next`` cursor for the following page and its counts are
+        cached for a short time.
+
+        :raises InvalidCursorError: if ``after`` is not a valid cursor
         """
         queries = []
 
@@ -86,34 +98,53 @@ class SamplesData(DataLayerPiece):
 
         search_query = {"$and": [base_query, query]}
 
-        cursor = self._db.samples.find(
-            search_query, LIST_PROJECTION, sort=[("created_at", -1)]
-        )
+        if after is not None:
+            documents, next_cursor = await find_after(
+                self._db.samples,
+                search_query,
+                after,
+                per_page,
+                [("created_at", -1)],
+                LIST_PROJECTION,
+            )
 
-        found_count, total_count = await asyncio.gather(
-            self._db.samples.count_documents(search_query),
-            self._db.samples.count_documents(base_query),
-        )
+            found_count, total_count = await asyncio.gather(
+                self._db.count_cache.count(self._db.samples, search_query),
+                self._db.count_cache.count(self._db.samples, base_query),
+            )
+        else:
+            cursor = self._db.samples.find(
+                search_query, LIST_PROJECTION, sort=[("created_at", -1)]
+            )
 
-        if page > 1:
-            cursor.skip((page - 1) * per_page)
+            found_count, total_count = await asyncio.gather(
+                self._db.samples.count_documents(search_query),
+                self._db.samples.count_documents(base_query),
+            )
+
+            if page > 1:
+                cursor.skip((page - 1) * per_page)
+
+            documents = await asyncio.shield(cursor.to_list(per_page))
 
         documents = await apply_transforms(
-            [
-                base_processor(document)
-                for document in await asyncio.shield(cursor.to_list(per_page))
-            ],
+            [base_processor(document) for document in documents],
             [AttachLabelsTransform(self._pg), AttachUserTransform(self._db)],
         )
 
-        return SampleSearchResult(
-            documents=documents,
-            found_count=found_count,
-            total_count=total_count,
-            page=page,
-            page_count=int(math.ceil(found_count / per_page)),
-            per_page=per_page,
-        )
+        search_result = {
+            "documents": documents,
+            "found_count": found_count,
+            "total_count": total_count,
+            "page": page,
+            "page_count": int(math.ceil(found_count / per_page)),
+            "per_page": per_page,
+        }
+
+        if after is None:
+            return SampleSearchResult(**search_result)
+
+        return SampleCursorSearchResult(**search_result, next=next_cursor)
 
     async def get(self, sample_id: str) -> Sample:
         document = await self._db.samples.find_one({"_id": sample_id})
@@ -3,7 +3,7 @@ from typing import Any, Optional
 from pydantic import BaseModel, constr, Field, conlist
 from virtool_core.models.analysis import AnalysisMinimal
 from virtool_core.models.enums import LibraryType
-from virtool_core.models.samples import SampleMinimal, Sample
+from virtool_core.models.samples import SampleMinimal, Sample, SampleSearchResult
 from virtool_core.models.enums import QuickAnalyzeWorkflow
 
 
@@ -34,6 +34,17 @@ class GetSamplesResponse(SampleMinimal):
         }
 
 
+class SampleCursorSearchResult(SampleSearchResult):
+    """
+    A page of samples found with a cursor.
+
+    ``next`` is the cursor for the following page and is ``None`` on the last page.
+
+    """
+
+    next: Optional[str]
+
+
 class GetSampleResponse(Sample):
     class Config:
         schema_extra = {
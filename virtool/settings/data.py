@@ -1,14 +1,38 @@
+import asyncio
+from logging import getLogger
+from typing import Optional
+
+from aioredis import ChannelClosedError, Redis
 from virtool_core.models.settings import Settings
+from virtool_core.redis import resubscribe
 
 from virtool.mongo.core import DB
 from virtool.settings.oas import UpdateSettingsSchema
 
+logger = getLogger(__name__)
+
 PROJECTION = {"_id": False}
 
+#: The Redis channel that settings changes are published on.
+SETTINGS_CHANNEL = "channel:settings"
+
 
 class SettingsData:
-    def __init__(self, db):
+    """
+    Reads and updates the application settings.
+
+    The settings are cached after they are first read. When ``redis`` is provided,
+    updates are published on :data:`SETTINGS_CHANNEL` so other processes running
+    :meth:`listen` clear their cached settings. Settings that were read or written
+    while a notification arrived are not cached.
+
+    """
+
+    def __init__(self, db, redis: Optional[Redis] = None):
         self._db: DB = db
+        self._redis = redis
+        self._settings: Optional[Settings] = None
+        self._generation = 0
 
     async def get_all(self) -> Settings:
         """
@@ -17,12 +41,16 @@ class SettingsData:
         :return: the application settings
 
         """
+        if self._settings is None:
+            generation = self._generation
 
-        settings = await self._db.settings.find_one(
-            {"_id": "settings"}, projection=PROJECTION
-        )
+            settings = await self._db.settings.find_one(
+                {"_id": "settings"}, projection=PROJECTION
+            )
 
-        return Settings(**settings)
+            return self._cache(Settings(**settings), generation)
+
+        return self._settings.copy(deep=True)
 
     async def update(self, data: UpdateSettingsSchema) -> Settings:
         """
@@ -31,12 +59,18 @@ class SettingsData:
         :param data: updates to the current settings
         :return: the application settings
         """
+        generation = self._generation
 
         updated = await self._db.settings.find_one_and_update(
             {"_id": "settings"}, {"$set": data.dict(exclude_unset=True)}
         )
 
-        return Settings(**updated)
+        settings = self._cache(Settings(**updated), generation)
+
+        if self._redis:
+            await self._redis.publish(SETTINGS_CHANNEL, "update")
+
+        return settings
 
     async def ensure(self) -> Settings:
         """
@@ -44,6 +78,7 @@ class SettingsData:
 
         :return: the application settings
         """
+        generation = self._generation
 
         existing = await self._db.settings.find_one({"_id": "settings"}, PROJECTION) or {}
 
@@ -51,4 +86,56 @@ class SettingsData:
 
         await self._db.settings.update_one({"_id": "settings"}, {"$set": settings}, upsert=True)
 
+        self._cache(Settings(**settings), generation)
+
         return Settings(**settings)
+
+    async def listen(self):
+        """
+        Clear the cached settings whenever a settings update is published on
+        :data:`SETTINGS_CHANNEL`.
+
+        Runs until cancelled.
+
+        """
+        (channel,) = await self._redis.subscribe(SETTINGS_CHANNEL)
+
+        # Updates published before subscribing would have been missed.
+        self._clear()
+
+        try:
+            while True:
+                try:
+                    await channel.get()
+                except ChannelClosedError:
+                    try:
+                        channel = await asyncio.wait_for(
+                            resubscribe(self._redis, SETTINGS_CHANNEL), 10
+                        )
+                    except asyncio.TimeoutError:
+                        logger.warning("Could not resubscribe to %s", SETTINGS_CHANNEL)
+                        await asyncio.sleep(10)
+
+                self._clear()
+        except asyncio.CancelledError:
+            pass
+
+    def _cache(self, settings: Settings, generation: int) -> Settings:
+        """
+        Cache ``settings`` unless the cache was cleared since ``generation``.
+
+        :param settings: the settings to cache
+        :param generation: the generation when reading or writing the settings began
+        :return: a copy of the settings
+
+        """
+        # Settings read before the cache was cleared may be older than the update
+        # that cleared it.
+        if generation == self._generation:
+            self._settings = settings
+
+        return settings.copy(deep=True)
+
+    def _clear(self):
+        self._settings = None
+        self._generation += 1
@@ -4,7 +4,7 @@ import logging
 import signal
 import sys
 import typing
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import Dict
 from urllib.parse import urlparse, urlunparse
 
@@ -25,10 +25,15 @@ from virtool.blast.data import BLASTData
 from virtool.data.layer import DataLayer
 from virtool.data.utils import get_data_from_app
 from virtool.dev.fake import create_fake_data_path
-from virtool.dispatcher.client import DispatcherClient
-from virtool.dispatcher.dispatcher import Dispatcher
+from virtool.dispatcher.client import DISPATCH_STREAM, DispatcherClient
+from virtool.dispatcher.dispatcher import Dispatcher, Fetchers
 from virtool.dispatcher.events import DispatcherSQLEvents
-from virtool.dispatcher.listener import RedisDispatcherListener
+from virtool.dispatcher.listener import (
+    MergedDispatcherListener,
+    MongoChangeStreamDispatcherListener,
+    RedisDispatcherListener,
+    RedisStreamDispatcherListener,
+)
 from virtool.fake.wrapper import FakerWrapper
 from virtool.groups.data import GroupsData
 from virtool.history.data import HistoryData
@@ -135,7 +140,7 @@ async def startup_data(app: App):
         AnalysisData(app["db"], app["config"], app["pg"]),
         BLASTData(app["db"], app["pg"]),
         GroupsData(app["db"]),
-        SettingsData(app["db"]),
+        SettingsData(app["db"], app["redis"]),
         HistoryData(app["config"].data_path, app["db"]),
         HmmData(app["client"], app["config"], app["db"]),
         LabelsData(app["db"], app["pg"]),
@@ -161,9 +166,27 @@ async def startup_dispatcher(app: Application):
 
     DispatcherSQLEvents(app["dispatcher_interface"].enqueue_change)
 
-    app["dispatcher"] = Dispatcher(
-        app["pg"], app["db"], RedisDispatcherListener(app["redis"], "channel:dispatch")
-    )
+    config = app["config"]
+
+    if config.dispatch_stream:
+        listener = RedisStreamDispatcherListener(
+            app["redis"],
+            DISPATCH_STREAM,
+            config.dispatch_group,
+        )
+    else:
+        listener = RedisDispatcherListener(app["redis"], "channel:dispatch")
+
+    if config.dispatch_change_streams:
+        # Changes to PostgreSQL data are still received through Redis.
+        listener = MergedDispatcherListener(
+            listener,
+            MongoChangeStreamDispatcherListener(
+                app["db"].motor_client, [field.name for field in fields(Fetchers)]
+            ),
+        )
+
+    app["dispatcher"] = Dispatcher(app["pg"], app["db"], listener)
 
     await get_scheduler_from_app(app).spawn(app["dispatcher"].run())
 
@@ -283,10 +306,20 @@ async def startup_databases(app: Application):
 
     app["redis"] = redis
 
-    dispatcher_interface = DispatcherClient(app["redis"])
+    dispatcher_interface = DispatcherClient(
+        app["redis"],
+        window=app["config"].dispatch_window,
+        stream=app["config"].dispatch_stream,
+    )
     await get_scheduler_from_app(app).spawn(dispatcher_interface.run())
 
-    app["db"] = DB(mongo, dispatcher_interface.enqueue_change, RandomIdProvider())
+    app["db"] = DB(
+        mongo,
+        dispatcher_interface.enqueue_change,
+        RandomIdProvider(),
+        silent=app["config"].dispatch_change_streams,
+        snapshot_path=app["config"].data_path / "history" / "snapshots",
+    )
 
     app["dispatcher_interface"] = dispatcher_interface
 
@@ -334,10 +367,15 @@ async def startup_settings(app: typing.Union[dict, Application]):
 
     Performs migration of old settings style to `v3.3.0` if necessary.
 
+    Starts listening for settings updates made by other processes.
+
     :param app: the app object
 
     """
-    await get_data_from_app(app).settings.ensure()
+    settings_data = get_data_from_app(app).settings
+
+    await settings_data.ensure()
+    await get_scheduler_from_app(app).spawn(settings_data.listen())
 
 
 async def startup_version(app: typing.Union[dict, Application]):
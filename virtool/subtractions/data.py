@@ -202,7 +202,7 @@ class SubtractionsData(DataLayerPiece):
                 session=session,
             )
 
-            if update_result.modified_count == 0:
+            if update_result.matched_count == 0:
                 raise ResourceNotFoundError
 
             await asyncio.gather(
@@ -214,7 +214,7 @@ class SubtractionsData(DataLayerPiece):
                 ),
             )
 
-        return update_result.modified_count
+        return update_result.matched_count
 
     async def finalize(self, subtraction_id: str, data: FinalizeSubtractionRequest):
         """
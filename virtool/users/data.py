@@ -86,6 +86,8 @@ class UsersData:
                 session=session,
             )
 
+        self._mongo.user_cache.invalidate(document["_id"])
+
         return await fetch_complete_user(self._mongo, document["_id"])
 
     async def find_or_create_b2c_user(
@@ -187,6 +189,8 @@ class UsersData:
                 {"_id": user_id}, {"$set": update}
             )
 
+            self._mongo.user_cache.invalidate(user_id)
+
             await update_sessions_and_keys(
                 self._mongo,
                 user_id,
@@ -1,8 +1,10 @@
 import random
+import time
 from asyncio import gather
+from collections import OrderedDict
 from dataclasses import dataclass
 from logging import Logger
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 from motor.motor_asyncio import AsyncIOMotorClientSession
 from virtool_core.models.user import User
@@ -40,6 +42,15 @@ ATTACH_PROJECTION = [
     "handle",
 ]
 
+#: The number of seconds user data attached to other documents is cached for.
+USER_CACHE_TTL = 60
+
+#: The number of seconds authenticated sessions and API keys are cached for.
+AUTH_CACHE_TTL = 10
+
+#: The maximum number of authenticated sessions and API keys to cache.
+AUTH_CACHE_SIZE = 1000
+
 
 @dataclass
 class B2CUserAttributes:
@@ -53,6 +64,176 @@ class B2CUserAttributes:
     family_name: str
 
 
+class UserCache:
+    """
+    Caches the user data attached to other documents by :class:`AttachUserTransform`
+    and :func:`extend_user`.
+
+    Cached users expire after ``ttl`` seconds, so changes made by other processes are
+    eventually seen. Call :meth:`invalidate` when a user is changed so the change is
+    seen immediately.
+
+    """
+
+    def __init__(self, collection, ttl: float = USER_CACHE_TTL):
+        self._collection = collection
+        self._ttl = ttl
+        self._users: Dict[str, Tuple[float, Document]] = {}
+
+    async def get(self, user_id: str) -> Optional[Document]:
+        """
+        Get the attachable data for a user.
+
+        :param user_id: the ID of the user
+        :return: the user data or ``None`` if the user does not exist
+
+        """
+        return (await self.get_many([user_id])).get(user_id)
+
+    async def get_many(self, user_ids: Iterable[str]) -> Dict[str, Document]:
+        """
+        Get the attachable data for several users.
+
+        Users that aren't cached are fetched from the database in one query. Users that
+        don't exist are left out of the result.
+
+        :param user_ids: the IDs of the users
+        :return: the user data keyed by user ID
+
+        """
+        now = time.monotonic()
+
+        users = {}
+        missing = []
+
+        for user_id in user_ids:
+            try:
+                expires_at, user = self._users[user_id]
+            except KeyError:
+                missing.append(user_id)
+                continue
+
+            if expires_at > now:
+                users[user_id] = user
+            else:
+                missing.append(user_id)
+
+        if missing:
+            async for document in self._collection.find(
+                {"_id": {"$in": missing}}, ATTACH_PROJECTION
+            ):
+                user = base_processor(document)
+
+                self._users[user["id"]] = (now + self._ttl, user)
+                users[user["id"]] = user
+
+        return users
+
+    def invalidate(self, user_id: str):
+        """
+        Remove a user from the cache.
+
+        :param user_id: the ID of the user
+
+        """
+        self._users.pop(user_id, None)
+
+
+class AuthCache:
+    """
+    Caches the sessions and API keys used to authenticate requests.
+
+    Entries are keyed by hashed credentials and expire after ``ttl`` seconds. When the
+    cache is full, the least recently used entry is removed. Call
+    :meth:`invalidate_session` or :meth:`invalidate_user` when a session or the
+    sessions and API keys of a user change.
+
+    """
+
+    def __init__(self, ttl: float = AUTH_CACHE_TTL, max_size: int = AUTH_CACHE_SIZE):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[Any]:
+        """
+        Get a cached value.
+
+        :param key: the key built from the hashed credential
+        :return: the value or ``None`` if it isn't cached or has expired
+
+        """
+        try:
+            expires_at, _, _, value = self._entries[key]
+        except KeyError:
+            return None
+
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+
+        return value
+
+    def set(
+        self,
+        key: tuple,
+        value: Any,
+        user_id: Optional[str],
+        session_id: Optional[str] = None,
+    ):
+        """
+        Cache a value.
+
+        :param key: the key built from the hashed credential
+        :param value: the value to cache
+        :param user_id: the ID of the user the credential belongs to
+        :param session_id: the ID of the session the credential belongs to
+
+        """
+        self._entries[key] = (time.monotonic() + self._ttl, user_id, session_id, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate_session(self, session_id: str):
+        """
+        Remove the entries for a session.
+
+        :param session_id: the ID of the session
+
+        """
+        self._invalidate(
+            lambda user_id, entry_session_id: entry_session_id == session_id
+        )
+
+    def invalidate_user(self, user_id: str):
+        """
+        Remove the entries for the sessions and API keys of a user.
+
+        :param user_id: the ID of the user
+
+        """
+        self._invalidate(lambda entry_user_id, session_id: entry_user_id == user_id)
+
+    def clear(self):
+        """
+        Remove all entries.
+
+        """
+        self._entries.clear()
+
+    def _invalidate(self, predicate: Callable[[Optional[str], Optional[str]], bool]):
+        for key in [
+            key
+            for key, (_, user_id, session_id, _) in self._entries.items()
+            if predicate(user_id, session_id)
+        ]:
+            del self._entries[key]
+
+
 class AttachUserTransform(AbstractTransform):
     """
     Attaches more complete user data to a document with a `user.id` field.
@@ -115,9 +296,7 @@ class AttachUserTransform(AbstractTransform):
 
     async def prepare_one(self, document):
         user_id = self._extract_user_id(document)
-        user_data = base_processor(
-            await self._db.users.find_one(user_id, ATTACH_PROJECTION)
-        )
+        user_data = await self._db.user_cache.get(user_id)
 
         if not user_data:
             raise KeyError(f"Document contains non-existent user: {user_id}.")
@@ -127,20 +306,13 @@ class AttachUserTransform(AbstractTransform):
     async def prepare_many(
         self, documents: List[Document]
     ) -> Dict[Union[int, str], Any]:
-        user_ids = list({self._extract_user_id(document) for document in documents})
-
-        return {
-            document["_id"]: base_processor(document)
-            async for document in self._db.users.find(
-                {"_id": {"$in": user_ids}}, ATTACH_PROJECTION
-            )
-        }
+        return await self._db.user_cache.get_many(
+            {self._extract_user_id(document) for document in documents}
+        )
 
 
 async def extend_user(db, user: Dict[str, Any]) -> Dict[str, Any]:
-    user_id = user["id"]
-
-    user_data = base_processor(await db.users.find_one(user_id, ATTACH_PROJECTION))
+    user_data = await db.user_cache.get(user["id"])
 
     extended = {
         **user,
@@ -264,6 +436,8 @@ async def update_sessions_and_keys(
     session: Optional[AsyncIOMotorClientSession] = None,
 ):
     """
+    Update the sessions and API keys of a user after their groups or permissions
+    change, and remove them from the authentication cache.
 
     :param db: a database client
     :param user_id: the id of the user to update keys and session for
@@ -306,6 +480,8 @@ async def update_sessions_and_keys(
         session=session,
     )
 
+    db.auth_cache.invalidate_user(user_id)
+
 
 async def fetch_complete_user(mongo, user_id: str) -> Optional[User]:
     user = await mongo.users.find_one(user_id)
@@ -86,12 +86,25 @@ async def get_session(
     Will return `None` if the session doesn't exist or the session id and token do not
     go together.
 
+    Authenticated sessions are cached in ``db.auth_cache`` by their ID and hashed token.
+
     :param db: the application database client
     :param session_id: the session id
     :param session_token: the token for the session
     :return: a session document
 
     """
+    hashed_token = (
+        None
+        if session_token is None
+        else hashlib.sha256(session_token.encode()).hexdigest()
+    )
+
+    cache_key = ("session", session_id, hashed_token)
+
+    if document := db.auth_cache.get(cache_key):
+        return document, session_token
+
     document = await db.sessions.find_one({"_id": session_id})
 
     if document is None:
@@ -105,9 +118,11 @@ async def get_session(
     if session_token is None:
         return None, None
 
-    hashed_token = hashlib.sha256(session_token.encode()).hexdigest()
-
     if document_token == hashed_token:
+        db.auth_cache.set(
+            cache_key, document, document["user"]["id"], session_id=session_id
+        )
+
         return document, session_token
 
 
@@ -182,4 +197,6 @@ async def replace_session(
     :return: new session document and token
     """
     await db.sessions.delete_one({"_id": session_id})
+    db.auth_cache.invalidate_session(session_id)
+
     return await create_session(db, ip, user_id, remember=remember)